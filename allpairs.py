@@ -0,0 +1,160 @@
+# allpairs.py
+"""
+Matrice des latences minimales entre toutes les paires de nœuds
+(cf. Network.all_pairs_latency et la commande all-pairs).
+
+Deux méthodes, choisies selon une estimation de leur coût :
+
+- "floyd"    : Floyd–Warshall vectorisé avec NumPy, O(n³) mais sans boucle
+               Python par arête ; le plus rapide pour les graphes petits ou denses ;
+- "dijkstra" : un Dijkstra par source, réparti sur un pool de processus ;
+               O(n·m log n), pour les grands graphes peu denses.
+
+Les paires sans chemin valent +inf.
+"""
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+
+import networkx as nx
+import numpy as np
+
+AUTO = "auto"
+FLOYD = "floyd"
+DIJKSTRA = "dijkstra"
+BACKENDS = (AUTO, FLOYD, DIJKSTRA)
+
+# Coûts unitaires mesurés (s) : par triplet (k, i, j) pour Floyd–Warshall,
+# par (source, nœud ou arête visité) pour Dijkstra
+FLOYD_UNIT_COST = 3e-9
+DIJKSTRA_UNIT_COST = 7e-7
+
+# Au-delà, Floyd–Warshall demanderait trop de mémoire temporaire (2 matrices n×n)
+FLOYD_MAX_NODES = 5000
+
+
+class LatencyMatrix(NamedTuple):
+    """Latences minimales : matrix[index[u], index[v]] (ms), +inf si pas de chemin."""
+    nodes: List[str]
+    index: Dict[str, int]
+    matrix: np.ndarray
+    backend: str
+
+    def latency(self, u, v) -> float:
+        return float(self.matrix[self.index[u], self.index[v]])
+
+    def save(self, path: str) -> List[str]:
+        """
+        Exporte la matrice : .npy (NumPy, ordre des nœuds dans <fichier>.nodes.txt)
+        ou .csv (nœuds en en-tête de ligne et de colonne, cellule vide si pas
+        de chemin). Retourne la liste des fichiers écrits.
+        """
+        if path.endswith(".npy"):
+            np.save(path, self.matrix)
+            nodes_path = path[: -len(".npy")] + ".nodes.txt"
+            with open(nodes_path, "w", encoding="utf-8") as f:
+                f.write("".join(f"{n}\n" for n in self.nodes))
+            return [path, nodes_path]
+        if path.endswith(".csv"):
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["", *self.nodes])
+                for node, row in zip(self.nodes, self.matrix):
+                    writer.writerow([node, *(_cell(x) for x in row)])
+            return [path]
+        raise ValueError(f"Format d'export inconnu : {path} (.npy ou .csv).")
+
+
+def _cell(x: float) -> str:
+    if x == np.inf:
+        return ""
+    return str(int(x)) if x.is_integer() else repr(float(x))
+
+
+# ---------- Floyd–Warshall (NumPy) ----------
+
+def _floyd_warshall(graph, nodes: List[str], index: Dict[str, int]) -> np.ndarray:
+    n = len(nodes)
+    dist = np.full((n, n), np.inf)
+    if graph.number_of_edges():
+        rows, cols, lats = zip(
+            *((index[u], index[v], lat) for u, v, lat in graph.edges(data="latency", default=1))
+        )
+        rows, cols = np.array(rows), np.array(cols)
+        # liens parallèles impossibles (Graph / DiGraph) : affectation directe
+        dist[rows, cols] = lats
+        if not graph.is_directed():
+            dist[cols, rows] = lats
+    np.fill_diagonal(dist, np.minimum(dist.diagonal(), 0))
+    for k in range(n):
+        np.minimum(dist, dist[:, k, None] + dist[None, k, :], out=dist)
+    return dist
+
+
+# ---------- Dijkstra par source (pool de processus) ----------
+
+_worker_graph = None
+_worker_index: Optional[Dict[str, int]] = None
+
+
+def _init_worker(graph, index):
+    global _worker_graph, _worker_index
+    _worker_graph, _worker_index = graph, index
+
+
+def _dijkstra_rows(sources: List[str]) -> np.ndarray:
+    rows = np.full((len(sources), len(_worker_index)), np.inf)
+    for row, src in zip(rows, sources):
+        lengths = nx.single_source_dijkstra_path_length(_worker_graph, src, weight="latency")
+        row[[_worker_index[n] for n in lengths]] = list(lengths.values())
+    return rows
+
+
+def _dijkstra(graph, nodes: List[str], index: Dict[str, int], workers: int) -> np.ndarray:
+    if workers <= 1 or len(nodes) < 2 * workers:
+        _init_worker(graph, index)
+        try:
+            return _dijkstra_rows(nodes)
+        finally:
+            _init_worker(None, None)
+    # quelques lots par processus : équilibre la charge sans multiplier les échanges
+    size = max(1, len(nodes) // (4 * workers))
+    chunks = [nodes[i:i + size] for i in range(0, len(nodes), size)]
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(graph, index)) as pool:
+        return np.vstack(list(pool.map(_dijkstra_rows, chunks)))
+
+
+# ---------- API ----------
+
+def choose_backend(n_nodes: int, n_edges: int, directed: bool, workers: int) -> str:
+    """Méthode la moins coûteuse d'après FLOYD_UNIT_COST / DIJKSTRA_UNIT_COST."""
+    if n_nodes > FLOYD_MAX_NODES:
+        return DIJKSTRA
+    arcs = n_edges if directed else 2 * n_edges
+    floyd = FLOYD_UNIT_COST * n_nodes ** 3
+    dijkstra = DIJKSTRA_UNIT_COST * n_nodes * (n_nodes + arcs) / max(1, workers)
+    return FLOYD if floyd <= dijkstra else DIJKSTRA
+
+
+def all_pairs_latency(graph, backend: str = AUTO, workers: Optional[int] = None) -> LatencyMatrix:
+    """
+    Latences minimales entre toutes les paires de nœuds de `graph`.
+    `workers` : nombre de processus pour "dijkstra" (défaut : nombre de CPU).
+    Lève ValueError pour une méthode inconnue.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Méthode inconnue : {backend} (choix : {', '.join(BACKENDS)}).")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    nodes = list(graph)
+    index = {n: i for i, n in enumerate(nodes)}
+    if backend == AUTO:
+        backend = choose_backend(
+            len(nodes), graph.number_of_edges(), graph.is_directed(), workers
+        )
+    if backend == FLOYD:
+        matrix = _floyd_warshall(graph, nodes, index)
+    else:
+        matrix = _dijkstra(graph, nodes, index, workers)
+    return LatencyMatrix(nodes, index, matrix, backend)
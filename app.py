@@ -3,7 +3,8 @@ import matplotlib.pyplot as plt
 import networkx as nx
 
 from network_model import Network
-from commands import handle_command
+from commands import COMMANDS, format_rejected, handle_command
+from routing import LATENCY, METRICS
 from state import load_network, save_network
 
 # =========================
@@ -46,28 +47,72 @@ if "network" not in st.session_state:
 if "shortest_path" not in st.session_state:
     st.session_state.shortest_path = None
 
+if "alternative_paths" not in st.session_state:
+    st.session_state.alternative_paths = None
+
 if "mst_edges" not in st.session_state:
     st.session_state.mst_edges = None
 
+if "failure_heat" not in st.session_state:
+    st.session_state.failure_heat = None
+
 if "scc_list" not in st.session_state:
     st.session_state.scc_list = None
 
 if "articulation_nodes" not in st.session_state:
     st.session_state.articulation_nodes = None
 
+if "bridge_edges" not in st.session_state:
+    st.session_state.bridge_edges = None
+
+if "block_list" not in st.session_state:
+    st.session_state.block_list = None
+
 if "command_history" not in st.session_state:
     st.session_state.command_history = []
 
+
+def persist(net: Network) -> None:
+    """
+    save_network ; si le serveur d'état a refusé des modifications (réseau
+    modifié entre-temps par un autre client), recharge son état et le
+    signale à l'exécution suivante de la page.
+    """
+    rejected = save_network(net)
+    if rejected:
+        st.session_state.network = load_network()
+        st.session_state.save_warning = format_rejected(rejected)
+
+
+if st.session_state.get("save_warning"):
+    st.warning(st.session_state.pop("save_warning"))
+
 net: Network = st.session_state.network
 
+# Résultats d'analyse (surlignages) calculés sur une autre version de la
+# topologie : ils ne correspondent plus au graphe affiché, on les efface.
+topology_key = (id(net), net.version)
+if st.session_state.get("analysis_topology") != topology_key:
+    st.session_state.shortest_path = None
+    st.session_state.alternative_paths = None
+    st.session_state.mst_edges = None
+    st.session_state.failure_heat = None
+    st.session_state.scc_list = None
+    st.session_state.articulation_nodes = None
+    st.session_state.bridge_edges = None
+    st.session_state.block_list = None
+    st.session_state.analysis_topology = topology_key
+
 # =========================
 #   Fonction de dessin
 # =========================
 
 def draw_topology(net: Network):
     fig, ax = plt.subplots()
+    # backend compact : graphe networkx reconstruit à chaque accès, une fois ici
+    graph = net.graph
 
-    if net.graph.number_of_nodes() == 0:
+    if graph.number_of_nodes() == 0:
         ax.text(
             0.5,
             0.5,
@@ -80,14 +125,14 @@ def draw_topology(net: Network):
         st.pyplot(fig)
         return
 
-    pos = nx.circular_layout(net.graph)
+    pos = nx.circular_layout(graph)
 
-    nx.draw_networkx_nodes(net.graph, pos, ax=ax, node_color="lightblue")
-    nx.draw_networkx_labels(net.graph, pos, ax=ax, font_size=10)
+    nx.draw_networkx_nodes(graph, pos, ax=ax, node_color="lightblue")
+    nx.draw_networkx_labels(graph, pos, ax=ax, font_size=10)
 
     if net.directed:
         nx.draw_networkx_edges(
-            net.graph,
+            graph,
             pos,
             ax=ax,
             arrows=True,
@@ -96,14 +141,14 @@ def draw_topology(net: Network):
             connectionstyle="arc3,rad=0.1",
         )
     else:
-        nx.draw_networkx_edges(net.graph, pos, ax=ax)
+        nx.draw_networkx_edges(graph, pos, ax=ax)
 
     forward_labels = {}
     backward_labels = {}
 
-    for u, v, data in net.graph.edges(data=True):
+    for u, v, data in graph.edges(data=True):
         label = f"{data.get('latency', '')} ms"
-        if net.directed and net.graph.has_edge(v, u):
+        if net.directed and graph.has_edge(v, u):
             if (v, u) in forward_labels:
                 backward_labels[(u, v)] = label
             else:
@@ -112,7 +157,7 @@ def draw_topology(net: Network):
             forward_labels[(u, v)] = label
 
     nx.draw_networkx_edge_labels(
-        net.graph,
+        graph,
         pos,
         edge_labels=forward_labels,
         ax=ax,
@@ -123,7 +168,7 @@ def draw_topology(net: Network):
 
     if backward_labels:
         nx.draw_networkx_edge_labels(
-            net.graph,
+            graph,
             pos,
             edge_labels=backward_labels,
             ax=ax,
@@ -132,13 +177,54 @@ def draw_topology(net: Network):
             label_pos=0.4,
         )
 
+    # Impact des pannes : rouge d'autant plus foncé que la panne est grave
+    heat = st.session_state.get("failure_heat")
+    if heat:
+        cmap = plt.cm.Reds
+        links = [e for e in graph.edges() if heat["links"].get(e, 0) > 0]
+        if links:
+            nx.draw_networkx_edges(
+                graph,
+                pos,
+                edgelist=links,
+                edge_color=[cmap(0.3 + 0.7 * heat["links"][e]) for e in links],
+                width=4,
+                arrows=net.directed,
+                ax=ax,
+            )
+        nodes = [n for n in graph if heat["nodes"].get(n, 0) > 0]
+        if nodes:
+            nx.draw_networkx_nodes(
+                graph,
+                pos,
+                nodelist=nodes,
+                node_color=[cmap(0.3 + 0.7 * heat["nodes"][n]) for n in nodes],
+                ax=ax,
+            )
+
+    # Routes de secours (k plus courts chemins, la meilleure exceptée)
+    alternatives = st.session_state.get("alternative_paths")
+    if alternatives:
+        colors = ["purple", "darkorange", "teal", "brown", "magenta"]
+        for i, alt in enumerate(alternatives):
+            nx.draw_networkx_edges(
+                graph,
+                pos,
+                edgelist=list(zip(alt, alt[1:])),
+                edge_color=colors[i % len(colors)],
+                width=2,
+                style="dashed",
+                arrows=net.directed,
+                ax=ax,
+            )
+
     # Surlignage Dijkstra
     path = st.session_state.get("shortest_path")
     if path:
         path_edges = list(zip(path, path[1:]))
-        nx.draw_networkx_nodes(net.graph, pos, nodelist=path, node_color="red", ax=ax)
+        nx.draw_networkx_nodes(graph, pos, nodelist=path, node_color="red", ax=ax)
         nx.draw_networkx_edges(
-            net.graph,
+            graph,
             pos,
             edgelist=path_edges,
             edge_color="red",
@@ -150,7 +236,7 @@ def draw_topology(net: Network):
     mst_edges = st.session_state.get("mst_edges")
     if mst_edges:
         nx.draw_networkx_edges(
-            net.graph,
+            graph,
             pos,
             edgelist=mst_edges,
             edge_color="green",
@@ -160,11 +246,42 @@ def draw_topology(net: Network):
             ax=ax,
         )
 
+    # Composantes biconnexes : une couleur par bloc (arêtes internes)
+    blocks = st.session_state.get("block_list")
+    if blocks:
+        cmap = plt.cm.tab10
+        for i, block in enumerate(blocks):
+            members = set(block)
+            edges = [(u, v) for u, v in graph.edges() if u in members and v in members]
+            nx.draw_networkx_edges(
+                graph,
+                pos,
+                edgelist=edges,
+                edge_color=[cmap(i % 10)] * len(edges),
+                width=3,
+                arrows=net.directed,
+                ax=ax,
+            )
+
+    # Ponts
+    bridges = st.session_state.get("bridge_edges")
+    if bridges:
+        nx.draw_networkx_edges(
+            graph,
+            pos,
+            edgelist=[e if graph.has_edge(*e) else e[::-1] for e in bridges],
+            edge_color="black",
+            width=4,
+            style="dotted",
+            arrows=net.directed,
+            ax=ax,
+        )
+
     # Points d'articulation
     ap_nodes = st.session_state.get("articulation_nodes")
     if ap_nodes:
         nx.draw_networkx_nodes(
-            net.graph,
+            graph,
             pos,
             nodelist=ap_nodes,
             node_color="orange",
@@ -224,12 +341,12 @@ if page=="topology":
 
         if mode == "Orienté" and not net.directed:
             net.set_directed(True)
-            save_network(net)
+            persist(net)
             st.info("Passage en graphe orienté.")
             st.rerun()
         elif mode == "Non orienté" and net.directed:
             net.set_directed(False)
-            save_network(net)
+            persist(net)
             st.info("Passage en graphe non orienté.")
             st.rerun()
 
@@ -245,7 +362,7 @@ if page=="topology":
                     st.warning("Veuillez saisir un nom de nœud.")
                 else:
                     if net.add_node(new_node):
-                        save_network(net)
+                        persist(net)
                         st.success(f"Nœud ajouté : {new_node}")
                         st.rerun()
                     else:
@@ -278,7 +395,7 @@ if page=="topology":
                         st.error("Source et destination doivent être différentes.")
                     else:
                         if net.add_link(n1, n2, latency):
-                            save_network(net)
+                            persist(net)
                             arrow = "->" if net.directed else "--"
                             st.success(
                                 f"Lien ajouté : {n1} {arrow} {n2} (latence={latency} ms)"
@@ -303,7 +420,7 @@ if page=="topology":
                 submitted_del_node = st.form_submit_button("Supprimer ce nœud")
                 if submitted_del_node:
                     if net.delete_node(node_to_delete):
-                        save_network(net)
+                        persist(net)
                         st.success(f"Nœud supprimé : {node_to_delete}")
                         st.rerun()
                     else:
@@ -326,7 +443,7 @@ if page=="topology":
                     idx = link_labels.index(link_label)
                     u, v, _ = links[idx]
                     if net.delete_link(u, v):
-                        save_network(net)
+                        persist(net)
                         st.success(f"Lien supprimé : {link_label}")
                         st.rerun()
                     else:
@@ -356,7 +473,7 @@ if page=="topology":
                     idx = link_labels.index(link_label)
                     u, v, _ = links[idx]
                     if net.update_link_latency(u, v, int(new_latency)):
-                        save_network(net)
+                        persist(net)
                         st.success(
                             f"Latence du lien {link_label} mise à jour à {int(new_latency)} ms."
                         )
@@ -381,7 +498,7 @@ if page=="topology":
                         st.warning("Veuillez saisir un nouveau nom.")
                     else:
                         if net.rename_node(old_name, new_name):
-                            save_network(net)
+                            persist(net)
                             st.success(f"Nœud renommé : {old_name} -> {new_name}")
                             st.rerun()
                         else:
@@ -397,7 +514,7 @@ if page=="topology":
             with top_col2:
                 if st.button("Réinitialiser", key="reset_topology_btn"):
                     net.reset()
-                    save_network(net)
+                    persist(net)
                     st.warning("Topologie réinitialisée.")
                     st.rerun()
 
@@ -409,30 +526,61 @@ elif page== "analyse":
 
     with col_a1:
         st.subheader("Plus court chemin (Dijkstra)")
-        nodes = sorted(net.graph.nodes())
+        nodes = sorted(net.iter_nodes())
         if len(nodes) >= 2:
             src = st.selectbox("Nœud source", nodes, key="dijkstra_src")
             dst = st.selectbox("Nœud destination", nodes, key="dijkstra_dst")
+            metric = st.radio(
+                "Critère",
+                METRICS,
+                format_func=lambda m: "Latence" if m == LATENCY else "Nombre de sauts",
+                horizontal=True,
+                key="dijkstra_metric",
+            )
 
             cols = st.columns(2)
             with cols[0]:
                 if st.button("Calculer le plus court chemin"):
-                    path, dist = net.shortest_path_dijkstra(src, dst)
-                    if path is None:
+                    route = net.route(src, dst, metric)
+                    if route is None:
                         st.warning(f"Aucun chemin trouvé entre {src} et {dst}.")
                         st.session_state.shortest_path = None
                     else:
                         st.success(
                             f"Chemin le plus court de {src} à {dst} : "
-                            f"{' -> '.join(path)} (latence totale = {dist} ms)"
+                            f"{' -> '.join(route.path)} (latence totale = {route.latency} ms, "
+                            f"{route.hops} saut(s))"
                         )
-                        st.session_state.shortest_path = path
-                        save_network(net)
+                        st.session_state.shortest_path = route.path
             with cols[1]:
                 if st.button("Effacer le chemin Dijkstra"):
                     st.session_state.shortest_path = None
                     st.info("Chemin Dijkstra effacé (topologie inchangée).")
 
+
+            st.markdown("**Routes de secours (k plus courts chemins)**")
+            k = st.number_input("Nombre de routes (k)", min_value=2, max_value=10, value=3, step=1)
+            cols = st.columns(2)
+            with cols[0]:
+                if st.button("Calculer les k meilleures routes"):
+                    routes = net.k_shortest_paths(src, dst, int(k))
+                    if not routes:
+                        st.warning(f"Aucun chemin trouvé entre {src} et {dst}.")
+                        st.session_state.shortest_path = None
+                        st.session_state.alternative_paths = None
+                    else:
+                        for n, route in enumerate(routes, 1):
+                            st.write(
+                                f"{n}. {' -> '.join(route.path)} "
+                                f"({route.latency} ms, {route.hops} saut(s))"
+                            )
+                        st.session_state.shortest_path = routes[0].path
+                        st.session_state.alternative_paths = [r.path for r in routes[1:]]
+            with cols[1]:
+                if st.button("Effacer les routes de secours"):
+                    st.session_state.alternative_paths = None
+                    st.info("Routes de secours effacées.")
+
         else:
             st.info("Ajoute au moins deux nœuds pour utiliser Dijkstra.")
 
@@ -487,10 +635,76 @@ elif page== "analyse":
             if st.button("Effacer Tarjan"):
                 st.session_state.scc_list = None
                 st.session_state.articulation_nodes = None
+                st.session_state.bridge_edges = None
+                st.session_state.block_list = None
                 st.info("Résultats Tarjan effacés.")
 
+        col_b1, col_b2 = st.columns(2)
+        with col_b1:
+            if st.button("Ponts"):
+                bridges = net.bridges()
+                st.session_state.bridge_edges = bridges
+                if not bridges:
+                    st.info("Aucun pont.")
+                else:
+                    st.success(f"{len(bridges)} pont(s) : " + ", ".join(f"{u} - {v}" for u, v in bridges))
+        with col_b2:
+            if st.button("Composantes biconnexes"):
+                blocks = [b for b in net.biconnected_components() if len(b) > 1]
+                st.session_state.block_list = blocks
+                st.success(f"{len(blocks)} composante(s) biconnexe(s).")
+
+        nodes = sorted(net.iter_nodes())
+        if len(nodes) >= 3:
+            dep_cols = st.columns(3)
+            dep_src = dep_cols[0].selectbox("Source", nodes, key="depends_src")
+            dep_dst = dep_cols[1].selectbox("Destination", nodes, key="depends_dst")
+            dep_node = dep_cols[2].selectbox("Routeur", nodes, key="depends_node")
+            if st.button("Le trafic dépend-il de ce routeur ?"):
+                answer = net.depends_on(dep_src, dep_dst, dep_node)
+                if answer is None:
+                    st.warning(f"Aucun chemin entre {dep_src} et {dep_dst}.")
+                elif answer:
+                    st.error(f"Oui : tout chemin entre {dep_src} et {dep_dst} passe par {dep_node}.")
+                else:
+                    st.success(f"Non : {dep_src} et {dep_dst} restent reliés sans {dep_node}.")
+
         st.markdown("---")
         
+        st.subheader("Impact des pannes")
+
+        col_f1, col_f2 = st.columns(2)
+        with col_f1:
+            if st.button("Scanner les pannes"):
+                report = net.failure_scan()
+                impacted = [r for r in report if r.lost_pairs or r.degraded_pairs]
+                if not impacted:
+                    st.info("Aucune panne simple ne coupe ni ne ralentit de route.")
+                    st.session_state.failure_heat = None
+                else:
+                    # chaleur selon le rang : 1 pour la panne la plus grave
+                    heat = {"links": {}, "nodes": {}}
+                    for rank, r in enumerate(impacted):
+                        kind = "links" if r.kind == "link" else "nodes"
+                        heat[kind][r.element] = 1 - rank / len(impacted)
+                    st.session_state.failure_heat = heat
+                    st.table([
+                        {
+                            "Élément": " - ".join(r.element) if r.kind == "link" else r.element,
+                            "Paires perdues": r.lost_pairs,
+                            "Paires dégradées": r.degraded_pairs,
+                            "Hausse moy. (ms)": round(r.avg_increase, 2),
+                            "Hausse max (ms)": r.worst_increase,
+                        }
+                        for r in impacted[:10]
+                    ])
+        with col_f2:
+            if st.button("Effacer l'impact des pannes"):
+                st.session_state.failure_heat = None
+                st.info("Impact des pannes effacé.")
+
+        st.markdown("---")
+
         st.subheader("Analyse de cycles")
         if st.button("Tester si le graphe est acyclique"):
             if net.graph.number_of_nodes() == 0:
@@ -527,30 +741,8 @@ elif page=="console":
             st.success("État rechargé depuis le CLI.")
 
         st.markdown(
-            """
-Commandes disponibles (exemples) :
-
-- `list-nodes`
-- `list-links`
-- `show-node R1`
-- `simulate-ping R1 R3`
-- `add-node R1`
-- `add-link R2 R1 10`
-- `delete-node R1`
-- `delete-link R1 R2`
-- `update-link R1 R2 15`
-- `rename-node R1 R10`
-- `reset-network`
-- `set-directed`
-- `set-undirected`
-- `dijkstra R1 R2`
-- `mst-kruskal`
-- `mst-prim`
-- `scc`
-- `articulation`
-- `is-acyclic`
-- `help`
-"""
+            "Commandes disponibles :\n\n"
+            + "\n".join(f"- `{c.usage}`" for c in COMMANDS.values())
         )
 
         cmd = st.text_input(
@@ -562,7 +754,12 @@ Commandes disponibles (exemples) :
         if st.button("Exécuter la commande"):
             if cmd:
                 output = handle_command(net, cmd)
-                save_network(net)
+                # modification, ou hiérarchie construite (contract) ;
+                # rien n'est écrit pour une simple lecture
+                persist(net)
+                warning = st.session_state.pop("save_warning", None)
+                if warning:
+                    output = f"{output}\n{warning}"
                 st.session_state.command_history.append(f"> {cmd}\n{output}")
 
         st.markdown("**Historique des commandes**")
@@ -0,0 +1,87 @@
+# benchmarks/bench_bidirectional.py
+"""
+Compare Dijkstra unidirectionnel (landmarks.astar sans borne) et
+bidirectionnel (routing.bidirectional_dijkstra) sur des requêtes point à
+point : nœuds traités (settled) et temps par requête. Topologies : anneau,
+chaîne de sites (petits maillages reliés en ligne), grille, aléatoire, et
+la version orientée de la chaîne (recherche arrière sur les prédécesseurs).
+
+    python benchmarks/bench_bidirectional.py [nb_nœuds ...]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+import networkx as nx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_landmarks import grid_network  # noqa: E402
+from bench_snapshot import random_network  # noqa: E402
+from landmarks import astar  # noqa: E402
+from routing import bidirectional_dijkstra  # noqa: E402
+
+N_QUERIES = 20
+SITE_SIZE = 20
+
+
+def ring_network(n_nodes: int, seed: int = 0) -> nx.Graph:
+    rng = random.Random(seed)
+    G = nx.Graph()
+    for i in range(n_nodes):
+        G.add_edge(f"R{i}", f"R{(i + 1) % n_nodes}", latency=rng.randint(1, 100))
+    return G
+
+
+def chain_of_sites(n_nodes: int, seed: int = 0, directed: bool = False):
+    """Sites de SITE_SIZE routeurs (maillage aléatoire) reliés en chaîne."""
+    rng = random.Random(seed)
+    G = nx.DiGraph() if directed else nx.Graph()
+    n_sites = max(2, n_nodes // SITE_SIZE)
+    for s in range(n_sites):
+        names = [f"S{s}R{i}" for i in range(SITE_SIZE)]
+        for i in range(1, SITE_SIZE):
+            # arbre couvrant + quelques liens en plus, dans les deux sens
+            for u, v in ((names[i], names[rng.randrange(i)]), tuple(rng.sample(names, 2))):
+                G.add_edge(u, v, latency=rng.randint(1, 10))
+                G.add_edge(v, u, latency=rng.randint(1, 10))
+        if s:
+            u, v = f"S{s - 1}R{rng.randrange(SITE_SIZE)}", f"S{s}R{rng.randrange(SITE_SIZE)}"
+            G.add_edge(u, v, latency=rng.randint(20, 100))
+            G.add_edge(v, u, latency=rng.randint(20, 100))
+    return G
+
+
+def run(label: str, G) -> None:
+    rng = random.Random(1)
+    nodes = list(G)
+    pairs = [tuple(rng.sample(nodes, 2)) for _ in range(N_QUERIES)]
+
+    def measure(search):
+        settled, results = 0, []
+        start = time.perf_counter()
+        for s, d in pairs:
+            route, n = search(G, s, d)
+            settled += n
+            results.append(route and route.latency)
+        return (time.perf_counter() - start) / N_QUERIES * 1000, settled / N_QUERIES, results
+
+    t_uni, n_uni, uni = measure(astar)
+    t_bi, n_bi, bi = measure(bidirectional_dijkstra)
+    assert uni == bi
+
+    print(
+        f"{label:>28} | unidirectionnel {n_uni:8.0f} nœuds {t_uni:8.2f} ms"
+        f" | bidirectionnel {n_bi:8.0f} nœuds {t_bi:8.2f} ms ({t_uni / t_bi:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    sizes = [int(x) for x in sys.argv[1:]] or [10_000, 100_000]
+    for n in sizes:
+        run(f"anneau {n} nœuds", ring_network(n))
+        run(f"chaîne de sites {n} nœuds", chain_of_sites(n))
+        run(f"chaîne orientée {n} nœuds", chain_of_sites(n, directed=True))
+        run(f"grille {n} nœuds", grid_network(n))
+        run(f"aléatoire {n} nœuds", random_network(5 * n).graph)
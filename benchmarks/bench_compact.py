@@ -0,0 +1,95 @@
+# benchmarks/bench_compact.py
+"""
+Compare les deux backends de Network (networkx / compact, cf. compact.py) :
+mémoire de la topologie (tracemalloc), temps de construction par add_links,
+temps de list-links, de reconstruction du graphe networkx à la demande, et
+de routage après mutations (arbre en cache réparé à chaque changement de
+latence, sur les tableaux avec le backend compact).
+
+    python benchmarks/bench_compact.py [nb_liens ...]
+"""
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from network_model import Network  # noqa: E402
+
+MUTATIONS = 50
+
+
+def random_links(n_edges: int, seed: int = 0):
+    rng = random.Random(seed)
+    n_nodes = max(2, n_edges // 5)
+    names = [f"R{i}" for i in range(n_nodes)]
+    edges = {}
+    while len(edges) < n_edges:
+        u, v = rng.sample(names, 2)
+        if (v, u) not in edges:
+            edges[(u, v)] = rng.randint(1, 100)
+    return names, [(u, v, w) for (u, v), w in edges.items()]
+
+
+def build(backend: str, names, links):
+    """(réseau, temps de construction, mémoire allouée en octets)."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    net = Network(backend=backend)
+    net.add_nodes(names)
+    net.add_links(links)
+    if backend == "compact":
+        # base CSR sans surcouche : l'état d'un réseau rechargé
+        net.set_backend("compact")
+    elapsed = time.perf_counter() - start
+    net.pending_ops.clear()
+    net.changes.clear()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return net, elapsed, size
+
+
+def bench(n_edges: int) -> None:
+    names, links = random_links(n_edges)
+    for backend in ("networkx", "compact"):
+        net, t_build, size = build(backend, names, links)
+
+        start = time.perf_counter()
+        count = sum(1 for _ in net.iter_links())
+        t_list = time.perf_counter() - start
+        assert count == n_edges
+
+        start = time.perf_counter()
+        net.graph
+        t_graph = time.perf_counter() - start
+
+        # une route, puis MUTATIONS changements de latence suivis chacun d'une route
+        src, dst = names[0], names[-1]
+        start = time.perf_counter()
+        first = net.route(src, dst)
+        t_route = time.perf_counter() - start
+        rng = random.Random(1)
+        start = time.perf_counter()
+        for u, v, _w in rng.sample(links, MUTATIONS):
+            net.update_link_latency(u, v, rng.randint(1, 100))
+            net.route(src, dst)
+        t_mutate = (time.perf_counter() - start) / MUTATIONS
+        assert first is None or net.route_cache.repairs > 0
+        print(
+            f"{n_edges:>9} liens | {backend:<8} : {size / 1e6:8.1f} Mo  "
+            f"construction {t_build:6.2f}s  list-links {t_list:6.2f}s  "
+            f"graphe networkx {t_graph:6.2f}s  route {t_route:6.2f}s  "
+            f"mutation + route {t_mutate * 1e3:7.2f}ms"
+        )
+        del net
+
+
+if __name__ == "__main__":
+    sizes = [int(x) for x in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for n in sizes:
+        bench(n)
@@ -0,0 +1,63 @@
+# benchmarks/bench_dynamic.py
+"""
+Réparation incrémentale des arbres de plus courts chemins
+(routing.ShortestPathTree.repair) après update-link, comparée au recalcul
+complet de l'arbre. Les liens modifiés sont des arêtes de l'arbre (le cas
+coûteux) ; petites variations (±10 %) puis grandes (x0.1 / x10).
+
+    python benchmarks/bench_dynamic.py [nb_liens ...]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_snapshot import random_network  # noqa: E402
+from routing import shortest_path_tree  # noqa: E402
+
+N_UPDATES = 50
+
+
+def run(n_edges: int, label: str, factors) -> None:
+    net = random_network(n_edges)
+    rng = random.Random(1)
+    src = next(iter(net.graph))
+    tree = net.route_cache.tree(net.graph, src)
+    t_repair = t_full = 0.0
+    touched = 0
+    for _ in range(N_UPDATES):
+        # une arête de l'arbre, tirée au hasard
+        v = rng.choice(list(tree.pred))
+        while tree.pred[v] is None:
+            v = rng.choice(list(tree.pred))
+        u = tree.pred[v]
+        old = net.graph[u][v]["latency"]
+        new = max(1, round(old * rng.choice(factors)))
+        if new == old:
+            new = old + 1
+        before = net.route_cache.repaired_nodes
+        start = time.perf_counter()
+        net.update_link_latency(u, v, new)
+        t_repair += time.perf_counter() - start
+        touched += net.route_cache.repaired_nodes - before
+
+        start = time.perf_counter()
+        fresh = shortest_path_tree(net.graph, src)
+        t_full += time.perf_counter() - start
+        assert fresh.dist == tree.dist
+
+    per = 1000 / N_UPDATES
+    print(
+        f"{n_edges:>9} liens, {label:>18} | réparation {t_repair * per:8.2f} ms"
+        f" ({touched / N_UPDATES:7.0f} nœuds revus) | recalcul {t_full * per:8.2f} ms"
+        f" ({t_full / t_repair:.0f}x)"
+    )
+
+
+if __name__ == "__main__":
+    sizes = [int(x) for x in sys.argv[1:]] or [10_000, 100_000]
+    for n in sizes:
+        run(n, "petites (±10 %)", (0.9, 1.1))
+        run(n, "grandes (x0.1, x10)", (0.1, 10))
@@ -0,0 +1,92 @@
+# benchmarks/bench_failures.py
+"""
+Compare failures.failure_scan (sous-arbres seulement) au calcul brutal :
+retirer chaque lien / nœud et recalculer toutes les distances. Le calcul
+brutal sert de vérification sur de petits réseaux, orientés ou non, dont
+une partie des liens a une latence 0 (prédécesseurs à égalité) ; puis
+failure_scan seul est chronométré sur des réseaux plus grands.
+
+    python benchmarks/bench_failures.py [nb_liens ...]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+import networkx as nx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_snapshot import random_network  # noqa: E402
+from failures import LINK, NODE, failure_scan  # noqa: E402
+
+N_CHECKS = 40
+
+
+def brute_force(G):
+    """Totaux (perdues, dégradées, hausse moyenne, hausse max) par élément, en recalculant tout."""
+    base = dict(nx.all_pairs_dijkstra_path_length(G, weight="latency"))
+    pairs = sum(len(d) - 1 for d in base.values())
+    report = {}
+
+    def impact(H, skip=None):
+        after = dict(nx.all_pairs_dijkstra_path_length(H, weight="latency"))
+        lost = degraded = 0
+        total = worst = 0.0
+        remaining = pairs
+        for s, dists in base.items():
+            for t, d in dists.items():
+                if s == t:
+                    continue
+                if skip in (s, t):
+                    remaining -= 1
+                    continue
+                new = after[s].get(t)
+                if new is None:
+                    lost += 1
+                elif new > d:
+                    degraded += 1
+                    total += new - d
+                    worst = max(worst, new - d)
+        remaining -= lost
+        return lost, degraded, total / remaining if remaining else 0.0, worst
+
+    for u, v in G.edges():
+        H = G.copy()
+        H.remove_edge(u, v)
+        report[(LINK, (u, v))] = impact(H)
+    for node in G:
+        H = G.copy()
+        H.remove_node(node)
+        report[(NODE, node)] = impact(H, skip=node)
+    return report
+
+
+def check(seed: int) -> None:
+    rng = random.Random(seed)
+    G = nx.gnm_random_graph(12, 20, seed=seed, directed=bool(seed % 2))
+    G = nx.relabel_nodes(G, {i: f"R{i}" for i in G})
+    for u, v in G.edges():
+        G[u][v]["latency"] = rng.choice([0, 0, 1, 2, 5])
+    expected = brute_force(G)
+    for r in failure_scan(G, workers=1):
+        lost, degraded, avg, worst = expected[(r.kind, r.element)]
+        assert (r.lost_pairs, r.degraded_pairs) == (lost, degraded), (seed, r)
+        assert abs(r.avg_increase - avg) < 1e-9 and r.worst_increase == worst, (seed, r)
+
+
+def bench(n_edges: int) -> None:
+    G = random_network(n_edges).graph
+    start = time.perf_counter()
+    report = failure_scan(G)
+    elapsed = time.perf_counter() - start
+    print(f"{n_edges:>9} liens | {len(report)} éléments | failure_scan : {elapsed:8.2f} s")
+
+
+if __name__ == "__main__":
+    sizes = [int(x) for x in sys.argv[1:]] or [1_000, 10_000]
+    for seed in range(N_CHECKS):
+        check(seed)
+    print(f"{N_CHECKS} réseaux vérifiés contre le calcul brutal (latences 0 comprises)")
+    for n in sizes:
+        bench(n)
@@ -0,0 +1,53 @@
+# benchmarks/bench_hierarchy.py
+"""
+Hiérarchies de contraction (hierarchy.py) : temps de construction, nombre de
+raccourcis, taille, et temps par requête comparé à nx.dijkstra_path.
+
+    python benchmarks/bench_hierarchy.py [nb_nœuds ...]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+import networkx as nx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_landmarks import grid_network  # noqa: E402
+from bench_snapshot import random_network  # noqa: E402
+from hierarchy import ContractionHierarchy  # noqa: E402
+
+N_QUERIES = 50
+
+
+def run(label: str, G) -> None:
+    rng = random.Random(1)
+    nodes = list(G)
+    pairs = [tuple(rng.sample(nodes, 2)) for _ in range(N_QUERIES)]
+
+    ch = ContractionHierarchy.build(G, 0)
+
+    def per_query(query):
+        start = time.perf_counter()
+        results = [query(s, d) for s, d in pairs]
+        return (time.perf_counter() - start) / N_QUERIES * 1000, results
+
+    t_nx, lengths = per_query(
+        lambda s, d: nx.dijkstra_path_length(G, s, d, weight="latency")
+    )
+    t_ch, routes = per_query(ch.route)
+    assert [r.latency for r in routes] == lengths
+
+    print(
+        f"{label:>22} | construction {ch.build_time:7.1f} s, {ch.shortcuts:7d} raccourcis,"
+        f" {ch.memory() / 1e6:5.1f} Mo | dijkstra_path {t_nx:8.2f} ms"
+        f" | CH {t_ch:6.3f} ms ({t_nx / t_ch:.0f}x)"
+    )
+
+
+if __name__ == "__main__":
+    sizes = [int(x) for x in sys.argv[1:]] or [10_000, 100_000]
+    for n in sizes:
+        run(f"grille {n} nœuds", grid_network(n))
+        run(f"aléatoire {n} nœuds", random_network(3 * n).graph)
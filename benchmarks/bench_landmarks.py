@@ -0,0 +1,67 @@
+# benchmarks/bench_landmarks.py
+"""
+Compare A* par repères (landmarks.py) à Dijkstra sur des requêtes point à
+point : nœuds traités (settled) et temps par requête, plus le coût du
+prétraitement. Deux topologies : aléatoire, et grille (réseau « étalé »,
+où les repères guident le mieux la recherche).
+
+    python benchmarks/bench_landmarks.py [nb_nœuds ...]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+import networkx as nx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_snapshot import random_network  # noqa: E402
+from landmarks import DEFAULT_LANDMARKS, Landmarks, astar  # noqa: E402
+from routing import find_route  # noqa: E402
+
+N_QUERIES = 20
+
+
+def grid_network(n_nodes: int, seed: int = 0) -> nx.Graph:
+    rng = random.Random(seed)
+    side = max(2, int(n_nodes ** 0.5))
+    G = nx.Graph()
+    for (a, b), (c, d) in nx.grid_2d_graph(side, side).edges():
+        G.add_edge(f"R{a}_{b}", f"R{c}_{d}", latency=rng.randint(1, 100))
+    return G
+
+
+def run(label: str, G) -> None:
+    rng = random.Random(1)
+    nodes = list(G)
+    pairs = [tuple(rng.sample(nodes, 2)) for _ in range(N_QUERIES)]
+
+    lm = Landmarks(DEFAULT_LANDMARKS)
+    lm.build(G)
+
+    def measure(query):
+        settled = 0
+        start = time.perf_counter()
+        for s, d in pairs:
+            settled += query(s, d)
+        return (time.perf_counter() - start) / N_QUERIES * 1000, settled / N_QUERIES
+
+    t_nx, _ = measure(lambda s, d: find_route(G, s, d) and 0)
+    t_dij, n_dij = measure(lambda s, d: astar(G, s, d)[1])
+    t_alt, n_alt = measure(lambda s, d: astar(G, s, d, lm.bound_to(d))[1])
+    for s, d in pairs:
+        assert astar(G, s, d)[0].latency == astar(G, s, d, lm.bound_to(d))[0].latency
+
+    print(
+        f"{label:>22} | prétraitement {lm.build_time:6.2f} s {lm.memory() / 1e6:6.1f} Mo"
+        f" | Dijkstra {n_dij:8.0f} nœuds {t_dij:8.2f} ms (networkx {t_nx:7.2f} ms)"
+        f" | ALT {n_alt:7.0f} nœuds {t_alt:7.2f} ms ({t_dij / t_alt:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    sizes = [int(x) for x in sys.argv[1:]] or [10_000, 100_000]
+    for n in sizes:
+        run(f"aléatoire {n} nœuds", random_network(5 * n).graph)
+        run(f"grille {n} nœuds", grid_network(n))
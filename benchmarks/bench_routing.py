@@ -0,0 +1,71 @@
+# benchmarks/bench_routing.py
+"""
+Compare l'ancien calcul du plus court chemin (dijkstra_path puis
+dijkstra_path_length : deux recherches) à routing.find_route (une seule),
+sur des paires (src, dst) tirées au hasard. Vérifie d'abord les arbres de
+plus courts chemins sur des liens de latence 0 (prédécesseurs à égalité).
+
+    python benchmarks/bench_routing.py [nb_liens ...]
+"""
+import random
+import sys
+from pathlib import Path
+
+import networkx as nx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_snapshot import random_network, timed  # noqa: E402
+from routing import HOPS, LATENCY, find_route, shortest_path_tree  # noqa: E402
+
+N_QUERIES = 20
+
+
+def old_dijkstra(G, src, dst):
+    path = nx.dijkstra_path(G, source=src, target=dst, weight="latency")
+    distance = nx.dijkstra_path_length(G, source=src, target=dst, weight="latency")
+    return path, distance
+
+
+def check_zero_latency() -> None:
+    """Liens de latence 0 : l'arbre donne les mêmes distances que networkx, sans cycle."""
+    G = nx.Graph()
+    G.add_edge("A", "B", latency=1)
+    G.add_edge("B", "C", latency=0)
+    assert shortest_path_tree(G, "B").route(G, "A") == (["B", "A"], 1, 1)
+    rng = random.Random(1)
+    G = random_network(2_000).graph
+    for u, v in rng.sample(list(G.edges()), 500):
+        G[u][v]["latency"] = 0
+    for src in rng.sample(list(G), 20):
+        tree = shortest_path_tree(G, src)
+        assert tree.dist == nx.single_source_dijkstra_path_length(G, src, weight="latency")
+        for dst in tree.dist:
+            path = tree.path_to(dst)
+            assert path[0] == src and path[-1] == dst and len(set(path)) == len(path)
+
+
+def bench(n_edges: int) -> None:
+    G = random_network(n_edges).graph
+    rng = random.Random(1)
+    nodes = list(G)
+    pairs = [tuple(rng.sample(nodes, 2)) for _ in range(N_QUERIES)]
+
+    t_old, old = timed(lambda: [old_dijkstra(G, s, d) for s, d in pairs])
+    t_new, new = timed(lambda: [find_route(G, s, d, LATENCY) for s, d in pairs])
+    t_hops, _ = timed(lambda: [find_route(G, s, d, HOPS) for s, d in pairs])
+    assert [dist for _path, dist in old] == [route.latency for route in new]
+
+    per = 1000 / N_QUERIES
+    print(
+        f"{n_edges:>9} liens | 2 recherches : {t_old * per:8.2f} ms/req"
+        f" | find_route latency : {t_new * per:8.2f} ms/req ({t_old / t_new:.2f}x)"
+        f" | hops : {t_hops * per:6.2f} ms/req"
+    )
+
+
+if __name__ == "__main__":
+    sizes = [int(x) for x in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    check_zero_latency()
+    for n in sizes:
+        bench(n)
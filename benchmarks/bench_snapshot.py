@@ -0,0 +1,110 @@
+# benchmarks/bench_snapshot.py
+"""
+Compare le snapshot binaire (snapshot.py) au pickle du Network :
+temps de sauvegarde, temps de chargement et taille du fichier.
+
+Mesure aussi une relecture par l'API publique de networkx (add_nodes_from /
+add_edges_from, liens dans l'ordre du fichier) : read_snapshot remplit
+directement les dicts d'adjacence, parce que add_edges_from ne reproduit
+pas l'ordre des voisins de chaque nœud (show-node, list-links).
+
+    python benchmarks/bench_snapshot.py [nb_liens ...]
+"""
+import io
+import pickle
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from network_model import Network  # noqa: E402
+from snapshot import read_snapshot, write_snapshot  # noqa: E402
+
+
+def random_network(n_edges: int, seed: int = 0) -> Network:
+    rng = random.Random(seed)
+    n_nodes = max(2, n_edges // 5)
+    net = Network(directed=False)
+    names = [f"R{i}" for i in range(n_nodes)]
+    edges = {}
+    while len(edges) < n_edges:
+        u, v = rng.sample(names, 2)
+        if (v, u) not in edges:
+            edges[(u, v)] = rng.randint(1, 100)
+    net.graph.add_nodes_from(names)
+    net.graph.add_weighted_edges_from(
+        ((u, v, w) for (u, v), w in edges.items()), weight="latency"
+    )
+    return net
+
+
+def timed(fn, repeat: int = 3):
+    """Meilleur temps sur `repeat` exécutions, et le résultat de la dernière."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench(n_edges: int) -> None:
+    net = random_network(n_edges)
+
+    t_dump_p, blob_p = timed(lambda: pickle.dumps(net))
+    t_load_p, _ = timed(lambda: pickle.loads(blob_p))
+
+    def dump_snapshot():
+        buf = io.BytesIO()
+        write_snapshot(buf, net)
+        return buf.getvalue()
+
+    t_dump_s, blob_s = timed(dump_snapshot)
+    t_load_s, (loaded, _gen) = timed(lambda: read_snapshot(io.BytesIO(blob_s)))
+    assert loaded.list_links() == net.list_links()
+
+    # même contenu, reconstruit par l'API publique
+    nodes = list(loaded.graph)
+    links = list(loaded.graph.edges(data="latency"))
+
+    def public_rebuild():
+        rebuilt = Network(directed=loaded.directed)
+        rebuilt.graph.add_nodes_from(nodes)
+        rebuilt.graph.add_edges_from((u, v, {"latency": lat}) for u, v, lat in links)
+        return rebuilt
+
+    t_public, rebuilt = timed(public_rebuild)
+    same_order = rebuilt.list_links() == net.list_links() and all(
+        list(rebuilt.graph[n]) == list(net.graph[n]) for n in nodes
+    )
+
+    print(f"{n_edges:>9} liens | pickle   : save {t_dump_p:7.3f}s  load {t_load_p:7.3f}s  {len(blob_p) / 1e6:8.2f} Mo")
+    print(f"{'':>9}       | snapshot : save {t_dump_s:7.3f}s  load {t_load_s:7.3f}s  {len(blob_s) / 1e6:8.2f} Mo")
+    print(f"{'':>9}       | API publique (sans lecture du fichier) : {t_public:7.3f}s, "
+          f"ordre des voisins {'identique' if same_order else 'différent'}")
+
+
+def check_attributes() -> None:
+    """Les attributs autres que la latence survivent à l'aller-retour."""
+    for directed in (False, True):
+        net = Network(directed=directed)
+        net.add_nodes(["R1", "R2", "R3"])
+        net.add_links([("R1", "R2", 5), ("R2", "R3", 7)])
+        net.graph.nodes["R1"]["role"] = "core"
+        net.graph["R1"]["R2"]["vlan"] = 10
+        buf = io.BytesIO()
+        write_snapshot(buf, net)
+        loaded, _gen = read_snapshot(io.BytesIO(buf.getvalue()))
+        assert dict(loaded.graph.nodes(data=True)) == dict(net.graph.nodes(data=True))
+        assert list(loaded.graph.edges(data=True)) == list(net.graph.edges(data=True))
+        if not directed:
+            assert loaded.graph["R2"]["R1"] is loaded.graph["R1"]["R2"]
+
+
+if __name__ == "__main__":
+    check_attributes()
+    sizes = [int(x) for x in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for n in sizes:
+        bench(n)
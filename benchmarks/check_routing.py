@@ -0,0 +1,212 @@
+# benchmarks/check_routing.py
+"""
+Vérification aléatoire des algorithmes de routage contre networkx, sur de
+petits graphes orientés et non orientés dont une partie des liens a une
+latence 0 (prédécesseurs à égalité, cycles de latence nulle). Les
+structures tenues à jour par les changements du réseau sont comparées
+après chaque mutation aléatoire (ajout, suppression, renommage, latence) :
+
+- repair    : arbres du cache de routage (ShortestPathTree.repair, latence
+  et sauts) contre nx.single_source_dijkstra / shortest_path_length ;
+- fib       : acheminement par les tables de routage (ForwardingTables.refresh) ;
+- landmarks : A* par repères, repères gardés ou recalculés ;
+- hierarchy : hiérarchie de contraction (statique) ;
+- kpaths    : latences des k premiers chemins contre nx.shortest_simple_paths ;
+- ecmp      : chemins, nombre de chemins et chemin haché de chaque flux
+  contre nx.all_shortest_paths.
+
+Sauf la hiérarchie (construite sur un graphe networkx), chaque vérification
+tourne aussi avec le backend compact, sur ses tableaux (compact.CompactView).
+
+    python benchmarks/check_routing.py [nb_graphes]
+"""
+import random
+import sys
+from itertools import count, islice
+from pathlib import Path
+
+import networkx as nx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from compact import BACKENDS, COMPACT, NETWORKX, CompactGraph, CompactView  # noqa: E402
+from ecmp import shortest_path_dag  # noqa: E402
+from hierarchy import ContractionHierarchy  # noqa: E402
+from kpaths import shortest_paths  # noqa: E402
+from network_model import Network  # noqa: E402
+from routing import FIB, HOPS, LATENCY  # noqa: E402
+
+N_GRAPHS = 300
+N_MUTATIONS = 12
+K_PATHS = 6
+LATENCIES = [0, 0, 1, 2, 5]
+
+
+def random_graph(rng: random.Random, directed: bool) -> nx.Graph:
+    """Petit graphe aléatoire, latences tirées dans {0, 1, 2, 5} (0 fréquent)."""
+    n = rng.randint(2, 12)
+    G = nx.gnm_random_graph(n, rng.randint(1, 3 * n), seed=rng.randrange(1 << 30), directed=directed)
+    G = nx.relabel_nodes(G, {i: f"R{i}" for i in G})
+    for u, v in G.edges():
+        G[u][v]["latency"] = rng.choice(LATENCIES)
+    return G
+
+
+def network_of(G, backend: str) -> Network:
+    net = Network(directed=G.is_directed())
+    net.graph = G.copy()
+    if backend == COMPACT:
+        net.set_backend(COMPACT)
+    return net
+
+
+def routing_view(G, backend: str):
+    """G lui-même, ou la vue de recherche de chemins de sa copie compacte."""
+    return CompactView(CompactGraph.from_graph(G)) if backend == COMPACT else G
+
+
+_names = count()
+
+
+def mutate(net: Network, rng: random.Random) -> None:
+    """Une mutation aléatoire du réseau (via ses méthodes publiques)."""
+    G = net.graph
+    nodes = list(G)
+    edges = list(G.edges())
+    op = rng.randrange(7)
+    if op == 0 or not edges:
+        if len(nodes) >= 2:
+            u, v = rng.sample(nodes, 2)
+            net.add_link(u, v, rng.choice(LATENCIES))
+    elif op == 1:
+        net.delete_link(*rng.choice(edges))
+    elif op in (2, 3):
+        u, v = rng.choice(edges)
+        net.update_link_latency(u, v, rng.choice(LATENCIES))
+    elif op == 4 and len(nodes) > 2:
+        net.delete_node(rng.choice(nodes))
+    elif op == 5:
+        net.rename_node(rng.choice(nodes), f"N{next(_names)}")
+    else:
+        new = f"N{next(_names)}"
+        net.add_node(new)
+        net.add_links([(new, rng.choice(nodes), rng.choice(LATENCIES)) for _ in range(2)]
+                      + [(u, v, rng.choice(LATENCIES)) for u, v in rng.sample(edges, min(2, len(edges)))])
+
+
+def assert_route(G, route, src, dst, expected) -> None:
+    """`route` est un chemin simple de src à dst dans G, de latence `expected` (None : pas de chemin)."""
+    if expected is None:
+        assert route is None, (src, dst, route)
+        return
+    assert route is not None, (src, dst)
+    path = route.path
+    assert path[0] == src and path[-1] == dst and len(set(path)) == len(path), (src, dst, path)
+    assert nx.path_weight(G, path, "latency") == expected == route.latency, (src, dst, route, expected)
+
+
+def check_repair(G, rng: random.Random, backend: str) -> None:
+    net = network_of(G, backend)
+    for _ in range(N_MUTATIONS):
+        nodes = net.list_nodes()
+        for src in rng.sample(nodes, min(3, len(nodes))):
+            net.route_cache.tree(net.routing_graph, src, LATENCY)
+            net.route_cache.tree(net.routing_graph, src, HOPS)
+        mutate(net, rng)
+        G = net.graph
+        for (src, metric), tree in net.route_cache.trees.items():
+            if metric == LATENCY:
+                expected = nx.single_source_dijkstra_path_length(G, src, weight="latency")
+            else:
+                expected = nx.single_source_shortest_path_length(G, src)
+            assert tree.dist == expected, (src, metric)
+            for dst, d in expected.items():
+                path = tree.path_to(dst)
+                assert path[0] == src and path[-1] == dst and len(path) == len(set(path)), (src, dst)
+                assert nx.is_path(G, path), (src, dst, path)
+                assert (nx.path_weight(G, path, "latency") if metric == LATENCY else len(path) - 1) == d
+
+
+def check_fib(G, rng: random.Random, backend: str) -> None:
+    net = network_of(G, backend)
+    for _ in range(N_MUTATIONS):
+        G = net.graph
+        src = rng.choice(list(G))
+        lengths = nx.single_source_dijkstra_path_length(G, src, weight="latency")
+        for dst in G:
+            assert_route(G, net.route(src, dst, algorithm=FIB), src, dst, lengths.get(dst))
+        mutate(net, rng)
+
+
+def check_landmarks(G, rng: random.Random, backend: str) -> None:
+    net = network_of(G, backend)
+    net.enable_landmarks(rng.randint(1, 4))
+    for _ in range(N_MUTATIONS):
+        G = net.graph
+        src = rng.choice(list(G))
+        lengths = nx.single_source_dijkstra_path_length(G, src, weight="latency")
+        for dst in G:
+            assert_route(G, net.landmarks.route(net.routing_graph, src, dst), src, dst, lengths.get(dst))
+        mutate(net, rng)
+
+
+def check_hierarchy(G, rng: random.Random, backend: str) -> None:
+    ch = ContractionHierarchy.build(G, 0)
+    for src in rng.sample(list(G), min(4, len(G))):
+        lengths = nx.single_source_dijkstra_path_length(G, src, weight="latency")
+        for dst in G:
+            assert_route(G, ch.route(src, dst), src, dst, lengths.get(dst))
+
+
+def check_kpaths(G, rng: random.Random, backend: str) -> None:
+    src, dst = rng.sample(list(G), 2)
+    routes = list(islice(shortest_paths(routing_view(G, backend), src, dst), K_PATHS))
+    try:
+        expected = [
+            nx.path_weight(G, p, "latency")
+            for p in islice(nx.shortest_simple_paths(G, src, dst, weight="latency"), K_PATHS)
+        ]
+    except nx.NetworkXNoPath:
+        expected = []
+    assert [r.latency for r in routes] == expected, (src, dst)
+    assert len({tuple(r.path) for r in routes}) == len(routes), (src, dst)
+    for r in routes:
+        assert_route(G, r, src, dst, r.latency)
+
+
+def check_ecmp(G, rng: random.Random, backend: str) -> None:
+    src = rng.choice(list(G))
+    dag = shortest_path_dag(routing_view(G, backend), src)
+    for dst in G:
+        try:
+            # nx peut produire plusieurs fois le même chemin quand la source a des prédécesseurs
+            expected = set(map(tuple, nx.all_shortest_paths(G, src, dst, weight="latency")))
+        except nx.NetworkXNoPath:
+            expected = set()
+        paths = [tuple(p) for p in dag.iter_paths(dst)]
+        assert len(paths) == len(set(paths)) and set(paths) == expected, (src, dst)
+        assert dag.count_paths(dst) == len(expected), (src, dst)
+        for flow in range(4):
+            path = dag.flow_path(dst, flow)
+            assert (path is None) == (not expected), (src, dst, flow)
+            assert path is None or tuple(path) in expected, (src, dst, flow)
+
+
+CHECKS = [
+    ("repair", check_repair, BACKENDS),
+    ("fib", check_fib, BACKENDS),
+    ("landmarks", check_landmarks, BACKENDS),
+    ("hierarchy", check_hierarchy, (NETWORKX,)),
+    ("kpaths", check_kpaths, BACKENDS),
+    ("ecmp", check_ecmp, BACKENDS),
+]
+
+
+if __name__ == "__main__":
+    n_graphs = int(sys.argv[1]) if len(sys.argv) > 1 else N_GRAPHS
+    rng = random.Random(1)
+    for name, check, backends in CHECKS:
+        for backend in backends:
+            for i in range(n_graphs):
+                check(random_graph(rng, directed=bool(i % 2)), rng, backend)
+            print(f"{name:>10} : {n_graphs} graphes vérifiés ({backend})")
@@ -0,0 +1,184 @@
+# blocks.py
+"""
+Connexité par blocs (graphe vu comme non orienté) : points d'articulation,
+ponts, composantes 2-arête-connexes, composantes biconnexes et arbre des
+blocs (block-cut tree), calculés en un seul parcours en profondeur
+(Hopcroft–Tarjan, itératif).
+
+Pendant le parcours, low[v] (plus petit ordre de visite atteignable depuis
+le sous-arbre de v par au plus un arc arrière) donne tout à la fois :
+
+- low[v] >= disc[u] : u sépare le sous-arbre de v (point d'articulation,
+  sauf pour la racine qui doit avoir deux fils) ; les arêtes empilées
+  depuis (u, v) forment un bloc biconnexe ;
+- low[v] > disc[u] : u - v est un pont ; les nœuds empilés depuis v forment
+  une composante 2-arête-connexe.
+
+L'arbre des blocs relie chaque bloc à ses points d'articulation. Le trafic
+de s vers t dépend du routeur x si et seulement si x est sur le chemin de s
+à t dans cet arbre : la question se règle en remontant l'arbre, sans
+reparcourir le graphe.
+"""
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+# Nœuds de l'arbre des blocs : ("B", numéro de bloc) ou ("C", point d'articulation)
+BLOCK = "B"
+CUT = "C"
+
+
+class BlockCutTree:
+    """Résultat du parcours, pour une version du réseau (cf. Network.block_cut_tree)."""
+
+    def __init__(self, graph, version: int):
+        self.version = version
+        self.articulation_points: List = []
+        self.bridges: List[Tuple] = []
+        self.blocks: List[Set] = []
+        self.edge_components: List[Set] = []
+        self._dfs(graph)
+        self._build_tree()
+
+    # ---------- Parcours ----------
+
+    @staticmethod
+    def _neighbors(graph, u):
+        if graph.is_directed():
+            # vue non orientée sans copie : successeurs et prédécesseurs
+            return iter({**graph._adj[u], **graph._pred[u]})
+        return iter(graph._adj[u])
+
+    def _dfs(self, graph) -> None:
+        disc: Dict[Hashable, int] = {}
+        low: Dict[Hashable, int] = {}
+        cuts: Set = set()
+        counter = 0
+        for root in graph:
+            if root in disc:
+                continue
+            disc[root] = low[root] = counter
+            counter += 1
+            node_stack = [root]
+            edge_stack: List[Tuple] = []
+            root_children = 0
+            stack = [(root, None, self._neighbors(graph, root))]
+            while stack:
+                u, parent, neighbors = stack[-1]
+                for v in neighbors:
+                    if v == parent or v == u:
+                        continue
+                    if v not in disc:
+                        disc[v] = low[v] = counter
+                        counter += 1
+                        edge_stack.append((u, v))
+                        node_stack.append(v)
+                        stack.append((v, u, self._neighbors(graph, v)))
+                        break
+                    if disc[v] < disc[u]:
+                        # arc arrière
+                        low[u] = min(low[u], disc[v])
+                        edge_stack.append((u, v))
+                else:
+                    stack.pop()
+                    if parent is None:
+                        continue
+                    low[parent] = min(low[parent], low[u])
+                    if low[u] >= disc[parent]:
+                        block = set()
+                        while True:
+                            a, b = edge_stack.pop()
+                            block.update((a, b))
+                            if (a, b) == (parent, u):
+                                break
+                        self.blocks.append(block)
+                        if parent == root:
+                            root_children += 1
+                        else:
+                            cuts.add(parent)
+                    if low[u] > disc[parent]:
+                        self.bridges.append((parent, u))
+                        component = set()
+                        while True:
+                            x = node_stack.pop()
+                            component.add(x)
+                            if x == u:
+                                break
+                        self.edge_components.append(component)
+            if root_children >= 2:
+                cuts.add(root)
+            if root_children == 0:
+                # nœud isolé : un bloc à lui seul
+                self.blocks.append({root})
+            self.edge_components.append(set(node_stack))
+        # ordre de visite : stable d'un appel à l'autre
+        self.articulation_points = sorted(cuts, key=disc.__getitem__)
+
+    # ---------- Arbre des blocs ----------
+
+    def _build_tree(self) -> None:
+        cuts = set(self.articulation_points)
+        adj: Dict[Tuple, List[Tuple]] = {}
+        # représentant de chaque nœud : son point d'articulation, ou son unique bloc
+        self.rep: Dict[Hashable, Tuple] = {c: (CUT, c) for c in cuts}
+        for i, block in enumerate(self.blocks):
+            b = (BLOCK, i)
+            adj.setdefault(b, [])
+            for node in block:
+                if node in cuts:
+                    adj[b].append((CUT, node))
+                    adj.setdefault((CUT, node), []).append(b)
+                else:
+                    self.rep[node] = b
+        self.tree_edges = [(b, c) for b, cs in adj.items() if b[0] == BLOCK for c in cs]
+
+        # enracinement de chaque arbre (forêt) : parent, profondeur, racine
+        self.parent: Dict[Tuple, Optional[Tuple]] = {}
+        self.depth: Dict[Tuple, int] = {}
+        self.root: Dict[Tuple, Tuple] = {}
+        for start in adj:
+            if start in self.parent:
+                continue
+            self.parent[start], self.depth[start], self.root[start] = None, 0, start
+            stack = [start]
+            while stack:
+                x = stack.pop()
+                for y in adj[x]:
+                    if y not in self.parent:
+                        self.parent[y] = x
+                        self.depth[y] = self.depth[x] + 1
+                        self.root[y] = start
+                        stack.append(y)
+
+    def tree_path(self, s, t) -> Optional[List[Tuple]]:
+        """Chemin de rep(s) à rep(t) dans l'arbre des blocs, ou None s'ils ne sont pas connectés."""
+        a, b = self.rep[s], self.rep[t]
+        if self.root[a] != self.root[b]:
+            return None
+        left, right = [a], [b]
+        while self.depth[left[-1]] > self.depth[right[-1]]:
+            left.append(self.parent[left[-1]])
+        while self.depth[right[-1]] > self.depth[left[-1]]:
+            right.append(self.parent[right[-1]])
+        while left[-1] != right[-1]:
+            left.append(self.parent[left[-1]])
+            right.append(self.parent[right[-1]])
+        return left + right[-2::-1]
+
+    def depends_on(self, s, t, node) -> Optional[bool]:
+        """
+        True si tout chemin de s à t passe par `node` (extrémités comprises),
+        False sinon, None s'il n'y a aucun chemin entre s et t.
+        """
+        if s == t:
+            return node == s
+        path = self.tree_path(s, t)
+        if path is None:
+            return None
+        return node in (s, t) or (CUT, node) in path
+
+    def stats(self) -> dict:
+        return {
+            "articulation_points": len(self.articulation_points),
+            "bridges": len(self.bridges),
+            "blocks": len(self.blocks),
+            "edge_components": len(self.edge_components),
+        }
@@ -0,0 +1,28 @@
+# changes.py
+"""
+Changements de topologie émis par les mutations de Network
+(cf. Network.subscribe / Network.changes_since).
+"""
+from typing import NamedTuple
+
+# Types de changements émis par les méthodes de mutation de Network
+NODE_ADDED = "node_added"              # node
+NODE_REMOVED = "node_removed"          # node, links = [(u, v, latency), ...]
+NODE_RENAMED = "node_renamed"          # old, new
+LINK_ADDED = "link_added"              # u, v, latency
+LINK_REMOVED = "link_removed"          # u, v, latency
+LATENCY_CHANGED = "latency_changed"    # u, v, old, new
+DIRECTED_CHANGED = "directed_changed"  # directed
+RESET = "reset"                        # (aucune donnée)
+NODES_ADDED = "nodes_added"            # nodes = [node, ...]
+LINKS_ADDED = "links_added"            # links = [(u, v, latency), ...], updated = [(u, v, old, new), ...]
+
+# Nombre de changements conservés dans Network.changes
+CHANGELOG_SIZE = 1000
+
+
+class Change(NamedTuple):
+    """Un changement de topologie : version atteinte, type, et détails."""
+    version: int
+    kind: str
+    data: dict
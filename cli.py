@@ -1,41 +1,42 @@
-import os
-import pickle
-from typing import Optional
-from state import load_network, save_network
-from commands import handle_command
+import inspect
+import sys
+from typing import List, Optional
+from state import load_network, load_network_view, save_network
+from commands import (
+    COMMANDS,
+    Command,
+    format_rejected,
+    format_script_result,
+    handle_command,
+    run_script,
+)
 
 import typer
 
+import server
 from network_model import Network
 
 app = typer.Typer(help="CLI pour le réseau (basée sur Network et Typer).")
 
-STATE_FILE = "network_state.pkl"
 
-
-# ---------- Fonctions utilitaires : chargement / sauvegarde ----------
-
-def load_network() -> Network:
+def _remote(cmd: str) -> bool:
     """
-    Charge l'état du réseau depuis un fichier pickle, ou crée un nouveau réseau vide.
+    Si un serveur d'état tourne, lui fait exécuter `cmd` et affiche la sortie.
+    Retourne False sinon : la commande doit alors travailler sur les fichiers.
     """
-    if os.path.exists(STATE_FILE):
-        with open(STATE_FILE, "rb") as f:
-            net = pickle.load(f)
-        # petit garde-fou : si jamais ce n'est pas un Network, on repart de zéro
-        if not isinstance(net, Network):
-            net = Network(directed=False)
-    else:
-        net = Network(directed=False)
-    return net
+    out = server.run_command(cmd)
+    if out is None:
+        return False
+    if out:
+        typer.echo(out)
+    return True
 
 
-def save_network(net: Network) -> None:
-    """
-    Sauvegarde l'état du réseau dans un fichier pickle.
-    """
-    with open(STATE_FILE, "wb") as f:
-        pickle.dump(net, f)
+def _save(net: Network) -> None:
+    """save_network, en signalant les mutations refusées par le serveur d'état."""
+    rejected = save_network(net)
+    if rejected:
+        typer.echo(format_rejected(rejected))
 
 
 # ---------- Commandes CLI ----------
@@ -56,187 +57,92 @@ def init(
     typer.echo(f"Réseau initialisé (directed={net.directed}).")
 
 
-@app.command("set-directed")
-def cmd_set_directed():
-    """
-    Passe le réseau en mode orienté (DiGraph).
-    """
-    net = load_network()
-    net.set_directed(True)
-    save_network(net)
-    typer.echo("Mode graphe orienté activé.")
-
-
-@app.command("set-undirected")
-def cmd_set_undirected():
-    """
-    Passe le réseau en mode non orienté (Graph).
-    """
-    net = load_network()
-    net.set_directed(False)
-    save_network(net)
-    typer.echo("Mode graphe non orienté activé.")
-
+# ---------- Commandes générées depuis le registre (commands.COMMANDS) ----------
 
-@app.command("list-nodes")
-def cmd_list_nodes():
-    """
-    Affiche la liste des nœuds.
-    """
-    net = load_network()
-    nodes = net.list_nodes()
-    if not nodes:
-        typer.echo("Aucun nœud.")
-    else:
-        for n in nodes:
-            typer.echo(n)
-
-
-@app.command("list-links")
-def cmd_list_links():
-    """
-    Affiche la liste des liens avec leur latence.
-    """
-    net = load_network()
-    links = net.list_links()
-    if not links:
-        typer.echo("Aucun lien.")
-        return
-    arrow = "->" if net.directed else "--"
-    for u, v, data in links:
-        latency = data.get("latency", "?")
-        typer.echo(f"{u} {arrow} {v}  latency={latency} ms")
-
-
-@app.command("add-node")
-def cmd_add_node(node_id: str):
-    """
-    Ajoute un nœud au réseau.
-    """
-    net = load_network()
-    if net.add_node(node_id):
-        save_network(net)
-        typer.echo(f"Nœud ajouté : {node_id}")
-    else:
-        typer.echo(f"Nœud déjà existant : {node_id}")
-
-
-@app.command("delete-node")
-def cmd_delete_node(node_id: str):
-    """
-    Supprime un nœud et tous ses liens.
-    """
-    net = load_network()
-    if net.delete_node(node_id):
-        save_network(net)
-        typer.echo(f"Nœud supprimé : {node_id}")
-    else:
-        typer.echo(f"Nœud introuvable : {node_id}")
-
-
-@app.command("add-link")
-def cmd_add_link(
-    n1: str,
-    n2: str,
-    latency: int = typer.Option(1, "--latency", "-l", help="Latence en ms."),
-):
-    """
-    Ajoute un lien entre n1 et n2, avec une latence.
-    """
-    net = load_network()
-    if net.add_link(n1, n2, latency):
-        save_network(net)
-        arrow = "->" if net.directed else "--"
-        typer.echo(f"Lien ajouté : {n1} {arrow} {n2} (latency={latency} ms)")
-    else:
-        typer.echo(f"Impossible d'ajouter le lien, vérifiez que {n1} et {n2} existent.")
-
-
-@app.command("delete-link")
-def cmd_delete_link(n1: str, n2: str):
-    """
-    Supprime un lien entre n1 et n2 (dans le sens n1 -> n2).
-    """
-    net = load_network()
-    if net.delete_link(n1, n2):
-        save_network(net)
-        arrow = "->" if net.directed else "--"
-        typer.echo(f"Lien supprimé : {n1} {arrow} {n2}")
-    else:
-        typer.echo("Lien introuvable.")
-
-
-@app.command("update-link")
-def cmd_update_link(n1: str, n2: str, latency: int):
-    """
-    Modifie la latence d'un lien existant.
-    """
-    net = load_network()
-    if net.update_link_latency(n1, n2, latency):
-        save_network(net)
-        arrow = "->" if net.directed else "--"
-        typer.echo(
-            f"Latence du lien {n1} {arrow} {n2} mise à jour à {latency} ms."
+def _typer_param(arg) -> inspect.Parameter:
+    if arg.many:
+        return inspect.Parameter(
+            arg.name,
+            inspect.Parameter.POSITIONAL_OR_KEYWORD,
+            default=typer.Argument(..., help=arg.help or None),
+            annotation=List[arg.type],
         )
+    if arg.required:
+        default = typer.Argument(..., help=arg.help or None)
     else:
-        typer.echo("Lien introuvable.")
-
-
-@app.command("rename-node")
-def cmd_rename_node(old_id: str, new_id: str):
-    """
-    Renomme un nœud en conservant ses liens.
-    """
-    net = load_network()
-    if net.rename_node(old_id, new_id):
-        save_network(net)
-        typer.echo(f"Nœud renommé : {old_id} -> {new_id}")
-    else:
-        typer.echo("Renommage impossible (vérifie les noms).")
+        flags = arg.flags or (f"--{arg.name}",)
+        default = typer.Option(arg.default, *flags, help=arg.help or None)
+    return inspect.Parameter(
+        arg.name,
+        inspect.Parameter.POSITIONAL_OR_KEYWORD,
+        default=default,
+        annotation=arg.type,
+    )
 
 
-@app.command("show-node")
-def cmd_show_node(node_id: str):
+def _register(command: Command) -> None:
+    """Expose `command` comme sous-commande Typer."""
+
+    def run(**kwargs):
+        values = [kwargs[a.name] for a in command.args]
+        words = []
+        for arg, value in zip(command.args, values):
+            if value is None:
+                # option non renseignée (toujours en fin de ligne, cf. commands.py)
+                break
+            words.extend(map(str, value) if arg.many else [str(value)])
+        if _remote(" ".join([command.name, *words])):
+            return
+        net = load_network_view() if command.view else load_network()
+        for chunk in command.run(net, values):
+            typer.echo(chunk)
+        if not command.view:
+            # n'écrit rien si la commande n'a rien changé (ni topologie, ni hiérarchie)
+            _save(net)
+
+    run.__name__ = "cmd_" + command.name.replace("-", "_")
+    run.__doc__ = command.help
+    run.__signature__ = inspect.Signature([_typer_param(a) for a in command.args])
+    app.command(command.name)(run)
+
+
+for _command in COMMANDS.values():
+    _register(_command)
+
+
+@app.command("batch")
+def batch(
+    file: Optional[str] = typer.Argument(
+        None, help="Fichier de commandes (une par ligne) ; '-' ou absent : entrée standard."
+    ),
+    verbose: bool = typer.Option(
+        False, "--verbose", "-v", help="Affiche la sortie de chaque commande."
+    ),
+):
     """
-    Affiche les infos détaillées d'un nœud.
+    Exécute un script de commandes sur un seul réseau en mémoire, puis
+    sauvegarde une seule fois. Tout ou rien : à la première erreur, rien
+    n'est sauvegardé et la ligne fautive est indiquée.
     """
+    echo = typer.echo if verbose else None
     net = load_network()
-    info = net.show_node(node_id)
-    if info is None:
-        typer.echo(f"Nœud introuvable : {node_id}")
+    if file is None or file == "-":
+        res = run_script(net, sys.stdin, echo)
     else:
-        typer.echo(f"Id       : {info['id']}")
-        typer.echo(f"Degree   : {info['degree']}")
-        neighbors = ", ".join(info["neighbors"]) if info["neighbors"] else "(aucun)"
-        typer.echo(f"Voisins  : {neighbors}")
-
+        try:
+            with open(file, "r", encoding="utf-8") as f:
+                res = run_script(net, f, echo)
+        except OSError as e:
+            typer.echo(f"Impossible de lire {file} ({e.strerror}).")
+            raise typer.Exit(code=1)
 
-@app.command("simulate-ping")
-def cmd_simulate_ping(src: str, dst: str):
-    """
-    Simule un ping entre deux nœuds.
-    """
-    net = load_network()
-    res = net.simulate_ping(src, dst)
-    if not res["ok"]:
-        typer.echo(f"Erreur : {res['error']}")
-    else:
-        path_str = " -> ".join(res["path"])
-        typer.echo("PING OK")
-        typer.echo(f"Chemin  : {path_str}")
-        typer.echo(f"Latence : {res['latency_ms']} ms")
+    typer.echo(format_script_result(res))
+    if not res.ok:
+        # le réseau modifié en partie est simplement abandonné
+        raise typer.Exit(code=1)
+    _save(net)
 
 
-@app.command("reset-network")
-def cmd_reset_network():
-    """
-    Efface complètement la topologie actuelle.
-    """
-    net = load_network()
-    net.reset()
-    save_network(net)
-    typer.echo("Topologie réinitialisée (mais mode directed/non directed conservé).")
-
 @app.command("repl")
 def repl():
     """
@@ -269,18 +175,46 @@ def repl():
         if not cmd:
             continue
 
-        # IMPORTANT : recharger l'état avant CHAQUE commande
-        net = load_network()
+        # serveur d'état : il exécute la commande sur son réseau en mémoire
+        out = server.run_command(cmd)
+
+        if out is None:
+            # IMPORTANT : recharger l'état avant CHAQUE commande
+            # (vue en lecture seule si la commande le permet)
+            command = COMMANDS.get(cmd.split()[0])
+            if command is not None and command.view:
+                net = load_network_view()
+            else:
+                net = load_network()
 
-        # réutilise toute la logique de commands.py
-        out = handle_command(net, cmd)
+            # réutilise toute la logique de commands.py
+            out = handle_command(net, cmd)
 
-        # sauvegarder après la commande (UI + CLI voient le même graphe)
-        save_network(net)
+            # sauvegarder après une commande de modification, ou qui a
+            # construit une hiérarchie (UI + CLI voient le même graphe) ;
+            # save_network n'écrit rien pour une lecture
+            if command is None or not command.view:
+                _save(net)
 
         if out:
             typer.echo(out)
 
 
+@app.command("server")
+def cmd_server():
+    """
+    Démarre le serveur d'état local (socket Unix) partagé par le REPL,
+    la CLI et Streamlit. Ctrl-C pour l'arrêter (l'état est sauvegardé).
+    """
+    typer.echo(f"Serveur d'état démarré sur {server.SOCKET_FILE} (Ctrl-C pour arrêter).")
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        typer.echo("\nServeur arrêté, état sauvegardé.")
+    except RuntimeError as e:
+        typer.echo(str(e))
+        raise typer.Exit(code=1)
+
+
 if __name__ == "__main__":
     app()
@@ -1,274 +1,1067 @@
-from typing import List
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from collections import Counter
 import difflib
+import fnmatch
+import json
+import re
+import time
 
 from network_model import Network
+from routing import AUTO, LATENCY
 
-VALID_COMMANDS: List[str] = [
-    "list-nodes",
-    "list-links",
-    "show-node",
-    "simulate-ping",
-    "add-node",
-    "add-link",
-    "delete-node",
-    "delete-link",
-    "update-link",
-    "rename-node",
-    "reset-network",
-    "set-directed",
-    "set-undirected",
-    "dijkstra",
-    "mst-kruskal",
-    "mst-prim",
-    "scc",   
-    "articulation",
-    "is-acyclic",
-    "help",
-]
 
+# =========================
+#   Registre des commandes
+# =========================
 
-def format_help() -> str:
-    lines = [
-        "Commandes disponibles :",
-        "  list-nodes",
-        "  list-links",
-        "  show-node <id>",
-        "  simulate-ping <src> <dst>",
-        "  add-node <id>",
-        "  add-link <n1> <n2> [latency]",
-        "  delete-node <id>",
-        "  delete-link <n1> <n2>",
-        "  update-link <n1> <n2> <latency>",
-        "  rename-node <old_id> <new_id>",
-        "  reset-network",
-        "  set-directed",
-        "  set-undirected",
-        "  dijkstra <src> <dst>",
-        "  mst-kruskal",
-        "  mst-prim",
-        "  scc",   
-        "  is-acyclic",
-        "  articulation",
-        "  help",
-    ]
-    return "\n".join(lines)
+REQUIRED = object()
 
 
-def handle_command(net: Network, cmd: str) -> str:
-    cmd = cmd.strip()
-    if not cmd:
-        return ""
+class Arg(NamedTuple):
+    """Argument positionnel d'une commande (optionnel s'il a une valeur par défaut)."""
+    name: str
+    type: type = str
+    default: Any = REQUIRED
+    help: str = ""
+    # message si la conversion vers `type` échoue
+    invalid: Optional[str] = None
+    # options Typer pour un argument optionnel (ex: ("--latency", "-l"))
+    flags: Tuple[str, ...] = ()
+    # dernier argument uniquement : consomme tous les mots restants (au moins un)
+    many: bool = False
 
-    parts = cmd.split()
-    name = parts[0]
-    args = parts[1:]
+    @property
+    def required(self) -> bool:
+        return self.default is REQUIRED
 
-    # list-nodes
-    if name == "list-nodes":
-        nodes = net.list_nodes()
-        if not nodes:
-            return "Aucun nœud."
-        return "\n".join(nodes)
-
-    # list-links
-    if name == "list-links":
-        links = net.list_links()
-        if not links:
-            return "Aucun lien."
-        lines = []
-        for u, v, data in links:
-            latency = data.get("latency", "?")
-            arrow = "->" if net.directed else "--"
-            lines.append(f"{u} {arrow} {v}  latency={latency} ms")
-        return "\n".join(lines)
-
-    # show-node <id>
-    if name == "show-node":
-        if len(args) != 1:
-            return "Usage : show-node <id>"
-        info = net.show_node(args[0])
-        if info is None:
-            return f"Nœud introuvable : {args[0]}"
-        return (
-            f"Id       : {info['id']}\n"
-            f"Degree   : {info['degree']}\n"
-            f"Voisins  : {', '.join(info['neighbors']) if info['neighbors'] else '(aucun)'}"
-        )
 
-    # simulate-ping <src> <dst>
-    if name == "simulate-ping":
-        if len(args) != 2:
-            return "Usage : simulate-ping <src> <dst>"
-        res = net.simulate_ping(args[0], args[1])
-        if not res["ok"]:
-            return f"Erreur : {res['error']}"
-        path_str = " -> ".join(res["path"])
-        return f"PING OK\nChemin  : {path_str}\nLatence : {res['latency_ms']} ms"
-
-    # add-node <id>
-    if name == "add-node":
-        if len(args) != 1:
-            return "Usage : add-node <id>"
-        if net.add_node(args[0]):
-            return f"Nœud ajouté : {args[0]}"
-        else:
-            return f"Nœud déjà existant : {args[0]}"
-
-    # add-link <n1> <n2> [latency]
-    if name == "add-link":
-        if len(args) < 2:
-            return "Usage : add-link <n1> <n2> [latency]"
-        n1, n2 = args[0], args[1]
-        latency = 1
-        if len(args) >= 3:
+class Command(NamedTuple):
+    """
+    Une commande de la console : ses arguments, si elle modifie le réseau,
+    la méthode qui l'exécute (`handler(net, *args)`) et la fonction qui met
+    en forme le résultat (`formatter(net, result, *args)`, qui retourne un
+    texte ou produit des lignes une à une).
+    """
+    name: str
+    handler: Callable
+    formatter: Callable
+    args: Tuple[Arg, ...] = ()
+    mutating: bool = False
+    # exécutable sur une snapshot.SnapshotView (lecture seule, sans charger le graphe)
+    view: bool = False
+    help: str = ""
+    # failed(result) -> True si la commande a échoué ; par défaut : une
+    # modification dont le handler retourne False (ex : nœud déjà existant)
+    failed: Optional[Callable] = None
+    # long calcul en lecture seule : le serveur d'état l'exécute sur une
+    # copie du réseau, sans garder son verrou (cf. server.NetworkServer)
+    on_copy: bool = False
+
+    @property
+    def usage(self) -> str:
+        parts = [self.name]
+        for a in self.args:
+            label = f"{a.name}..." if a.many else a.name
+            parts.append(f"<{label}>" if a.required else f"[{label}]")
+        return " ".join(parts)
+
+    def parse(self, words: List[str]):
+        """
+        Convertit les mots de la ligne de commande en valeurs typées.
+        Retourne (valeurs, None) ou (None, message d'erreur).
+        """
+        n_required = sum(1 for a in self.args if a.required)
+        many = bool(self.args) and self.args[-1].many
+        n_max = len(words) if many else len(self.args)
+        if not n_required <= len(words) <= n_max:
+            return None, f"Usage : {self.usage}"
+        fixed = self.args[:-1] if many else self.args
+        values = []
+        for arg, word in zip(fixed, words):
             try:
-                latency = int(args[2])
+                values.append(arg.type(word))
             except ValueError:
-                return "Latence invalide, doit être un entier."
-        if net.add_link(n1, n2, latency):
-            arrow = "->" if net.directed else "--"
-            return f"Lien ajouté : {n1} {arrow} {n2} (latency={latency} ms)"
-        else:
-            return f"Impossible d'ajouter le lien, vérifiez que {n1} et {n2} existent."
-
-    # delete-node <id>
-    if name == "delete-node":
-        if len(args) != 1:
-            return "Usage : delete-node <id>"
-        if net.delete_node(args[0]):
-            return f"Nœud supprimé : {args[0]}"
-        else:
-            return f"Nœud introuvable : {args[0]}"
-
-    # delete-link <n1> <n2>
-    if name == "delete-link":
-        if len(args) != 2:
-            return "Usage : delete-link <n1> <n2>"
-        n1, n2 = args[0], args[1]
-        if net.delete_link(n1, n2):
-            arrow = "->" if net.directed else "--"
-            return f"Lien supprimé : {n1} {arrow} {n2}"
+                return None, arg.invalid or f"Argument invalide pour {arg.name} : {word}"
+        if many:
+            arg = self.args[-1]
+            try:
+                values.append([arg.type(word) for word in words[len(fixed):]])
+            except ValueError:
+                return None, arg.invalid or f"Argument invalide pour {arg.name}."
+        values.extend(a.default for a in self.args[len(words):])
+        return values, None
+
+    def is_failure(self, result) -> bool:
+        if self.failed is not None:
+            return self.failed(result)
+        return self.mutating and result is False
+
+    def render(self, net, result, values) -> Iterator[str]:
+        """Met en forme `result` (texte ou lignes)."""
+        out = self.formatter(net, result, *values)
+        if isinstance(out, str):
+            yield out
         else:
-            return "Lien introuvable."
+            yield from out
+
+    def run(self, net, values) -> Iterator[str]:
+        """Exécute la commande sur `net` et produit sa sortie (texte ou lignes)."""
+        return self.render(net, self.handler(net, *values), values)
+
+
+COMMANDS: Dict[str, Command] = {}
+
+
+def command(name: str, handler: Callable, args=(), mutating: bool = False,
+            view: bool = False, help: str = "", failed: Optional[Callable] = None,
+            on_copy: bool = False):
+    """Décorateur : enregistre la fonction décorée comme formatter de `name`."""
+    def register(formatter):
+        COMMANDS[name] = Command(
+            name, handler, formatter, tuple(args), mutating, view, help, failed, on_copy
+        )
+        return formatter
+    return register
+
+
+def _arrow(net) -> str:
+    return "->" if net.directed else "--"
+
+
+LATENCY_INVALID = "Latence invalide, doit être un entier."
+
+
+# ---------- Consultation ----------
+
+@command("list-nodes", lambda net: net.iter_nodes(), view=True,
+         help="Affiche la liste des nœuds.")
+def _list_nodes(net, nodes):
+    empty = True
+    for n in nodes:
+        yield n
+        empty = False
+    if empty:
+        yield "Aucun nœud."
+
+
+@command("list-links", lambda net: net.iter_links(), view=True,
+         help="Affiche la liste des liens avec leur latence.")
+def _list_links(net, links):
+    arrow = _arrow(net)
+    empty = True
+    for u, v, data in links:
+        latency = data.get("latency", "?")
+        yield f"{u} {arrow} {v}  latency={latency} ms"
+        empty = False
+    if empty:
+        yield "Aucun lien."
+
+
+@command("show-node", lambda net, node_id: net.show_node(node_id),
+         args=[Arg("id")], view=True,
+         help="Affiche les infos détaillées d'un nœud.")
+def _show_node(net, info, node_id):
+    if info is None:
+        return f"Nœud introuvable : {node_id}"
+    return (
+        f"Id       : {info['id']}\n"
+        f"Degree   : {info['degree']}\n"
+        f"Voisins  : {', '.join(info['neighbors']) if info['neighbors'] else '(aucun)'}"
+    )
+
+
+@command("simulate-ping", Network.simulate_ping,
+         args=[
+             Arg("src"),
+             Arg("dst"),
+             Arg("metric", str, LATENCY, "Métrique : latency ou hops.", flags=("--metric", "-m")),
+             Arg("algorithm", str, AUTO, "Algorithme : auto, bidirectional ou fib.",
+                 flags=("--algorithm", "-a")),
+         ],
+         help="Simule un ping entre deux nœuds (route de plus faible latence par défaut).")
+def _simulate_ping(net, res, src, dst, metric, algorithm):
+    if not res["ok"]:
+        return f"Erreur : {res['error']}"
+    path_str = " -> ".join(res["path"])
+    return f"PING OK\nChemin  : {path_str}\nLatence : {res['latency_ms']} ms"
+
+
+@command("show-route", Network.routing_table, args=[Arg("id")],
+         help="Table de routage d'un nœud : prochain saut vers chaque destination.")
+def _show_route(net, table, node_id):
+    if table is None:
+        yield f"Nœud introuvable : {node_id}"
+        return
+    if not table:
+        yield f"Aucune destination joignable depuis {node_id}."
+        return
+    width = max(len("Destination"), *(len(dst) for dst, _hop, _lat in table))
+    yield f"Table de routage de {node_id} :"
+    yield f"{'Destination'.ljust(width)}  Prochain saut  Latence"
+    for dst, hop, latency in table:
+        yield f"{dst.ljust(width)}  {hop.ljust(13)}  {_format_latency(latency)} ms"
+
+
+# ---------- Modification ----------
+
+@command("add-node", Network.add_node, args=[Arg("id")], mutating=True,
+         help="Ajoute un nœud au réseau.")
+def _add_node(net, ok, node_id):
+    if ok:
+        return f"Nœud ajouté : {node_id}"
+    return f"Nœud déjà existant : {node_id}"
+
+
+@command("add-link", Network.add_link,
+         args=[
+             Arg("n1"),
+             Arg("n2"),
+             Arg("latency", int, 1, "Latence en ms.", LATENCY_INVALID, ("--latency", "-l")),
+         ],
+         mutating=True,
+         help="Ajoute un lien entre n1 et n2, avec une latence.")
+def _add_link(net, ok, n1, n2, latency):
+    if ok:
+        return f"Lien ajouté : {n1} {_arrow(net)} {n2} (latency={latency} ms)"
+    return f"Impossible d'ajouter le lien, vérifiez que {n1} et {n2} existent."
+
+
+@command("delete-node", Network.delete_node, args=[Arg("id")], mutating=True,
+         help="Supprime un nœud et tous ses liens.")
+def _delete_node(net, ok, node_id):
+    if ok:
+        return f"Nœud supprimé : {node_id}"
+    return f"Nœud introuvable : {node_id}"
+
+
+@command("delete-link", Network.delete_link, args=[Arg("n1"), Arg("n2")], mutating=True,
+         help="Supprime un lien entre n1 et n2 (dans le sens n1 -> n2).")
+def _delete_link(net, ok, n1, n2):
+    if ok:
+        return f"Lien supprimé : {n1} {_arrow(net)} {n2}"
+    return "Lien introuvable."
+
+
+@command("update-link", Network.update_link_latency,
+         args=[Arg("n1"), Arg("n2"), Arg("latency", int, invalid=LATENCY_INVALID)],
+         mutating=True,
+         help="Modifie la latence d'un lien existant.")
+def _update_link(net, ok, n1, n2, latency):
+    if ok:
+        return f"Latence du lien {n1} {_arrow(net)} {n2} mise à jour à {latency} ms."
+    return "Lien introuvable."
+
+
+@command("rename-node", Network.rename_node, args=[Arg("old_id"), Arg("new_id")],
+         mutating=True,
+         help="Renomme un nœud en conservant ses liens.")
+def _rename_node(net, ok, old_id, new_id):
+    if ok:
+        return f"Nœud renommé : {old_id} -> {new_id}"
+    return "Renommage impossible (vérifie les noms)."
+
 
-    # update-link <n1> <n2> <latency>
-    if name == "update-link":
-        if len(args) != 3:
-            return "Usage : update-link <n1> <n2> <latency>"
-        n1, n2, lat_str = args
+@command("reset-network", Network.reset, mutating=True,
+         help="Efface complètement la topologie actuelle.")
+def _reset_network(net, _):
+    return "Topologie réinitialisée."
+
+
+@command("set-directed", lambda net: net.set_directed(True), mutating=True,
+         help="Passe le réseau en mode orienté (DiGraph).")
+def _set_directed(net, _):
+    return "Mode graphe orienté activé."
+
+
+@command("set-undirected", lambda net: net.set_directed(False), mutating=True,
+         help="Passe le réseau en mode non orienté (Graph).")
+def _set_undirected(net, _):
+    return "Mode graphe non orienté activé."
+
+
+# ---------- Ajouts en masse ----------
+
+_RANGE = re.compile(r"^(\D*)(\d+)\.\.(?:\1)?(\d+)$")
+
+
+def expand_node_specs(specs: List[str]) -> List[str]:
+    """
+    Développe les plages : "R1..R3" (ou "R1..3") -> R1, R2, R3.
+    Un zéro initial fixe la largeur : "R01..R10" -> R01 ... R10.
+    Lève ValueError pour une plage décroissante.
+    """
+    nodes = []
+    for spec in specs:
+        m = _RANGE.match(spec)
+        if m is None:
+            nodes.append(spec)
+            continue
+        prefix, first, last = m.group(1), m.group(2), m.group(3)
+        start, stop = int(first), int(last)
+        if stop < start:
+            raise ValueError(f"Plage invalide : {spec}")
+        width = len(first) if first.startswith("0") else 0
+        nodes.extend(f"{prefix}{i:0{width}d}" for i in range(start, stop + 1))
+    return nodes
+
+
+def parse_link_words(words: List[str]):
+    """
+    "R1 R2:10 R2 R3" -> [("R1", "R2", 10), ("R2", "R3", 1)].
+    La latence (défaut 1) suit la 2e extrémité. Lève ValueError.
+    """
+    if len(words) % 2:
+        raise ValueError("Nombre de nœuds impair : les liens vont par paires.")
+    links = []
+    for u, v in zip(words[::2], words[1::2]):
+        v, _, latency = v.partition(":")
+        try:
+            links.append((u, v, int(latency) if latency else 1))
+        except ValueError:
+            raise ValueError(LATENCY_INVALID) from None
+    return links
+
+
+def read_edgelist(f):
+    """
+    Lit une liste de liens "n1 n2 [latency]" (une par ligne, '#' pour les
+    commentaires). Lève ValueError en indiquant la ligne fautive.
+    """
+    links = []
+    for lineno, line in enumerate(f, 1):
+        words = line.split("#", 1)[0].split()
+        if not words:
+            continue
+        if len(words) not in (2, 3):
+            raise ValueError(f"ligne {lineno} : attendu \"n1 n2 [latency]\".")
         try:
-            latency = int(lat_str)
+            latency = int(words[2]) if len(words) == 3 else 1
         except ValueError:
-            return "Latence invalide, doit être un entier."
-        if net.update_link_latency(n1, n2, latency):
-            arrow = "->" if net.directed else "--"
-            return f"Latence du lien {n1} {arrow} {n2} mise à jour à {latency} ms."
+            raise ValueError(f"ligne {lineno} : {LATENCY_INVALID}") from None
+        links.append((words[0], words[1], latency))
+    return links
+
+
+def read_mapping(f):
+    """
+    Lit une table de renommage "ancien nouveau" (une paire par ligne, '#'
+    pour les commentaires). Lève ValueError en indiquant la ligne fautive.
+    """
+    pairs = []
+    for lineno, line in enumerate(f, 1):
+        words = line.split("#", 1)[0].split()
+        if not words:
+            continue
+        if len(words) != 2:
+            raise ValueError(f"ligne {lineno} : attendu \"ancien nouveau\".")
+        pairs.append((words[0], words[1]))
+    return pairs
+
+
+def _add_nodes(net, specs):
+    try:
+        nodes = expand_node_specs(specs)
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}
+    return net.add_nodes(nodes)
+
+
+def _add_links(net, words):
+    try:
+        links = parse_link_words(words)
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}
+    return net.add_links(links)
+
+
+def _add_links_from(net, path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            links = read_edgelist(f)
+    except OSError as e:
+        return {"ok": False, "error": f"Impossible de lire {path} ({e.strerror})."}
+    except ValueError as e:
+        return {"ok": False, "error": f"{path}, {e}"}
+    return net.add_links(links)
+
+
+def _rename_nodes_from(net, path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            pairs = read_mapping(f)
+    except OSError as e:
+        return {"ok": False, "error": f"Impossible de lire {path} ({e.strerror})."}
+    except ValueError as e:
+        return {"ok": False, "error": f"{path}, {e}"}
+    return net.rename_nodes(pairs)
+
+
+def _bulk_failed(res):
+    return not res["ok"]
+
+
+def _format_links_added(res):
+    if not res["ok"]:
+        return f"Erreur : {res['error']} Aucun lien ajouté."
+    return f"{res['added']} lien(s) ajouté(s), {res['updated']} latence(s) mise(s) à jour."
+
+
+@command("add-nodes", _add_nodes, args=[Arg("ids", many=True)], mutating=True,
+         failed=_bulk_failed,
+         help="Ajoute plusieurs nœuds (plages acceptées : R1..R1000).")
+def _add_nodes_fmt(net, res, specs):
+    if not res["ok"]:
+        return f"Erreur : {res['error']}"
+    return f"{res['added']} nœud(s) ajouté(s), {res['skipped']} déjà existant(s)."
+
+
+@command("add-links", _add_links, args=[Arg("links", many=True)], mutating=True,
+         failed=_bulk_failed,
+         help="Ajoute plusieurs liens : n1 n2[:latency] n3 n4[:latency] ...")
+def _add_links_fmt(net, res, words):
+    return _format_links_added(res)
+
+
+@command("rename-nodes", _rename_nodes_from, args=[Arg("file")], mutating=True,
+         failed=_bulk_failed,
+         help="Renomme les nœuds d'un fichier \"ancien nouveau\" (une ligne par nœud).")
+def _rename_nodes_fmt(net, res, path):
+    if not res["ok"]:
+        return f"Erreur : {res['error']} Aucun nœud renommé."
+    return f"{res['renamed']} nœud(s) renommé(s)."
+
+
+@command("add-links-from", _add_links_from, args=[Arg("file")], mutating=True,
+         failed=_bulk_failed,
+         help="Ajoute les liens d'un fichier \"n1 n2 [latency]\" (une ligne par lien).")
+def _add_links_from_fmt(net, res, path):
+    return _format_links_added(res)
+
+
+# ---------- Analyse ----------
+
+def _shortest_path(net, src, dst, algorithm):
+    try:
+        return net.shortest_path_dijkstra(src, dst, algorithm)
+    except ValueError as e:
+        return e
+
+
+@command("dijkstra", _shortest_path,
+         args=[
+             Arg("src"),
+             Arg("dst"),
+             Arg("algorithm", str, AUTO, "Algorithme : auto, bidirectional ou fib.",
+                 flags=("--algorithm", "-a")),
+         ],
+         failed=lambda res: isinstance(res, ValueError),
+         help="Plus court chemin (latence) entre deux nœuds.")
+def _dijkstra(net, res, src, dst, algorithm):
+    if isinstance(res, ValueError):
+        return f"Erreur : {res}"
+    path, dist = res
+    if path is None:
+        return f"Aucun chemin trouvé entre {src} et {dst}."
+    path_str = " -> ".join(path)
+    return (
+        f"Chemin le plus court (Dijkstra) de {src} à {dst} : {path_str}\n"
+        f"Latence totale = {dist} ms"
+    )
+
+
+@command("k-paths", Network.k_shortest_paths,
+         args=[Arg("src"), Arg("dst"), Arg("k", int, invalid="k doit être un entier.")],
+         help="Les k meilleures routes (latence) entre deux nœuds, sans boucle.")
+def _k_paths(net, routes, src, dst, k):
+    if not net.has_node(src) or not net.has_node(dst):
+        yield f"Nœud introuvable : {src} ou {dst}."
+        return
+    if not routes:
+        yield f"Aucun chemin trouvé entre {src} et {dst}."
+        return
+    for n, route in enumerate(routes, 1):
+        yield f"{n}. {' -> '.join(route.path)} ({route.latency} ms, {route.hops} saut(s))"
+    if len(routes) < k:
+        yield f"Seulement {len(routes)} chemin(s) sans boucle entre {src} et {dst}."
+
+
+def _ecmp(net, src, dst, limit, flows):
+    res = net.ecmp_paths(src, dst, limit)
+    if res is not None and res["count"] and flows > 0:
+        res["flows"] = Counter(
+            tuple(net.ecmp_route(src, dst, flow).path) for flow in range(flows)
+        )
+    return res
+
+
+@command("ecmp", _ecmp,
+         args=[
+             Arg("src"),
+             Arg("dst"),
+             Arg("limit", int, 10, "Nombre maximal de chemins affichés.", "limit doit être un entier.",
+                 flags=("--limit", "-n")),
+             Arg("flows", int, 0, "Nombre de flux à répartir par hachage.", "flows doit être un entier.",
+                 flags=("--flows", "-f")),
+         ],
+         help="Plus courts chemins à coût égal (ECMP) et répartition des flux par hachage.")
+def _ecmp_fmt(net, res, src, dst, limit, flows):
+    if res is None:
+        yield f"Nœud introuvable : {src} ou {dst}"
+        return
+    if not res["count"]:
+        yield f"Aucun chemin trouvé entre {src} et {dst}."
+        return
+    yield f"{res['count']} plus court(s) chemin(s) de {src} à {dst} ({_format_latency(res['latency'])} ms) :"
+    for path in res["paths"]:
+        yield "  " + " -> ".join(path)
+    if res["count"] > len(res["paths"]):
+        yield f"  ... ({res['count'] - len(res['paths'])} autre(s))"
+    if flows > 0:
+        yield f"Répartition de {flows} flux par hachage :"
+        for path, n in res["flows"].most_common():
+            yield f"  {n / flows:6.1%}  {' -> '.join(path)}"
+
+
+def _failure_scan(net, top, kind):
+    if kind not in ("all", "link", "node"):
+        return {"ok": False, "error": f"Type inconnu : {kind} (choix : all, link, node)."}
+    start = time.perf_counter()
+    report = net.failure_scan()
+    if kind != "all":
+        report = [r for r in report if r.kind == kind]
+    return {"ok": True, "report": report, "elapsed": time.perf_counter() - start}
+
+
+@command("failure-scan", _failure_scan,
+         args=[
+             Arg("top", int, 10, "Nombre d'éléments affichés.", "top doit être un entier.",
+                 flags=("--top", "-n")),
+             Arg("kind", str, "all", "Éléments : all, link ou node.", flags=("--kind", "-k")),
+         ],
+         failed=lambda res: not res["ok"], on_copy=True,
+         help="Classe les pannes de lien / nœud par paires perdues et hausse de latence.")
+def _failure_scan_fmt(net, res, top, kind):
+    if not res["ok"]:
+        yield f"Erreur : {res['error']}"
+        return
+    report = res["report"]
+    if not report:
+        yield "Aucun élément à analyser."
+        return
+    yield f"Pannes les plus graves ({len(report)} éléments analysés en {res['elapsed']:.2f} s) :"
+    yield f"{'Élément':<24} {'Perdues':>8} {'Dégradées':>10} {'Hausse moy.':>12} {'Hausse max':>11}"
+    for r in report[:max(top, 0)]:
+        label = f"lien {r.element[0]} - {r.element[1]}" if r.kind == "link" else f"nœud {r.element}"
+        yield (
+            f"{label:<24} {r.lost_pairs:>8} {r.degraded_pairs:>10} "
+            f"{r.avg_increase:>9.2f} ms {_format_latency(r.worst_increase):>8} ms"
+        )
+
+
+def _all_pairs(net, backend, output):
+    start = time.perf_counter()
+    try:
+        result = net.all_pairs_latency(backend)
+        files = result.save(output) if output else []
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}
+    except OSError as e:
+        return {"ok": False, "error": f"Impossible d'écrire {output} ({e.strerror})."}
+    return {"ok": True, "result": result, "files": files, "elapsed": time.perf_counter() - start}
+
+
+def _format_latency(x) -> str:
+    if x == float("inf"):
+        return "-"
+    return f"{x:g}"
+
+
+@command("all-pairs", _all_pairs,
+         args=[
+             Arg("backend", str, "auto", "Méthode : auto, floyd ou dijkstra.", flags=("--backend", "-b")),
+             Arg("output", str, None, "Fichier d'export .npy ou .csv.", flags=("--output", "-o")),
+         ],
+         failed=lambda res: not res["ok"], on_copy=True,
+         help="Matrice des latences minimales entre toutes les paires de nœuds.")
+def _all_pairs_fmt(net, res, backend, output):
+    if not res["ok"]:
+        yield f"Erreur : {res['error']}"
+        return
+    result = res["result"]
+    n = len(result.nodes)
+    if n == 0:
+        yield "Aucun nœud."
+        return
+    head = f"Matrice des latences {n}x{n} (méthode {result.backend}, {res['elapsed']:.3f} s)"
+    if output:
+        yield f"{head} exportée : {', '.join(res['files'])}"
+        return
+    yield head + " :"
+    cells = [[_format_latency(x) for x in row] for row in result.matrix]
+    width = max(len(s) for s in (*result.nodes, *(c for row in cells for c in row)))
+    yield " " * width + " " + " ".join(s.rjust(width) for s in result.nodes)
+    for node, row in zip(result.nodes, cells):
+        yield node.rjust(width) + " " + " ".join(c.rjust(width) for c in row)
+
+
+def select_nodes(net, spec: str) -> List[str]:
+    """
+    Nœuds désignés par `spec` : liste séparée par des virgules de noms,
+    de plages ("R1..R9", cf. expand_node_specs) et de motifs ("R*", "core-?").
+    Lève ValueError pour un nœud inexistant ou un motif sans correspondance.
+    """
+    nodes = []
+    for part in filter(None, spec.split(",")):
+        if any(c in part for c in "*?["):
+            matched = fnmatch.filter(net.iter_nodes(), part)
+            if not matched:
+                raise ValueError(f"Aucun nœud ne correspond à {part}")
+            nodes.extend(sorted(matched))
         else:
-            return "Lien introuvable."
-
-    # rename-node <old_id> <new_id>
-    if name == "rename-node":
-        if len(args) != 2:
-            return "Usage : rename-node <old_id> <new_id>"
-        old_id, new_id = args
-        if net.rename_node(old_id, new_id):
-            return f"Nœud renommé : {old_id} -> {new_id}"
+            for node in expand_node_specs([part]):
+                if not net.has_node(node):
+                    raise ValueError(f"Nœud introuvable : {node}")
+                nodes.append(node)
+    return list(dict.fromkeys(nodes))
+
+
+def _ping_matrix(net, srcs, dsts, metric, fmt):
+    if fmt not in PING_MATRIX_FORMATS:
+        return {"ok": False, "error": f"Format inconnu : {fmt} (choix : {', '.join(PING_MATRIX_FORMATS)})."}
+    try:
+        srcs, dsts = select_nodes(net, srcs), select_nodes(net, dsts)
+        rows = net.ping_matrix(srcs, dsts, metric)
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}
+    return {"ok": True, "srcs": srcs, "dsts": dsts, "rows": rows}
+
+
+PING_MATRIX_FORMATS = ("table", "ndjson")
+
+
+@command("ping-matrix", _ping_matrix,
+         args=[
+             Arg("srcs", help="Sources : noms, plages R1..R9 ou motifs R*, séparés par des virgules."),
+             Arg("dsts", help="Destinations (même syntaxe)."),
+             Arg("metric", str, LATENCY, "Métrique : latency ou hops.", flags=("--metric", "-m")),
+             Arg("format", str, "table", "Sortie : table ou ndjson.", flags=("--format", "-f")),
+         ],
+         failed=lambda res: not res["ok"], on_copy=True,
+         help="Pings de chaque source vers chaque destination (une recherche par source).")
+def _ping_matrix_fmt(net, res, srcs, dsts, metric, fmt):
+    if not res["ok"]:
+        yield f"Erreur : {res['error']}"
+        return
+    dsts = res["dsts"]
+    if fmt == "ndjson":
+        for src, routes in res["rows"]:
+            for dst, route in zip(dsts, routes):
+                record = {"src": src, "dst": dst, "ok": route is not None}
+                if route is not None:
+                    record.update(latency_ms=route.latency, hops=route.hops, path=route.path)
+                yield json.dumps(record)
+        return
+
+    # table : latence (ms) ou nombre de sauts, "-" si injoignable ; largeur
+    # fixée d'avance pour afficher chaque ligne dès qu'elle est calculée
+    start = time.perf_counter()
+    width = max(6, *(len(n) for n in (*res["srcs"], *dsts)))
+    yield " " * width + " " + " ".join(d.rjust(width) for d in dsts)
+    pairs = unreachable = 0
+    for src, routes in res["rows"]:
+        cells = []
+        for route in routes:
+            if route is None:
+                unreachable += 1
+                cells.append("-")
+            else:
+                cells.append(_format_latency(route.latency if metric == LATENCY else route.hops))
+        pairs += len(routes)
+        yield src.rjust(width) + " " + " ".join(c.rjust(width) for c in cells)
+    unit = "ms" if metric == LATENCY else "sauts"
+    yield (
+        f"{pairs} paire(s) ({unit}), {unreachable} injoignable(s), "
+        f"{time.perf_counter() - start:.3f} s"
+    )
+
+
+def _landmarks(net, count):
+    if count is None:
+        return net.landmarks.stats() if net.landmarks is not None else None
+    return net.enable_landmarks(count)
+
+
+@command("landmarks", _landmarks,
+         args=[Arg("count", int, None, "Nombre de repères (0 : désactiver).",
+                   "Nombre de repères invalide, doit être un entier.", ("--count", "-n"))],
+         help="Active les requêtes A* par repères (ALT) pour dijkstra / simulate-ping.")
+def _landmarks_fmt(net, stats, count):
+    if stats is None:
+        return "Repères A* désactivés."
+    lines = [
+        f"Repères A*      : {stats['landmarks']} "
+        f"(préparés en {stats['build_time']:.3f} s"
+        f"{', à recalculer' if stats['stale'] else ''})",
+        f"Mémoire         : {stats['memory_bytes'] / 1024:.1f} Kio",
+    ]
+    if stats["queries"]:
+        lines.append(
+            f"Requêtes        : {stats['queries']} "
+            f"({stats['avg_settled']:.0f} nœuds traités en moyenne)"
+        )
+    return "\n".join(lines)
+
+
+# pas de changement de topologie : save_network persiste quand même la
+# hiérarchie construite (cf. state._hierarchy_unsaved)
+@command("contract", Network.build_hierarchy, on_copy=True,
+         help="Prépare les hiérarchies de contraction (requêtes de latence rapides).")
+def _contract(net, stats):
+    return (
+        f"Hiérarchie de contraction construite en {stats['build_time']:.2f} s : "
+        f"{stats['nodes']} nœuds, {stats['shortcuts']} raccourcis "
+        f"({stats['memory_bytes'] / 1024:.1f} Kio).\n"
+        f"Valable jusqu'à la prochaine modification de la topologie."
+    )
+
+
+def _set_backend(net, name):
+    try:
+        return net.set_backend(name)
+    except ValueError as e:
+        return e
+
+
+def _format_storage(res):
+    if isinstance(res, ValueError):
+        return f"Erreur : {res}"
+    return (
+        f"Backend         : {res['backend']}\n"
+        f"Topologie       : {res['nodes']} nœuds, {res['links']} liens\n"
+        f"Mémoire         : {res['memory_bytes'] / 1024:.1f} Kio"
+    )
+
+
+@command("backend", Network.storage_stats,
+         help="Stockage de la topologie (networkx ou compact, en tableaux) et sa mémoire.")
+def _backend(net, res):
+    return _format_storage(res)
+
+
+@command("set-backend", _set_backend, args=[Arg("name", help="Stockage : networkx ou compact.")],
+         mutating=True,
+         failed=lambda res: isinstance(res, ValueError),
+         help="Change le stockage de la topologie : networkx ou compact (en tableaux).")
+def _set_backend_fmt(net, res, name):
+    return _format_storage(res)
+
+
+@command("route-cache", lambda net: net.route_cache.stats(),
+         help="Statistiques du cache de routage (arbres, taux de succès, réparations, mémoire).")
+def _route_cache(net, stats):
+    return (
+        f"Arbres en cache : {stats['trees']}\n"
+        f"Requêtes        : {stats['hits'] + stats['misses']} "
+        f"(taux de succès {stats['hit_rate']:.0%})\n"
+        f"Invalidations   : {stats['invalidations']}\n"
+        f"Réparations     : {stats['repairs']} ({stats['repaired_nodes']} nœuds revus)\n"
+        f"Mémoire         : {stats['memory_bytes'] / 1024:.1f} Kio"
+    )
+
+
+def _format_mst(net, edges, algo_label):
+    if not edges:
+        return "Aucun arbre couvrant (graphe vide ?)."
+    graph = net.graph
+    lines = [f"Arbre couvrant minimum ({algo_label}) :"]
+    for u, v in edges:
+        w = graph[u][v].get("latency", 1)
+        lines.append(f"- {u} -- {v} (latence = {w} ms)")
+    return "\n".join(lines)
+
+
+@command("mst-kruskal", lambda net: net.mst_edges(algo="kruskal"),
+         help="Arbre couvrant minimum (Kruskal).")
+def _mst_kruskal(net, edges):
+    return _format_mst(net, edges, "Kruskal")
+
+
+@command("mst-prim", lambda net: net.mst_edges(algo="prim"),
+         help="Arbre couvrant minimum (Prim).")
+def _mst_prim(net, edges):
+    return _format_mst(net, edges, "Prim")
+
+
+@command("scc", Network.strongly_connected_components,
+         help="Composantes fortement connexes (Tarjan).")
+def _scc(net, comps):
+    if not comps:
+        return "Aucune composante (graphe vide)."
+    lines = ["Composantes fortement connexes (Tarjan) :"]
+    for i, comp in enumerate(comps, 1):
+        nodes_str = ", ".join(comp)
+        lines.append(f"- C{i} : {nodes_str}")
+    return "\n".join(lines)
+
+
+@command("is-acyclic", Network.is_acyclic,
+         help="Teste si le graphe est acyclique.")
+def _is_acyclic(net, acyclic):
+    if acyclic:
+        if net.directed:
+            return "Le graphe est acyclique (DAG)."
         else:
-            return "Renommage impossible (vérifie les noms)."
+            return "Le graphe est acyclique (forêt, aucun cycle)."
+    else:
+        return "Le graphe contient au moins un cycle."
+
+
+@command("articulation", Network.articulation_points,
+         help="Points d'articulation (Tarjan).")
+def _articulation(net, aps):
+    if not aps:
+        return "Aucun point d'articulation (graphe biconnexe ou vide)."
+    lines = ["Points d'articulation (Tarjan) :"]
+    for n in aps:
+        lines.append(f"- {n}")
+    return "\n".join(lines)
 
-    # reset-network
-    if name == "reset-network":
-        net.reset()
-        return "Topologie réinitialisée."
 
-    # set-directed
-    if name == "set-directed":
-        net.set_directed(True)
-        return "Mode graphe orienté activé."
+@command("bridges", Network.bridges, help="Ponts : liens dont la panne coupe le réseau.")
+def _bridges(net, bridges):
+    if not bridges:
+        return "Aucun pont (graphe 2-arête-connexe ou sans lien)."
+    lines = ["Ponts :"]
+    for u, v in bridges:
+        lines.append(f"- {u} - {v}")
+    return "\n".join(lines)
 
-    # set-undirected
-    if name == "set-undirected":
-        net.set_directed(False)
-        return "Mode graphe non orienté activé."
 
-    # dijkstra
-    if name == "dijkstra":
+def _format_components(title, components):
+    lines = [f"{title} ({len(components)}) :"]
+    for i, comp in enumerate(components, 1):
+        lines.append(f"{i}. {', '.join(map(str, comp))}")
+    return "\n".join(lines)
 
-        if len(args) != 2:
-            return "Usage : dijkstra <src> <dst>"
 
-        src, dst = args
-        path, dist = net.shortest_path_dijkstra(src, dst)
+@command("biconnected", Network.biconnected_components,
+         help="Composantes biconnexes (blocs sans point d'articulation interne).")
+def _biconnected(net, blocks):
+    if not blocks:
+        return "Graphe vide."
+    return _format_components("Composantes biconnexes", blocks)
 
-        if path is None:
-            return f"Aucun chemin trouvé entre {src} et {dst}."
 
-        path_str = " -> ".join(path)
-        return (
-            f"Chemin le plus court (Dijkstra) de {src} à {dst} : {path_str}\n"
-            f"Latence totale = {dist} ms"
+@command("edge-components", Network.edge_components,
+         help="Composantes 2-arête-connexes (séparées par les ponts).")
+def _edge_components(net, comps):
+    if not comps:
+        return "Graphe vide."
+    return _format_components("Composantes 2-arête-connexes", comps)
+
+
+@command("block-cut-tree", Network.block_cut_tree,
+         help="Arbre des blocs : blocs biconnexes reliés par les points d'articulation.")
+def _block_cut_tree(net, tree):
+    if not tree.blocks:
+        return "Graphe vide."
+    lines = [
+        f"Arbre des blocs : {len(tree.blocks)} bloc(s), "
+        f"{len(tree.articulation_points)} point(s) d'articulation, {len(tree.bridges)} pont(s)."
+    ]
+    articulation = set(tree.articulation_points)
+    for i, block in enumerate(tree.blocks):
+        cuts = sorted(str(n) for n in block if n in articulation)
+        lines.append(
+            f"B{i} : {', '.join(sorted(map(str, block)))}"
+            + (f"  <->  {', '.join(cuts)}" if cuts else "")
         )
-    
-    # mst-kruskal
-    if name == "mst-kruskal":
-        edges = net.mst_edges(algo="kruskal")
-        if not edges:
-            return "Aucun arbre couvrant (graphe vide ?)."
-        lines = ["Arbre couvrant minimum (Kruskal) :"]
-        for u, v in edges:
-            w = net.graph[u][v].get("latency", 1)
-            lines.append(f"- {u} -- {v} (latence = {w} ms)")
-        return "\n".join(lines)
-
-    # mst-prim
-    if name == "mst-prim":
-        edges = net.mst_edges(algo="prim")
-        if not edges:
-            return "Aucun arbre couvrant (graphe vide ?)."
-        lines = ["Arbre couvrant minimum (Prim) :"]
-        for u, v in edges:
-            w = net.graph[u][v].get("latency", 1)
-            lines.append(f"- {u} -- {v} (latence = {w} ms)")
-        return "\n".join(lines)
-
-    if name == "scc":
-        comps = net.strongly_connected_components()
-        if not comps:
-            return "Aucune composante (graphe vide)."
-        lines = ["Composantes fortement connexes (Tarjan) :"]
-        for i, comp in enumerate(comps, 1):
-            nodes_str = ", ".join(comp)
-            lines.append(f"- C{i} : {nodes_str}")
-        return "\n".join(lines)
-    
-    # articulation
-    if name == "articulation":
-        aps = net.articulation_points()
-        if not aps:
-            return "Aucun point d'articulation (graphe biconnexe ou vide)."
-        lines = ["Points d'articulation (Tarjan) :"]
-        for n in aps:
-            lines.append(f"- {n}")
-        return "\n".join(lines)
-
-    if name == "is-acyclic":
-        if net.is_acyclic():
-            if net.directed:
-                return "Le graphe est acyclique (DAG)."
-            else:
-                return "Le graphe est acyclique (forêt, aucun cycle)."
+    return "\n".join(lines)
+
+
+def _depends(net, src, dst, node_id):
+    try:
+        return net.depends_on(src, dst, node_id)
+    except KeyError as e:
+        return e
+
+
+@command("depends", _depends, args=[Arg("src"), Arg("dst"), Arg("node")],
+         failed=lambda res: isinstance(res, KeyError),
+         help="Le trafic entre src et dst dépend-il du routeur node ?")
+def _depends_fmt(net, res, src, dst, node_id):
+    if isinstance(res, KeyError):
+        return f"Nœud introuvable : {res.args[0]}"
+    if res is None:
+        return f"Aucun chemin entre {src} et {dst}."
+    if res:
+        return f"Oui : tout chemin entre {src} et {dst} passe par {node_id}."
+    return f"Non : {src} et {dst} restent reliés sans {node_id}."
+
+
+# ---------- Scripts ----------
+
+class ScriptResult(NamedTuple):
+    """Bilan d'un script : succès, nb de commandes exécutées, durée, erreur éventuelle."""
+    ok: bool
+    executed: int
+    elapsed: float
+    line: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def rate(self) -> float:
+        """Débit en commandes par seconde."""
+        return self.executed / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def run_script(net, lines: Iterable[str],
+               echo: Optional[Callable[[str], None]] = None) -> ScriptResult:
+    """
+    Exécute les commandes de `lines` (une par ligne ; lignes vides et
+    commentaires '#' ignorés) sur `net`, et s'arrête à la première erreur.
+    `echo` reçoit la sortie de chaque commande.
+
+    N'annule rien en cas d'erreur : cf. run_script_transaction, ou ne
+    pas sauvegarder `net` (cf. cli.py batch).
+    """
+    start = time.perf_counter()
+    executed = 0
+    for lineno, raw in enumerate(lines, 1):
+        cmd = raw.strip()
+        if not cmd or cmd.startswith("#"):
+            continue
+        if cmd.split()[0] == "run-script":
+            ok, out = False, "run-script imbriqué non supporté."
         else:
-            return "Le graphe contient au moins un cycle."
-    
+            ok, out = execute(net, cmd)
+        if not ok:
+            return ScriptResult(False, executed, time.perf_counter() - start,
+                                lineno, f"{cmd}\n{out}")
+        executed += 1
+        if echo is not None and out:
+            echo(out)
+    return ScriptResult(True, executed, time.perf_counter() - start)
+
+
+def run_script_transaction(net: Network, lines: Iterable[str],
+                           echo: Optional[Callable[[str], None]] = None) -> ScriptResult:
+    """
+    Comme run_script, mais tout ou rien : le script travaille sur une copie
+    du réseau, qui n'est adoptée par `net` que si toutes les commandes ont réussi.
+    """
+    scratch = net.copy()
+    changes = []
+    scratch.subscribe(changes.append)
+    result = run_script(scratch, lines, echo)
+    if result.ok:
+        net.adopt(scratch, changes)
+    return result
+
+
+def format_script_result(res: ScriptResult) -> str:
+    if res.ok:
+        return (
+            f"Script exécuté : {res.executed} commande(s) en {res.elapsed:.3f} s "
+            f"({res.rate:.0f} commandes/s)."
+        )
+    where = f"ligne {res.line}" if res.line is not None else "lecture"
+    return (
+        f"Erreur ({where}) : {res.error}\n"
+        f"Script annulé : aucune modification appliquée."
+    )
+
+
+def _run_script_file(net, path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return run_script_transaction(net, f)
+    except OSError as e:
+        return ScriptResult(False, 0, 0.0, None, f"impossible de lire {path} ({e.strerror})")
+
+
+@command("run-script", _run_script_file, args=[Arg("file")], mutating=True,
+         failed=lambda res: not res.ok,
+         help="Exécute un fichier de commandes en une seule transaction.")
+def _run_script(net, res, path):
+    return format_script_result(res)
+
+
+@command("help", lambda net: None, help="Affiche la liste des commandes.")
+def _help(net, _):
+    return format_help()
+
+
+# =========================
+#   Vues dérivées du registre
+# =========================
 
-    # help
-    if name == "help":
-        return format_help()
+VALID_COMMANDS: List[str] = list(COMMANDS)
 
-    # Commande inconnue + suggestion
+# Commandes qui modifient le réseau : seules celles-ci exigent une sauvegarde
+MUTATING_COMMANDS = frozenset(c.name for c in COMMANDS.values() if c.mutating)
+
+READ_ONLY_COMMANDS = frozenset(VALID_COMMANDS) - MUTATING_COMMANDS
+
+
+def is_mutating(cmd: str) -> bool:
+    """
+    True si la commande `cmd` peut modifier le réseau (et doit donc être
+    suivie d'une sauvegarde). Les commandes inconnues ne modifient rien.
+    """
+    parts = cmd.split()
+    return bool(parts) and parts[0] in MUTATING_COMMANDS
+
+
+def format_help() -> str:
+    lines = ["Commandes disponibles :"]
+    lines.extend(f"  {c.usage}" for c in COMMANDS.values())
+    return "\n".join(lines)
+
+
+def format_rejected(ops: List[list]) -> str:
+    """Avertissement pour les mutations refusées par le serveur d'état (cf. state.save_network)."""
+    lines = [
+        f"Attention : {len(ops)} modification(s) non appliquée(s), le réseau "
+        f"a été modifié entre-temps par un autre client :"
+    ]
+    lines.extend("  " + " ".join(map(str, op)) for op in ops)
+    return "\n".join(lines)
+
+
+def unknown_command(name: str) -> str:
+    """Message pour une commande inconnue, avec suggestion éventuelle."""
     suggestion = difflib.get_close_matches(name, VALID_COMMANDS, n=1, cutoff=0.6)
     if suggestion:
         return f"Commande inconnue : {name}\nDid you mean: {suggestion[0]} ?"
     else:
         return f"Commande inconnue : {name}"
-    
\ No newline at end of file
+
+
+def execute(net: Network, cmd: str) -> Tuple[bool, str]:
+    """
+    Comme handle_command, mais indique aussi si la commande a échoué :
+    commande inconnue, arguments invalides ou modification refusée.
+    Retourne (ok, sortie).
+    """
+    cmd = cmd.strip()
+    if not cmd:
+        return True, ""
+
+    parts = cmd.split()
+    name = parts[0]
+    args = parts[1:]
+
+    command = COMMANDS.get(name)
+    if command is None:
+        return False, unknown_command(name)
+
+    values, error = command.parse(args)
+    if error is not None:
+        return False, error
+    result = command.handler(net, *values)
+    return not command.is_failure(result), "\n".join(command.render(net, result, values))
+
+
+def handle_command(net: Network, cmd: str) -> str:
+    return execute(net, cmd)[1]
@@ -0,0 +1,507 @@
+# compact.py
+"""
+Stockage compact de la topologie (Network(backend="compact"), commande
+backend) : noms des nœuds internés en ids entiers, adjacence en tableaux.
+
+networkx garde un dict par nœud et un dict d'attributs par lien : pour un
+million de liens, plusieurs Go. Ici (même disposition que snapshot.py) :
+
+    names / index : id -> nom, nom -> id (None : nœud supprimé ou renommé)
+    latencies     : array, latence de chaque lien (par id de lien)
+    base CSR      : offsets / targets / edge_ids, en tableaux, par nœud
+    surcouche     : dict par nœud {voisin: id de lien}, pour les liens
+                    ajoutés (ou déplacés par un renommage) depuis la base
+
+Un lien de la base supprimé est seulement marqué (stale) ; pack() repart
+d'une base sans surcouche. L'ordre des nœuds et des voisins reproduit
+exactement celui des dictionnaires networkx après les mêmes mutations
+(ajout en fin, suppression, renommage en place, cf. Network._relabel) :
+list-nodes, list-links et show-node affichent la même chose.
+
+Les opérations de base (lecture, ajout, suppression, latence, renommage)
+travaillent sur ces tableaux, et le routage aussi : CompactView présente
+les lignes succ / pred avec la surface de networkx que lisent les
+recherches de chemins (routing, fib, landmarks, ecmp, kpaths et le Dijkstra
+de networkx), sans rien copier. Pour le reste (analyses, dessin),
+Network.graph reconstruit un graphe networkx à chaque accès (cf. to_graph)
+et ne le garde pas : l'appelant le garde le temps de son calcul.
+"""
+import sys
+from array import array
+from collections.abc import Mapping
+from itertools import accumulate, chain
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import networkx as nx
+
+NETWORKX = "networkx"
+COMPACT = "compact"
+BACKENDS = (NETWORKX, COMPACT)
+
+
+def check_backend(backend: str) -> None:
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend inconnu : {backend} (choix : {', '.join(BACKENDS)}).")
+
+
+def _latency_array(latencies):
+    """Latences en int32, puis int64 ; en liste si elles ne sont pas entières (type conservé)."""
+    for typecode in ("i", "q"):
+        try:
+            return array(typecode, latencies)
+        except (TypeError, OverflowError):
+            pass
+    return list(latencies)
+
+
+def graph_memory(graph) -> int:
+    """Taille approximative (octets) des dicts d'un graphe networkx (nœuds, adjacence, attributs)."""
+    size = sys.getsizeof(graph._node) + sum(sys.getsizeof(d) for d in graph._node.values())
+    size += sum(sys.getsizeof(n) for n in graph._node)
+    tables = (graph._succ, graph._pred) if graph.is_directed() else (graph._adj,)
+    seen = set()
+    for adj in tables:
+        size += sys.getsizeof(adj)
+        for nbrs in adj.values():
+            size += sys.getsizeof(nbrs)
+            for attrs in nbrs.values():
+                if id(attrs) not in seen:
+                    seen.add(id(attrs))
+                    size += sys.getsizeof(attrs)
+    return size
+
+
+class _Rows:
+    """Adjacence (ou prédécesseurs) : base CSR figée + surcouche des ajouts."""
+
+    def __init__(self):
+        self.offsets = array("Q", [0])
+        self.targets = array("I")
+        self.edge_ids = array("I")
+        self.extra: Dict[int, Dict[int, int]] = {}
+
+    @classmethod
+    def build(cls, rows: List[List[Tuple[int, int]]]) -> "_Rows":
+        """Base à partir des (voisin, id de lien) de chaque nœud, dans l'ordre."""
+        self = cls()
+        self.offsets.extend(accumulate(map(len, rows)))
+        entries = list(chain.from_iterable(rows))
+        self.targets = array("I", [t for t, _ in entries])
+        self.edge_ids = array("I", [e for _, e in entries])
+        return self
+
+    def row(self, i: int, stale: Set[int]) -> Iterator[Tuple[int, int]]:
+        """(voisin, id de lien) du nœud i, dans l'ordre networkx."""
+        if i + 1 < len(self.offsets):
+            start, end = self.offsets[i], self.offsets[i + 1]
+            for t, e in zip(self.targets[start:end], self.edge_ids[start:end]):
+                if e not in stale:
+                    yield t, e
+        extra = self.extra.get(i)
+        if extra:
+            yield from list(extra.items())
+
+    def find(self, i: int, j: int, stale: Set[int]) -> Optional[int]:
+        """Id du lien i -> j, ou None (O(degré) dans la base)."""
+        extra = self.extra.get(i)
+        if extra and j in extra:
+            return extra[j]
+        if i + 1 < len(self.offsets):
+            start, end = self.offsets[i], self.offsets[i + 1]
+            for t, e in zip(self.targets[start:end], self.edge_ids[start:end]):
+                if t == j and e not in stale:
+                    return e
+        return None
+
+    def append(self, i: int, j: int, e: int) -> None:
+        self.extra.setdefault(i, {})[j] = e
+
+    def drop(self, i: int, j: int) -> bool:
+        """Retire i -> j de la surcouche ; False s'il est dans la base."""
+        extra = self.extra.get(i)
+        if extra and j in extra:
+            del extra[j]
+            if not extra:
+                del self.extra[i]
+            return True
+        return False
+
+    def memory(self) -> int:
+        return (
+            sum(sys.getsizeof(a) for a in (self.offsets, self.targets, self.edge_ids))
+            + sys.getsizeof(self.extra)
+            + sum(sys.getsizeof(d) for d in self.extra.values())
+        )
+
+
+class _Neighbors(Mapping):
+    """Une table (succ ou pred) lue comme graph._adj : nom -> {voisin: {"latency": ...}}."""
+
+    def __init__(self, compact: "CompactGraph", rows: _Rows):
+        self.compact = compact
+        self.rows = rows
+
+    def __getitem__(self, name) -> Dict[str, dict]:
+        c = self.compact
+        # dicts d'attributs neufs à chaque lecture : la vue n'est pas modifiable
+        return {c.names[j]: {"latency": c.latencies[e]} for j, e in self.rows.row(c.index[name], c.stale)}
+
+    def __contains__(self, name) -> bool:
+        return name in self.compact.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.compact)
+
+    def __len__(self) -> int:
+        return len(self.compact)
+
+
+class CompactView:
+    """
+    CompactGraph en lecture seule, vu comme un graphe networkx par les
+    recherches de chemins : _adj / _succ / _pred, G[u], in, iter, degree,
+    reverse. Les lignes sont lues dans les tableaux à chaque accès : la vue
+    suit les mutations du CompactGraph, et les arbres en cache se réparent
+    dessus comme sur un graphe networkx (cf. routing.RouteCache).
+    """
+
+    def __init__(self, compact: "CompactGraph", reverse: bool = False):
+        self.compact = compact
+        self.reversed = reverse
+        succ, pred = (compact.pred, compact.succ) if reverse else (compact.succ, compact.pred)
+        self._adj = self._succ = self.adj = self.succ = _Neighbors(compact, succ)
+        self._pred = self.pred = _Neighbors(compact, pred) if compact.directed else self._adj
+
+    def is_directed(self) -> bool:
+        return self.compact.directed
+
+    def is_multigraph(self) -> bool:
+        return False
+
+    def reverse(self, copy: bool = True) -> "CompactView":
+        """Vue inversée (comme DiGraph.reverse(copy=False) : rien n'est copié)."""
+        return CompactView(self.compact, not self.reversed)
+
+    def degree(self, name) -> int:
+        return self.compact.degree(name)
+
+    def number_of_nodes(self) -> int:
+        return len(self.compact)
+
+    def __contains__(self, name) -> bool:
+        return name in self.compact.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.compact)
+
+    def __len__(self) -> int:
+        return len(self.compact)
+
+    def __getitem__(self, name) -> Dict[str, dict]:
+        return self._adj[name]
+
+
+class CompactGraph:
+    """Topologie en tableaux ; API de lecture proche de Network (cf. SnapshotView)."""
+
+    def __init__(self, directed: bool = False):
+        self.directed = directed
+        self.names: List[Optional[str]] = []
+        self.index: Dict[str, int] = {}
+        self.latencies = array("i")
+        # liens dont les entrées de la base sont périmées (supprimés, ou
+        # déplacés dans la surcouche par un renommage)
+        self.stale: Set[int] = set()
+        self.n_edges = 0
+        self.succ = _Rows()
+        self.pred = _Rows() if directed else self.succ
+
+    # ---------- Conversions ----------
+
+    @classmethod
+    def _build(cls, directed, names, succ_rows, pred_rows, latencies) -> "CompactGraph":
+        self = cls(directed)
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        self.latencies = _latency_array(latencies)
+        self.n_edges = len(latencies)
+        self.succ = _Rows.build(succ_rows)
+        self.pred = _Rows.build(pred_rows) if directed else self.succ
+        return self
+
+    @classmethod
+    def from_arrays(cls, directed, names, latencies, succ, pred) -> "CompactGraph":
+        """
+        À partir de tableaux déjà au format de la base (cf. snapshot.py) :
+        succ / pred = (offsets, targets, edge_ids), pred None en non orienté.
+        """
+        self = cls(directed)
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        self.latencies = latencies
+        self.n_edges = len(latencies)
+        self.succ = _Rows()
+        self.succ.offsets, self.succ.targets, self.succ.edge_ids = succ
+        if directed:
+            self.pred = _Rows()
+            self.pred.offsets, self.pred.targets, self.pred.edge_ids = pred
+        else:
+            self.pred = self.succ
+        return self
+
+    @classmethod
+    def from_graph(cls, graph) -> "CompactGraph":
+        """Copie compacte d'un graphe networkx (ordre des nœuds et des voisins conservé)."""
+        names = list(graph)
+        index = {name: i for i, name in enumerate(names)}
+        # un id par dict d'attributs, partagé par les deux entrées d'un lien
+        edge_of: Dict[int, int] = {}
+        latencies = []
+        for nbrs in graph._adj.values():
+            for attrs in nbrs.values():
+                if id(attrs) not in edge_of:
+                    edge_of[id(attrs)] = len(latencies)
+                    latencies.append(attrs.get("latency", 1))
+
+        def rows(adj):
+            return [
+                [(index[v], edge_of[id(attrs)]) for v, attrs in adj[name].items()]
+                for name in names
+            ]
+
+        directed = graph.is_directed()
+        return cls._build(
+            directed, names, rows(graph._adj), rows(graph._pred) if directed else None, latencies
+        )
+
+    def to_graph(self):
+        """Graphe networkx équivalent (un dict d'attributs par lien, partagé comme dans networkx)."""
+        graph = nx.DiGraph() if self.directed else nx.Graph()
+        attrs: Dict[int, dict] = {}
+
+        def rows(table):
+            out = {}
+            for i, name in enumerate(self.names):
+                if name is None:
+                    continue
+                row = {}
+                for j, e in table.row(i, self.stale):
+                    data = attrs.get(e)
+                    if data is None:
+                        data = attrs[e] = {"latency": self.latencies[e]}
+                    row[self.names[j]] = data
+                out[name] = row
+            return out
+
+        graph._node.update((name, {}) for name in self.names if name is not None)
+        graph._adj.update(rows(self.succ))
+        if self.directed:
+            graph._pred.update(rows(self.pred))
+        return graph
+
+    def pack(self) -> "CompactGraph":
+        """Même topologie, sans surcouche ni ids morts (nouvelle base CSR)."""
+        alive = [i for i, name in enumerate(self.names) if name is not None]
+        renumber = {i: k for k, i in enumerate(alive)}
+        edge_of: Dict[int, int] = {}
+        latencies = []
+
+        def rows(table):
+            out = []
+            for i in alive:
+                row = []
+                for j, e in table.row(i, self.stale):
+                    if e not in edge_of:
+                        edge_of[e] = len(latencies)
+                        latencies.append(self.latencies[e])
+                    row.append((renumber[j], edge_of[e]))
+                out.append(row)
+            return out
+
+        succ_rows = rows(self.succ)
+        pred_rows = rows(self.pred) if self.directed else None
+        return CompactGraph._build(
+            self.directed, [self.names[i] for i in alive], succ_rows, pred_rows, latencies
+        )
+
+    def copy(self) -> "CompactGraph":
+        return self.pack()
+
+    # ---------- Lecture ----------
+
+    def __contains__(self, name) -> bool:
+        return name in self.index
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name in self.names if name is not None)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def has_edge(self, u, v) -> bool:
+        return self.latency(u, v) is not None
+
+    def latency(self, u, v):
+        """Latence du lien u -> v, ou None s'il n'existe pas."""
+        i, j = self.index.get(u), self.index.get(v)
+        if i is None or j is None:
+            return None
+        e = self.succ.find(i, j, self.stale)
+        return None if e is None else self.latencies[e]
+
+    def neighbors(self, name) -> List[str]:
+        """Voisins (successeurs en orienté), comme graph.neighbors."""
+        return [self.names[j] for j, _ in self.succ.row(self.index[name], self.stale)]
+
+    def degree(self, name) -> int:
+        """Comme graph.degree : une boucle compte deux fois."""
+        i = self.index[name]
+        if self.directed:
+            return sum(1 for _ in self.succ.row(i, self.stale)) + sum(
+                1 for _ in self.pred.row(i, self.stale)
+            )
+        return sum(1 + (j == i) for j, _ in self.succ.row(i, self.stale))
+
+    def edges(self) -> Iterator[Tuple[str, str, dict]]:
+        """(u, v, {"latency": ...}) dans l'ordre de graph.edges(data=True)."""
+        seen = set()
+        for i, u in enumerate(self.names):
+            if u is None:
+                continue
+            for j, e in self.succ.row(i, self.stale):
+                if self.directed or j not in seen:
+                    yield u, self.names[j], {"latency": self.latencies[e]}
+            if not self.directed:
+                seen.add(i)
+
+    def incident(self, name) -> List[Tuple[str, str, object]]:
+        """Liens (u, v, latence) touchant `name` : sortants, puis entrants (orienté)."""
+        i = self.index[name]
+        links = [(name, self.names[j], self.latencies[e]) for j, e in self.succ.row(i, self.stale)]
+        if self.directed:
+            links += [
+                (self.names[j], name, self.latencies[e])
+                for j, e in self.pred.row(i, self.stale)
+                if j != i
+            ]
+        return links
+
+    # ---------- Mutations ----------
+
+    def _set_latency(self, e: int, latency) -> None:
+        """latencies[e] = latency, en élargissant le tableau si besoin (int64, puis liste)."""
+        while True:
+            try:
+                if e == len(self.latencies):
+                    self.latencies.append(latency)
+                else:
+                    self.latencies[e] = latency
+                return
+            except (OverflowError, TypeError):
+                if isinstance(self.latencies, array) and self.latencies.typecode == "i" \
+                        and isinstance(latency, int):
+                    self.latencies = array("q", self.latencies)
+                else:
+                    # latences non entières : une liste garde leur type exact
+                    self.latencies = list(self.latencies)
+
+    def add_node(self, name) -> None:
+        self.index[name] = len(self.names)
+        self.names.append(name)
+
+    def set_link(self, u, v, latency):
+        """Crée ou met à jour u -> v ; retourne l'ancienne latence (None si nouveau lien)."""
+        i, j = self.index[u], self.index[v]
+        e = self.succ.find(i, j, self.stale)
+        if e is not None:
+            old = self.latencies[e]
+            self._set_latency(e, latency)
+            return old
+        e = len(self.latencies)
+        self._set_latency(e, latency)
+        self.succ.append(i, j, e)
+        if self.directed or i != j:
+            self.pred.append(j, i, e)
+        self.n_edges += 1
+        return None
+
+    def remove_link(self, u, v):
+        """Supprime u -> v ; retourne sa latence (None s'il n'existe pas)."""
+        i, j = self.index[u], self.index[v]
+        e = self.succ.find(i, j, self.stale)
+        if e is None:
+            return None
+        self._unlink(i, j, e)
+        self.n_edges -= 1
+        return self.latencies[e]
+
+    def _unlink(self, i: int, j: int, e: int) -> None:
+        in_extra = self.succ.drop(i, j)
+        if self.directed or i != j:
+            in_extra = self.pred.drop(j, i) and in_extra
+        if not in_extra:
+            self.stale.add(e)
+
+    def remove_node(self, name) -> None:
+        i = self.index.pop(name)
+        for j, e in list(self.succ.row(i, self.stale)):
+            self._unlink(i, j, e)
+            self.n_edges -= 1
+        if self.directed:
+            for j, e in list(self.pred.row(i, self.stale)):
+                self._unlink(j, i, e)
+                self.n_edges -= 1
+        self.names[i] = None
+
+    def rename_node(self, old, new) -> None:
+        """
+        Comme Network._relabel : le nœud passe en dernier, et chez chacun de
+        ses voisins l'entrée vers lui passe en fin de ligne.
+        """
+        i = self.index.pop(old)
+        k = len(self.names)
+        self.names.append(new)
+        self.index[new] = k
+        tables = ((self.succ, self.pred), (self.pred, self.succ)) if self.directed \
+            else ((self.succ, self.succ),)
+        rows = [list(own.row(i, self.stale)) for own, _ in tables]
+        for (own, other), row in zip(tables, rows):
+            for j, e in row:
+                if j != i and not other.drop(j, i):
+                    self.stale.add(e)
+        for own, _ in tables:
+            own.extra.pop(i, None)
+        for (own, other), row in zip(tables, rows):
+            # boucle sur le nœud lui-même : en fin de ligne, comme dans networkx
+            for j, e in [(j, e) for j, e in row if j != i] + [(j, e) for j, e in row if j == i]:
+                if j == i:
+                    own.append(k, k, e)
+                else:
+                    own.append(k, j, e)
+                    other.append(j, k, e)
+        self.names[i] = None
+
+    # ---------- Mémoire ----------
+
+    def memory(self) -> int:
+        """Taille approximative (octets) des tableaux, des noms et de la surcouche."""
+        size = (
+            sys.getsizeof(self.names)
+            + sys.getsizeof(self.index)
+            + sum(sys.getsizeof(n) for n in self.index)
+            + sys.getsizeof(self.latencies)
+            + sys.getsizeof(self.stale)
+            + self.succ.memory()
+        )
+        if self.directed:
+            size += self.pred.memory()
+        return size
+
+    def stats(self) -> dict:
+        return {
+            "nodes": len(self.index),
+            "links": self.n_edges,
+            "overlay_nodes": len(self.succ.extra),
+            "stale_links": len(self.stale),
+            "memory_bytes": self.memory(),
+        }
@@ -0,0 +1,227 @@
+# ecmp.py
+"""
+Routage multi-chemins à coût égal (ECMP) sur la latence : tous les plus
+courts chemins de src à dst, et choix d'un chemin par hachage de flux
+(commande ecmp, Network.ecmp_route).
+
+Une recherche de Dijkstra depuis src donne le graphe des plus courts
+chemins : chaque nœud garde tous ses prédécesseurs à égalité de distance
+(arcs « serrés »). Les plus courts chemins de src à dst sont les chemins
+simples de ce graphe, comme pour nx.all_shortest_paths.
+
+Sans lien de latence 0, ce graphe est un DAG : le nombre de chemins vers
+dst se compte par programmation dynamique, sans les énumérer (il peut être
+exponentiel, ex. fabrics leaf-spine à plusieurs étages). Les liens de
+latence 0 peuvent former des cycles entre nœuds à la même distance : ces
+composantes fortement connexes sont regroupées (leur graphe quotient est
+un DAG), et les chemins simples ne sont énumérés qu'à l'intérieur de
+chacune (exponentiel en sa taille seulement : quelques nœuds en pratique,
+ex. une pile de commutateurs). L'énumération des chemins est paresseuse
+et s'arrête quand on veut.
+
+Hachage : comme un routeur, chaque nœud traversé choisit son prochain saut
+parmi ses successeurs à coût égal vers dst, selon un hachage stable
+(CRC32) de l'identifiant de flux et du nœud. Un même flux suit donc
+toujours le même chemin ; des flux différents se répartissent.
+"""
+import zlib
+from itertools import groupby
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set
+
+import networkx as nx
+
+from routing import Route
+
+
+class ShortestPathDAG(NamedTuple):
+    """
+    Plus courts chemins depuis `source` : distance, tous les prédécesseurs à
+    égalité, et composante (liens de latence 0) de chaque nœud, numérotée
+    dans un ordre topologique du graphe quotient.
+    """
+    source: str
+    dist: Dict[str, float]
+    preds: Dict[str, List[str]]
+    component: Dict[str, int]
+
+    def count_paths(self, dst) -> int:
+        """Nombre de plus courts chemins de source à dst (0 si injoignable)."""
+        if dst not in self.dist:
+            return 0
+        preds, component = self.preds, self.component
+        # chemins simples de source à chaque nœud
+        counts: Dict[str, int] = {}
+        on_path = sorted(self._ancestors(dst), key=component.__getitem__)
+        # composante par composante, dans l'ordre topologique : les
+        # prédécesseurs hors de la composante sont comptés avant
+        for _c, group in groupby(on_path, key=component.__getitem__):
+            members = list(group)
+            if len(members) == 1:
+                node = members[0]
+                counts[node] = 1 if node == self.source else sum(counts[p] for p in preds[node])
+                continue
+            inside = set(members)
+            for node in members:
+                counts[node] = 0
+            for entry in members:
+                # un chemin simple ne revient pas à la source : 1 chemin, rien avant
+                ways = 1 if entry == self.source else sum(
+                    counts[p] for p in preds[entry] if p not in inside
+                )
+                if ways:
+                    for node, n in self._paths_within(inside, entry).items():
+                        counts[node] += ways * n
+        return counts[dst]
+
+    def _paths_within(self, inside: Set, entry) -> Dict[str, int]:
+        """Nombre de chemins simples de `entry` à chaque nœud de `inside` (arcs serrés internes)."""
+        succ: Dict[str, List[str]] = {}
+        for node in inside:
+            for p in self.preds[node]:
+                if p in inside:
+                    succ.setdefault(p, []).append(node)
+        found = {node: 0 for node in inside}
+        found[entry] = 1
+        visited = {entry}
+        stack = [[entry, 0]]
+        while stack:
+            node, i = stack[-1]
+            hops = succ.get(node, ())
+            if i == len(hops):
+                visited.discard(node)
+                stack.pop()
+                continue
+            stack[-1][1] += 1
+            nxt = hops[i]
+            if nxt not in visited:
+                visited.add(nxt)
+                found[nxt] += 1
+                stack.append([nxt, 0])
+        return found
+
+    def _ancestors(self, dst) -> set:
+        """Nœuds situés sur au moins un plus court chemin de source à dst."""
+        seen = {dst}
+        stack = [dst]
+        while stack:
+            node = stack.pop()
+            if node == self.source:
+                # un chemin simple ne repasse pas par la source
+                continue
+            for p in self.preds[node]:
+                if p not in seen:
+                    seen.add(p)
+                    stack.append(p)
+        return seen
+
+    def iter_paths(self, dst) -> Iterator[List[str]]:
+        """Plus courts chemins de source à dst, un à un (parcours en profondeur, chemins simples)."""
+        if dst not in self.dist:
+            return
+        # pile de (nœud, index du prochain prédécesseur à essayer), de dst vers source
+        stack = [[dst, 0]]
+        on_stack = {dst}
+        while stack:
+            node, i = stack[-1]
+            if node == self.source:
+                yield [n for n, _ in reversed(stack)]
+                on_stack.discard(node)
+                stack.pop()
+                continue
+            preds = self.preds[node]
+            if i == len(preds):
+                on_stack.discard(node)
+                stack.pop()
+                continue
+            stack[-1][1] += 1
+            p = preds[i]
+            if p not in on_stack:
+                on_stack.add(p)
+                stack.append([p, 0])
+
+    def flow_path(self, dst, flow) -> Optional[List[str]]:
+        """Chemin suivi par le flux `flow` : prochain saut choisi par hachage à chaque nœud."""
+        if dst not in self.dist:
+            return None
+        on_path = self._ancestors(dst)
+        # successeurs à coût égal vers dst, dans l'ordre (stable) des prédécesseurs
+        next_hops: Dict[str, List[str]] = {}
+        for node in on_path:
+            for p in self.preds[node]:
+                if p in on_path:
+                    next_hops.setdefault(p, []).append(node)
+        path = [self.source]
+        visited = {self.source}
+        while path[-1] != dst:
+            node = path[-1]
+            hops = [
+                v for v in sorted(next_hops[node])
+                if v not in visited and self._can_finish(v, dst, visited, next_hops)
+            ]
+            nxt = hops[flow_hash(flow, node) % len(hops)]
+            path.append(nxt)
+            visited.add(nxt)
+        return path
+
+    def _can_finish(self, node, dst, visited: Set, next_hops: Dict) -> bool:
+        """
+        True si un chemin simple mène de `node` à dst sans repasser par
+        `visited`. Seule la composante de `node` est parcourue : les nœuds
+        déjà visités sont dans les composantes précédentes ou dans celle-ci,
+        et toute sortie de la composante mène à dst.
+        """
+        component = self.component
+        c = component[node]
+        seen = {node}
+        stack = [node]
+        while stack:
+            x = stack.pop()
+            if x == dst:
+                return True
+            for y in next_hops.get(x, ()):
+                if component[y] != c:
+                    return True
+                if y not in seen and y not in visited:
+                    seen.add(y)
+                    stack.append(y)
+        return False
+
+    def route(self, path: List[str]) -> Route:
+        return Route(path, self.dist[path[-1]], len(path) - 1)
+
+
+def flow_hash(flow, node) -> int:
+    """Hachage stable (indépendant du processus) d'un flux en un nœud."""
+    return zlib.crc32(f"{flow}|{node}".encode())
+
+
+def _components(dist: Dict, preds: Dict) -> Dict[str, int]:
+    """
+    Numéro de composante de chaque nœud atteint, dans un ordre topologique :
+    les arcs serrés de latence 0 (entre nœuds à la même distance) sont les
+    seuls qui peuvent former des cycles ; leurs composantes fortement
+    connexes sont regroupées, les autres nœuds restent seuls.
+    """
+    zero = nx.DiGraph()
+    zero.add_edges_from((p, n) for n, ps in preds.items() for p in ps if dist[p] == dist[n])
+    quotient = nx.condensation(zero)
+    group = quotient.graph["mapping"]
+    rank = {c: i for i, c in enumerate(nx.topological_sort(quotient))}
+    # par distance croissante, puis dans l'ordre topologique des arcs de latence 0
+    order = sorted(dist, key=lambda n: (dist[n], rank[group[n]] if n in group else -1))
+    component: Dict[str, int] = {}
+    i = -1
+    previous = None
+    for node in order:
+        key = ("scc", group[node]) if node in group else ("node", node)
+        if key != previous:
+            i += 1
+            previous = key
+        component[node] = i
+    return component
+
+
+def shortest_path_dag(graph, src) -> ShortestPathDAG:
+    """Plus courts chemins en latence depuis `src` (une recherche)."""
+    preds, dist = nx.dijkstra_predecessor_and_distance(graph, src, weight="latency")
+    return ShortestPathDAG(src, dist, preds, _components(dist, preds))
@@ -0,0 +1,221 @@
+# failures.py
+"""
+Impact de la panne de chaque lien et de chaque nœud (commande failure-scan,
+surlignage sur la page Analyse) : paires (source, destination) qui perdent
+toute route, et hausse de latence moyenne / maximale des autres.
+
+Pour chaque source, l'arbre des plus courts chemins (cf. routing) dit quels
+éléments comptent : un lien ou un nœud hors de l'arbre ne change aucune
+distance depuis cette source. Pour un élément de l'arbre, seules les
+destinations de son sous-arbre peuvent s'éloigner : elles repartent de leur
+meilleur voisin hors du sous-arbre, puis Dijkstra entre elles seulement.
+
+Les sources sont réparties sur un pool de processus (même schéma que
+allpairs.py) ; les totaux par élément sont additionnés à la fin.
+"""
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from routing import LATENCY, shortest_path_tree
+
+INF = float("inf")
+
+LINK = "link"
+NODE = "node"
+KINDS = (LINK, NODE)
+
+
+class FailureImpact(NamedTuple):
+    """Effet de la panne d'un élément (lien (u, v) ou nœud) sur les paires restantes."""
+    kind: str
+    element: object
+    lost_pairs: int
+    degraded_pairs: int
+    # hausse moyenne sur les paires encore joignables (ms), hausse maximale (ms)
+    avg_increase: float
+    worst_increase: float
+
+
+# totaux d'un élément : [paires perdues, paires dégradées, somme des hausses, hausse max]
+_Totals = List[float]
+
+_worker_graph = None
+
+
+def _init_worker(graph):
+    global _worker_graph
+    _worker_graph = graph
+
+
+def _link_key(directed: bool, u, v) -> tuple:
+    return (u, v) if directed or str(u) <= str(v) else (v, u)
+
+
+def _detour(graph, dist, subtree: Set, banned_node=None, banned_arc=None) -> Dict:
+    """
+    Nouvelles distances des nœuds de `subtree` sans l'élément en panne
+    (les autres ne bougent pas : une panne n'allonge que les chemins).
+    Un nœud absent du résultat n'est plus joignable.
+    """
+    adj = graph._adj
+    into = graph._pred if graph.is_directed() else adj
+
+    def usable(z, x):
+        if z == banned_node or x == banned_node:
+            return False
+        if banned_arc is not None:
+            a, b = banned_arc
+            if (z, x) == (a, b) or (not graph.is_directed() and (z, x) == (b, a)):
+                return False
+        return True
+
+    new: Dict = {}
+    heap = []
+    for x in subtree:
+        if x == banned_node:
+            continue
+        best = INF
+        for z, data in into[x].items():
+            if z not in subtree and z in dist and usable(z, x):
+                best = min(best, dist[z] + data.get("latency", 1))
+        if best < INF:
+            new[x] = best
+            heapq.heappush(heap, (best, x))
+    while heap:
+        d, x = heapq.heappop(heap)
+        if d > new[x]:
+            continue
+        for y, data in adj[x].items():
+            if y in subtree and y != banned_node and usable(x, y):
+                nd = d + data.get("latency", 1)
+                if nd < new.get(y, INF):
+                    new[y] = nd
+                    heapq.heappush(heap, (nd, y))
+    return new
+
+
+def _add(totals: Dict, key, dist, subtree: Set, new: Dict, skip=None) -> None:
+    t = totals.setdefault(key, [0, 0, 0.0, 0.0])
+    for x in subtree:
+        if x == skip:
+            continue
+        if x not in new:
+            t[0] += 1
+        elif new[x] > dist[x]:
+            increase = new[x] - dist[x]
+            t[1] += 1
+            t[2] += increase
+            t[3] = max(t[3], increase)
+
+
+def _scan_sources(sources: List) -> Tuple[Dict, Dict, int, Dict]:
+    """
+    Pour chaque source : totaux par lien et par nœud, nombre de paires
+    joignables, et nombre de paires joignables par nœud extrémité.
+    """
+    graph = _worker_graph
+    directed = graph.is_directed()
+    links: Dict = {}
+    nodes: Dict = {}
+    pairs = 0
+    endpoint: Dict = {}
+    for src in sources:
+        # arbre sans cycle même sur des liens de latence 0 (prédécesseurs fixés
+        # avant chaque nœud) : les sous-arbres ci-dessous sont bien séparés
+        tree = shortest_path_tree(graph, src, LATENCY)
+        dist, pred = tree.dist, tree.pred
+        children: Dict = {}
+        for x, p in pred.items():
+            if p is not None:
+                children.setdefault(p, []).append(x)
+        reached = len(dist) - 1
+        pairs += reached
+        endpoint[src] = endpoint.get(src, 0) + reached
+        for x in dist:
+            if x != src:
+                endpoint[x] = endpoint.get(x, 0) + 1
+
+        def subtree_of(root):
+            seen = {root}
+            stack = [root]
+            while stack:
+                for c in children.get(stack.pop(), ()):
+                    seen.add(c)
+                    stack.append(c)
+            return seen
+
+        for x, p in pred.items():
+            if p is None:
+                continue
+            # panne du lien p -> x : le sous-arbre de x
+            sub = subtree_of(x)
+            new = _detour(graph, dist, sub, banned_arc=(p, x))
+            _add(links, _link_key(directed, p, x), dist, sub, new)
+        for x in children:
+            if x == src:
+                continue
+            # panne du nœud x : ses descendants (les paires avec x lui-même sont exclues)
+            sub = subtree_of(x)
+            new = _detour(graph, dist, sub, banned_node=x)
+            _add(nodes, x, dist, sub, new, skip=x)
+    return links, nodes, pairs, endpoint
+
+
+def _merge(into: Dict, part: Dict) -> None:
+    for key, (lost, degraded, total, worst) in part.items():
+        t = into.setdefault(key, [0, 0, 0.0, 0.0])
+        t[0] += lost
+        t[1] += degraded
+        t[2] += total
+        t[3] = max(t[3], worst)
+
+
+def failure_scan(graph, workers: Optional[int] = None) -> List[FailureImpact]:
+    """
+    Impact de la panne de chaque lien et de chaque nœud de `graph`, du plus
+    grave au moins grave (paires perdues, puis hausse maximale, puis moyenne).
+    `workers` : nombre de processus (défaut : nombre de CPU).
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    sources = list(graph)
+    links: Dict = {}
+    nodes: Dict = {}
+    pairs = 0
+    endpoint: Dict = {}
+    if workers <= 1 or len(sources) < 2 * workers:
+        _init_worker(graph)
+        try:
+            parts = [_scan_sources(sources)]
+        finally:
+            _init_worker(None)
+    else:
+        size = max(1, len(sources) // (4 * workers))
+        chunks = [sources[i:i + size] for i in range(0, len(sources), size)]
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(graph,)) as pool:
+            parts = list(pool.map(_scan_sources, chunks))
+    for part_links, part_nodes, part_pairs, part_endpoint in parts:
+        _merge(links, part_links)
+        _merge(nodes, part_nodes)
+        pairs += part_pairs
+        for node, n in part_endpoint.items():
+            endpoint[node] = endpoint.get(node, 0) + n
+
+    directed = graph.is_directed()
+    report = []
+    for u, v in graph.edges():
+        lost, degraded, total, worst = links.get(_link_key(directed, u, v), (0, 0, 0.0, 0.0))
+        remaining = pairs - lost
+        report.append(FailureImpact(
+            LINK, (u, v), lost, degraded, total / remaining if remaining else 0.0, worst
+        ))
+    for node in graph:
+        lost, degraded, total, worst = nodes.get(node, (0, 0, 0.0, 0.0))
+        remaining = pairs - endpoint.get(node, 0) - lost
+        report.append(FailureImpact(
+            NODE, node, lost, degraded, total / remaining if remaining else 0.0, worst
+        ))
+    report.sort(key=lambda r: (-r.lost_pairs, -r.worst_increase, -r.avg_increase))
+    return report
@@ -0,0 +1,234 @@
+# fib.py
+"""
+Tables de routage par nœud (FIB : destination -> prochain saut) sur la
+latence, et acheminement « comme un routeur » : chaque nœud ne regarde que
+sa table (commande show-route, simulate-ping --algorithm fib).
+
+Construction : une recherche de Dijkstra par destination, sur le graphe
+inversé (les prédécesseurs en orienté), remplit d'un coup la colonne de
+cette destination dans les tables de tous les nœuds : le prochain saut de v
+vers t est son successeur dans l'arbre des plus courts chemins vers t.
+Les nœuds sont numérotés (self.index) ; chaque colonne est un array('i')
+de prochains sauts (-1 : pas de route) et un array('d') de distances.
+
+Mise à jour : les tables correspondent à une version du réseau. Au
+rafraîchissement, les changements survenus depuis (Network.changes_since)
+désignent les seules colonnes à recalculer ; un ajout de nœud ajoute une
+ligne et une colonne, un renommage ne change que l'index. Si l'historique
+ne suffit pas, ou pour une suppression de nœud, tout est reconstruit.
+"""
+import heapq
+import sys
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Set
+
+from changes import (
+    LATENCY_CHANGED,
+    LINK_ADDED,
+    LINK_REMOVED,
+    LINKS_ADDED,
+    NODE_ADDED,
+    NODE_RENAMED,
+    NODES_ADDED,
+    Change,
+)
+from routing import Route
+
+INF = float("inf")
+NO_ROUTE = -1
+
+
+class ForwardingTables:
+    """Prochain saut de chaque nœud vers chaque destination, pour `version` du réseau."""
+
+    def __init__(self):
+        self.nodes: List[str] = []
+        self.index: Dict[str, int] = {}
+        # par destination t : next_hop[t][v] et dist[t][v] (d(v, t))
+        self.next_hop: List[array] = []
+        self.dist: List[array] = []
+        self.directed = False
+        self.version: Optional[int] = None
+        self.build_time = 0.0
+        self.rebuilt_columns = 0
+
+    # ---------- Construction ----------
+
+    def build(self, graph, version: int) -> None:
+        """Recalcule toutes les tables (une recherche par destination)."""
+        start = time.perf_counter()
+        self.nodes = list(graph)
+        self.index = {n: i for i, n in enumerate(self.nodes)}
+        self.directed = graph.is_directed()
+        self.next_hop, self.dist = [], []
+        into = self._into(graph)
+        for t in range(len(self.nodes)):
+            hops, dist = self._column(into, t)
+            self.next_hop.append(hops)
+            self.dist.append(dist)
+        self.rebuilt_columns = len(self.nodes)
+        self.version = version
+        self.build_time = time.perf_counter() - start
+
+    def _into(self, graph) -> List[List[tuple]]:
+        """Arcs entrants (u, latence) de chaque nœud, en numéros : partagé par toutes les colonnes."""
+        index = self.index
+        adj = graph._pred if self.directed else graph._adj
+        return [
+            [(index[u], data.get("latency", 1)) for u, data in adj[node].items()]
+            for node in self.nodes
+        ]
+
+    def _column(self, into: List[List[tuple]], t: int):
+        """Dijkstra depuis t sur les arcs inversés : prochain saut et distance de chaque nœud vers t."""
+        n = len(self.nodes)
+        hops = array("i", [NO_ROUTE]) * n
+        dist = array("d", [INF]) * n
+        dist[t] = 0
+        hops[t] = t
+        heap = [(0, t)]
+        while heap:
+            d, v = heapq.heappop(heap)
+            if d > dist[v]:
+                continue
+            for u, latency in into[v]:
+                nd = d + latency
+                if nd < dist[u]:
+                    dist[u] = nd
+                    hops[u] = v
+                    heapq.heappush(heap, (nd, u))
+        return hops, dist
+
+    # ---------- Mise à jour ----------
+
+    def refresh(self, graph, version: int, changes: Optional[List[Change]]) -> None:
+        """
+        Met les tables à la `version` du réseau ; `changes` : changements depuis
+        self.version (cf. Network.changes_since), None s'ils sont inconnus.
+        """
+        if version == self.version:
+            return
+        stale = self._stale_columns(changes) if self.version is not None else None
+        if stale is None or graph.is_directed() != self.directed:
+            self.build(graph, version)
+            return
+        start = time.perf_counter()
+        new = [n for n in graph if n not in self.index]
+        for node in new:
+            self.index[node] = len(self.nodes)
+            self.nodes.append(node)
+        if new:
+            for hops, dist in zip(self.next_hop, self.dist):
+                hops.extend([NO_ROUTE] * len(new))
+                dist.extend([INF] * len(new))
+            # colonnes vides, remplies ci-dessous
+            for _ in new:
+                self.next_hop.append(array("i"))
+                self.dist.append(array("d"))
+            stale |= {self.index[n] for n in new}
+        if stale:
+            into = self._into(graph)
+            for t in stale:
+                self.next_hop[t], self.dist[t] = self._column(into, t)
+        self.rebuilt_columns = len(stale)
+        self.version = version
+        self.build_time = time.perf_counter() - start
+
+    def _stale_columns(self, changes: Optional[List[Change]]) -> Optional[Set[int]]:
+        """Destinations dont les routes peuvent changer ; None : tout reconstruire."""
+        if changes is None:
+            return None
+        stale: Set[int] = set()
+        for change in changes:
+            kind, data = change.kind, change.data
+            if kind in (NODE_ADDED, NODES_ADDED):
+                # nœuds isolés : aucune route existante ne change
+                continue
+            if kind == NODE_RENAMED:
+                # mêmes routes : seul le nom change (les changements suivants l'utilisent)
+                i = self.index.pop(data["old"])
+                self.index[data["new"]] = i
+                self.nodes[i] = data["new"]
+                continue
+            if kind == LINK_ADDED:
+                arcs = [(data["u"], data["v"], data["latency"], None)]
+            elif kind == LINK_REMOVED:
+                arcs = [(data["u"], data["v"], INF, data["latency"])]
+            elif kind == LATENCY_CHANGED:
+                arcs = [(data["u"], data["v"], data["new"], data["old"])]
+            elif kind == LINKS_ADDED:
+                arcs = [(u, v, lat, None) for u, v, lat in data["links"]]
+                arcs += [(u, v, new, old) for u, v, old, new in data["updated"]]
+            else:
+                return None
+            for u, v, new, old in arcs:
+                stale |= self._affected(u, v, new, old)
+                if not self.directed:
+                    stale |= self._affected(v, u, new, old)
+        return stale
+
+    def _affected(self, u, v, new, old) -> Set[int]:
+        """Colonnes touchées par l'arc u -> v passé de `old` (None : absent) à `new` (INF : supprimé)."""
+        i, j = self.index.get(u), self.index.get(v)
+        if j is None:
+            # v ajouté depuis : il ne rapproche u d'une destination que par
+            # ses propres arcs sortants, traités comme ceux d'un nouveau nœud
+            return set()
+        if i is None:
+            # u ajouté depuis : sa ligne est à remplir partout où v a une route
+            return {t for t, dist in enumerate(self.dist) if dist[j] != INF}
+        stale = set()
+        for t, (hops, dist) in enumerate(zip(self.next_hop, self.dist)):
+            if old is not None and new > old and hops[i] == j:
+                # arc allongé ou supprimé, emprunté par la route de u vers t
+                stale.add(t)
+            elif (old is None or new < old) and dist[j] + new < dist[i]:
+                # arc nouveau ou raccourci, qui rapproche u de t
+                stale.add(t)
+        return stale
+
+    # ---------- Acheminement ----------
+
+    def table(self, node) -> Iterable[tuple]:
+        """(destination, prochain saut, latence) pour chaque destination joignable depuis `node`."""
+        i = self.index[node]
+        for t, (hops, dist) in enumerate(zip(self.next_hop, self.dist)):
+            if t != i and hops[i] != NO_ROUTE:
+                yield self.nodes[t], self.nodes[hops[i]], dist[i]
+
+    def forward(self, graph, src, dst) -> Optional[Route]:
+        """
+        Achemine un paquet de src à dst, saut par saut, d'après la table de
+        chaque nœud traversé (O(nombre de sauts)). None si pas de route.
+        """
+        i, t = self.index[src], self.index[dst]
+        hops = self.next_hop[t]
+        if hops[i] == NO_ROUTE:
+            return None
+        path = [src]
+        latency = 0
+        # TTL : une table cohérente ne boucle jamais, mais un paquet ne tourne pas indéfiniment
+        for _ttl in range(len(self.nodes)):
+            if i == t:
+                return Route(path, latency, len(path) - 1)
+            j = hops[i]
+            latency += graph._adj[self.nodes[i]][self.nodes[j]].get("latency", 1)
+            path.append(self.nodes[j])
+            i = j
+        return None
+
+    def memory(self) -> int:
+        """Taille approximative (octets) des colonnes et de l'index."""
+        return sys.getsizeof(self.index) + sum(
+            sys.getsizeof(a) for a in (*self.next_hop, *self.dist)
+        )
+
+    def stats(self) -> dict:
+        return {
+            "nodes": len(self.nodes),
+            "version": self.version,
+            "build_time": self.build_time,
+            "rebuilt_columns": self.rebuilt_columns,
+            "memory_bytes": self.memory(),
+        }
@@ -0,0 +1,335 @@
+# hierarchy.py
+"""
+Hiérarchies de contraction (CH) sur la latence, pour des requêtes point à
+point très rapides sur une topologie qui change peu.
+
+Prétraitement : les nœuds sont « contractés » un par un, du moins important
+au plus important (différence d'arêtes : raccourcis créés - arcs supprimés,
+réévaluée paresseusement). Contracter v ajoute un raccourci u -> w de
+latence d(u, v) + d(v, w) sauf si une recherche locale (« témoin ») trouve
+un chemin au moins aussi court qui évite v. Chaque arc est ensuite rangé
+côté nœud de plus faible rang : graphe montant avant (u -> w) et arrière
+(w <- u).
+
+Requête : Dijkstra bidirectionnel qui ne fait que monter dans la hiérarchie,
+puis dépliage récursif des raccourcis (chaque raccourci mémorise le nœud
+contourné).
+
+La hiérarchie correspond à une version du réseau (Network.version) : dès
+que la topologie change, Network.route revient à Dijkstra jusqu'à la
+prochaine construction (commande contract).
+"""
+import heapq
+import pickle
+import sys
+import time
+from array import array
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from routing import Route
+
+INF = float("inf")
+
+# Nœuds traités au plus par une recherche de témoin (au-delà : raccourci ajouté,
+# ce qui reste correct, simplement moins économe)
+WITNESS_SETTLE_LIMIT = 60
+
+# Format du fichier (cf. dump / load), après l'en-tête `stamp` picklé à part
+FORMAT_VERSION = 1
+
+
+class _Upward:
+    """Arcs montants au format CSR : arcs de u = [offsets[u], offsets[u + 1])."""
+
+    def __init__(self, offsets: array, targets: array, weights: array, middles: array):
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        # nœud contourné par le raccourci, -1 pour un lien d'origine
+        self.middles = middles
+
+    @classmethod
+    def build(cls, arcs: List[List[Tuple[int, float, int]]]) -> "_Upward":
+        offsets = array("q", [0])
+        targets, weights, middles = array("l"), array("d"), array("l")
+        for row in arcs:
+            for target, weight, middle in row:
+                targets.append(target)
+                weights.append(weight)
+                middles.append(middle)
+            offsets.append(len(targets))
+        return cls(offsets, targets, weights, middles)
+
+    def state(self) -> tuple:
+        return self.offsets, self.targets, self.weights, self.middles
+
+    def memory(self) -> int:
+        return sum(sys.getsizeof(a) for a in self.state())
+
+
+class ContractionHierarchy:
+    """Hiérarchie prête à interroger, valable pour `version` du réseau."""
+
+    def __init__(self, nodes: List[str], forward: _Upward, backward: _Upward,
+                 version: int, build_time: float = 0.0, shortcuts: int = 0):
+        self.nodes = nodes
+        self.index: Dict[str, int] = {n: i for i, n in enumerate(nodes)}
+        self.forward = forward
+        self.backward = backward
+        self.version = version
+        self.build_time = build_time
+        self.shortcuts = shortcuts
+        # True tant que la hiérarchie n'a pas été écrite sur disque (cf. state.py)
+        self.dirty = False
+        # arc (u, w) -> nœud contourné, pour le dépliage (construit à la demande)
+        self._middles: Optional[Dict[Tuple[int, int], int]] = None
+
+    # ---------- Construction ----------
+
+    @classmethod
+    def build(cls, graph, version: int) -> "ContractionHierarchy":
+        start = time.perf_counter()
+        nodes = list(graph)
+        index = {n: i for i, n in enumerate(nodes)}
+        n = len(nodes)
+
+        # graphe restant (nœuds pas encore contractés) : arcs sortants / entrants
+        out: List[Dict[int, float]] = [{} for _ in range(n)]
+        inn: List[Dict[int, float]] = [{} for _ in range(n)]
+        middle: Dict[Tuple[int, int], int] = {}
+        directed = graph.is_directed()
+        for u, v, latency in graph.edges(data="latency", default=1):
+            a, b = index[u], index[v]
+            if a == b:
+                continue
+            pairs = ((a, b),) if directed else ((a, b), (b, a))
+            for x, y in pairs:
+                if latency < out[x].get(y, INF):
+                    out[x][y] = latency
+                    inn[y][x] = latency
+
+        contracted = [False] * n
+        # voisins déjà contractés (terme d'uniformité de la priorité)
+        deleted = [0] * n
+        fwd_arcs: List[List[Tuple[int, float, int]]] = [[] for _ in range(n)]
+        bwd_arcs: List[List[Tuple[int, float, int]]] = [[] for _ in range(n)]
+
+        def witness(source, excluded, limit):
+            """Distances depuis source sans passer par `excluded`, jusqu'à `limit`."""
+            dist = {source: 0}
+            heap = [(0, source)]
+            settled = 0
+            while heap and settled < WITNESS_SETTLE_LIMIT:
+                d, x = heapq.heappop(heap)
+                if d > dist[x]:
+                    continue
+                if d > limit:
+                    break
+                settled += 1
+                for y, w in out[x].items():
+                    if y == excluded:
+                        continue
+                    nd = d + w
+                    if nd < dist.get(y, INF):
+                        dist[y] = nd
+                        heapq.heappush(heap, (nd, y))
+            return dist
+
+        def shortcuts_for(v):
+            """Raccourcis (u, w, latence) nécessaires pour contracter v."""
+            needed = []
+            targets = out[v]
+            if not targets:
+                return needed
+            max_out = max(targets.values())
+            for u, w_uv in inn[v].items():
+                dist = witness(u, v, w_uv + max_out)
+                for w, w_vw in targets.items():
+                    if w == u:
+                        continue
+                    via = w_uv + w_vw
+                    if dist.get(w, INF) > via:
+                        needed.append((u, w, via))
+            return needed
+
+        def priority(v):
+            return len(shortcuts_for(v)) - len(out[v]) - len(inn[v]) + deleted[v]
+
+        heap = [(priority(v), v) for v in range(n)]
+        heapq.heapify(heap)
+        n_shortcuts = 0
+        while heap:
+            _p, v = heapq.heappop(heap)
+            if contracted[v]:
+                continue
+            # mise à jour paresseuse : v reste le moins important ?
+            p = priority(v)
+            if heap and p > heap[0][0]:
+                heapq.heappush(heap, (p, v))
+                continue
+
+            for u, w, via in shortcuts_for(v):
+                if via < out[u].get(w, INF):
+                    out[u][w] = via
+                    inn[w][u] = via
+                    middle[(u, w)] = v
+                    n_shortcuts += 1
+
+            # arcs restants de v : tous vers des nœuds de rang supérieur
+            for w, weight in out[v].items():
+                fwd_arcs[v].append((w, weight, middle.get((v, w), -1)))
+                del inn[w][v]
+                deleted[w] += 1
+            for u, weight in inn[v].items():
+                bwd_arcs[v].append((u, weight, middle.get((u, v), -1)))
+                del out[u][v]
+                deleted[u] += 1
+            out[v], inn[v] = {}, {}
+            contracted[v] = True
+
+        return cls(
+            nodes,
+            _Upward.build(fwd_arcs),
+            _Upward.build(bwd_arcs),
+            version,
+            time.perf_counter() - start,
+            n_shortcuts,
+        )
+
+    # ---------- Requêtes ----------
+
+    def route(self, src, dst) -> Optional[Route]:
+        """Plus court chemin en latence de src à dst (None si pas de chemin)."""
+        s, t = self.index[src], self.index[dst]
+        if s == t:
+            return Route([src], 0, 0)
+        searches = (
+            (self.forward, {s: 0}, {s: -1}, [(0, s)]),
+            (self.backward, {t: 0}, {t: -1}, [(0, t)]),
+        )
+        best, meet = INF, -1
+        active = [True, True]
+        while active[0] or active[1]:
+            for side, (up, dist, pred, heap) in enumerate(searches):
+                if not active[side]:
+                    continue
+                if not heap or heap[0][0] >= best:
+                    active[side] = False
+                    continue
+                d, x = heapq.heappop(heap)
+                if d > dist[x]:
+                    continue
+                other = searches[1 - side][1]
+                if x in other and d + other[x] < best:
+                    best, meet = d + other[x], x
+                offsets, targets, weights = up.offsets, up.targets, up.weights
+                for i in range(offsets[x], offsets[x + 1]):
+                    y = targets[i]
+                    nd = d + weights[i]
+                    if nd < dist.get(y, INF):
+                        dist[y] = nd
+                        pred[y] = x
+                        heapq.heappush(heap, (nd, y))
+        if meet < 0:
+            return None
+
+        up_path = self._walk(searches[0][2], meet)
+        up_path.reverse()
+        down_path = self._walk(searches[1][2], meet)
+        path = [up_path[0]]
+        for a, b in zip(up_path, up_path[1:]):
+            self._unpack(a, b, path)
+        for a, b in zip(down_path, down_path[1:]):
+            self._unpack(a, b, path)
+        names = [self.nodes[i] for i in self._erase_loops(path)]
+        latency = int(best) if best == int(best) else best
+        return Route(names, latency, len(names) - 1)
+
+    @staticmethod
+    def _erase_loops(path: List[int]) -> List[int]:
+        """
+        Retire les boucles de `path`. Avec des liens de latence 0, les deux
+        demi-chemins (et les raccourcis dépliés) peuvent repasser par un même
+        nœud ; une boucle d'un plus court chemin est de latence nulle, la
+        retirer ne change pas la latence.
+        """
+        position: Dict[int, int] = {}
+        simple: List[int] = []
+        for x in path:
+            i = position.get(x)
+            if i is None:
+                position[x] = len(simple)
+                simple.append(x)
+            else:
+                for y in simple[i + 1:]:
+                    del position[y]
+                del simple[i + 1:]
+        return simple
+
+    @staticmethod
+    def _walk(pred: Dict[int, int], node: int) -> List[int]:
+        path = [node]
+        while pred[path[-1]] >= 0:
+            path.append(pred[path[-1]])
+        return path
+
+    def _unpack(self, a: int, b: int, path: List[int]) -> None:
+        """Ajoute à `path` les nœuds de l'arc a -> b (raccourcis dépliés), sauf a."""
+        if self._middles is None:
+            self._middles = {}
+            for up, outgoing in ((self.forward, True), (self.backward, False)):
+                for x in range(len(self.nodes)):
+                    for i in range(up.offsets[x], up.offsets[x + 1]):
+                        m = up.middles[i]
+                        if m >= 0:
+                            y = up.targets[i]
+                            self._middles[(x, y) if outgoing else (y, x)] = m
+        stack = [(a, b)]
+        while stack:
+            x, y = stack.pop()
+            m = self._middles.get((x, y), -1)
+            if m < 0:
+                path.append(y)
+            else:
+                # x -> m puis m -> y (pile : le second sous-arc d'abord)
+                stack.append((m, y))
+                stack.append((x, m))
+
+    # ---------- Persistance ----------
+
+    def memory(self) -> int:
+        return sys.getsizeof(self.index) + self.forward.memory() + self.backward.memory()
+
+    def stats(self) -> dict:
+        return {
+            "nodes": len(self.nodes),
+            "shortcuts": self.shortcuts,
+            "build_time": self.build_time,
+            "memory_bytes": self.memory(),
+        }
+
+    def dump(self, f: BinaryIO, stamp) -> None:
+        """
+        Écrit `stamp` (identifiant de l'état persisté, cf. state.py) puis la
+        hiérarchie : read_stamp peut ainsi vérifier le fichier sans tout lire.
+        """
+        pickle.dump(stamp, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(
+            (FORMAT_VERSION, self.nodes, self.forward.state(), self.backward.state(),
+             self.build_time, self.shortcuts),
+            f,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+
+    @staticmethod
+    def read_stamp(f: BinaryIO):
+        return pickle.load(f)
+
+    @classmethod
+    def load(cls, f: BinaryIO, version: int) -> Optional["ContractionHierarchy"]:
+        """Lit la hiérarchie qui suit l'en-tête (None si format inconnu)."""
+        payload = pickle.load(f)
+        if payload[0] != FORMAT_VERSION:
+            return None
+        _fmt, nodes, forward, backward, build_time, shortcuts = payload
+        return cls(nodes, _Upward(*forward), _Upward(*backward), version, build_time, shortcuts)
@@ -0,0 +1,146 @@
+# kpaths.py
+"""
+K plus courts chemins sans boucle (Yen) en latence, pour proposer des
+routes de secours (commande k-paths, page Analyse).
+
+Yen : le (k+1)-ième chemin dévie d'un des k premiers à un « nœud de
+déviation » (spur) : on garde la racine (début du chemin jusqu'au spur), on
+interdit les nœuds de la racine et les arcs déjà empruntés par les chemins
+de même racine, et on cherche le meilleur chemin du spur vers dst.
+
+Chaque recherche de déviation réutilise l'arbre des plus courts chemins
+vers dst (calculé une seule fois, sur le graphe complet) :
+
+- si la route de l'arbre depuis le spur évite les nœuds et arcs interdits,
+  c'est directement la meilleure déviation, sans recherche ;
+- sinon, ses distances minorent celles du graphe privé de ces nœuds et
+  arcs (supprimer ne fait qu'allonger) : elles guident un A* qui ne
+  visite que les nœuds utiles.
+
+shortest_paths est un générateur : on peut s'arrêter après n'importe quel
+chemin sans payer les suivants.
+"""
+import heapq
+from itertools import count as counter
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import networkx as nx
+
+from routing import Route, settled_predecessors
+
+INF = float("inf")
+
+
+def _latency(graph, u, v) -> float:
+    return graph._adj[u][v].get("latency", 1)
+
+
+class _TreeToTarget:
+    """Arbre des plus courts chemins vers `dst` : distance et nœud suivant."""
+
+    def __init__(self, graph, dst):
+        reverse = graph.reverse(copy=False) if graph.is_directed() else graph
+        preds, self.dist = nx.dijkstra_predecessor_and_distance(reverse, dst, weight="latency")
+        # prédécesseur dans le graphe inversé = nœud suivant vers dst ; seuls
+        # ceux fixés avant le nœud comptent (pas de cycle sur les liens de latence 0)
+        preds = settled_predecessors(preds, self.dist)
+        self.next: Dict[str, Optional[str]] = {n: (p[0] if p else None) for n, p in preds.items()}
+
+    def path_from(self, node, banned_nodes: Set, banned_arcs: Set) -> Optional[List[str]]:
+        """Route de l'arbre de `node` à dst, ou None si elle touche un interdit."""
+        path = [node]
+        nxt = self.next[node]
+        while nxt is not None:
+            if nxt in banned_nodes or (path[-1], nxt) in banned_arcs:
+                return None
+            path.append(nxt)
+            nxt = self.next[nxt]
+        return path
+
+
+def _spur_search(graph, tree: _TreeToTarget, src, dst,
+                 banned_nodes: Set, banned_arcs: Set) -> Optional[Tuple[float, List[str]]]:
+    """A* de src à dst sans les nœuds / arcs interdits, guidé par `tree`."""
+    adj = graph._adj
+    h = tree.dist
+    dist = {src: 0}
+    pred = {src: None}
+    done = set()
+    tie = counter()
+    heap = [(h[src], 0, next(tie), src)]
+    while heap:
+        _f, d, _, u = heapq.heappop(heap)
+        if u in done:
+            continue
+        done.add(u)
+        if u == dst:
+            path = [u]
+            while pred[path[-1]] is not None:
+                path.append(pred[path[-1]])
+            path.reverse()
+            return d, path
+        for v, data in adj[u].items():
+            # pas dans l'arbre : dst inatteignable depuis v, même sans interdits
+            if v in banned_nodes or v not in h or (u, v) in banned_arcs:
+                continue
+            nd = d + data.get("latency", 1)
+            if nd < dist.get(v, INF):
+                dist[v] = nd
+                pred[v] = u
+                heapq.heappush(heap, (nd + h[v], nd, next(tie), v))
+    return None
+
+
+def shortest_paths(graph, src, dst) -> Iterator[Route]:
+    """
+    Chemins sans boucle de src à dst par latence croissante (Yen), produits
+    un à un. Rien si un nœud est inconnu ou s'il n'y a pas de chemin.
+    """
+    if src not in graph or dst not in graph:
+        return
+    tree = _TreeToTarget(graph, dst)
+    if src not in tree.dist:
+        return
+    if src == dst:
+        yield Route([src], 0, 0)
+        return
+
+    first = tree.path_from(src, set(), set())
+    found: List[List[str]] = [first]
+    yield Route(first, tree.dist[src], len(first) - 1)
+
+    candidates: List[Tuple[float, int, List[str]]] = []
+    seen = {tuple(first)}
+    tie = counter()
+    while True:
+        last = found[-1]
+        root_latency = 0
+        for i in range(len(last) - 1):
+            spur = last[i]
+            root = last[:i + 1]
+            # arcs qui prolongeraient la même racine comme un chemin déjà trouvé
+            banned_arcs = {(p[i], p[i + 1]) for p in found if len(p) > i + 1 and p[:i + 1] == root}
+            banned_nodes = set(root[:-1])
+
+            spur_path = tree.path_from(spur, banned_nodes, banned_arcs)
+            if spur_path is not None:
+                spur_latency = tree.dist[spur]
+            else:
+                result = _spur_search(graph, tree, spur, dst, banned_nodes, banned_arcs)
+                if result is not None:
+                    spur_latency, spur_path = result
+            if spur_path is not None:
+                path = root[:-1] + spur_path
+                key = tuple(path)
+                if key not in seen:
+                    seen.add(key)
+                    heapq.heappush(
+                        candidates, (root_latency + spur_latency, next(tie), path)
+                    )
+            root_latency += _latency(graph, last[i], last[i + 1])
+
+        if not candidates:
+            return
+        latency, _, path = heapq.heappop(candidates)
+        found.append(path)
+        yield Route(path, latency, len(path) - 1)
@@ -0,0 +1,205 @@
+# landmarks.py
+"""
+A* avec repères (ALT : A*, Landmarks, Triangle inequality) pour les requêtes
+point à point sur la latence (dijkstra, simulate-ping).
+
+Prétraitement : on choisit `count` repères l (le premier au plus fort degré,
+puis à chaque fois le nœud le plus éloigné des repères déjà choisis) et on
+garde d(l, v) et d(v, l) pour tout nœud v. Par l'inégalité triangulaire,
+
+    d(v, t) >= max_l max(d(l, t) - d(l, v), d(v, l) - d(t, l))
+
+minore la distance restante : A* ne visite que les nœuds « dans la bonne
+direction » au lieu de toute la boule explorée par Dijkstra.
+
+Mise à jour : une hausse de latence ou une suppression (lien, nœud) ne fait
+qu'allonger les distances, donc les bornes calculées avant restent valides
+(simplement moins serrées). Une baisse de latence ou un ajout de lien les
+rend fausses : les distances sont alors recalculées à la requête suivante.
+"""
+import heapq
+import sys
+import time
+from array import array
+from itertools import count as counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+import networkx as nx
+
+from changes import (
+    DIRECTED_CHANGED,
+    LATENCY_CHANGED,
+    LINK_ADDED,
+    LINKS_ADDED,
+    NODE_RENAMED,
+    RESET,
+    Change,
+)
+from routing import Route
+
+INF = float("inf")
+
+# Nombre de repères par défaut (commande landmarks)
+DEFAULT_LANDMARKS = 16
+
+
+def astar(graph, src, dst, bound: Optional[Callable] = None) -> Tuple[Optional[Route], int]:
+    """
+    Plus court chemin en latence de src à dst par A*, guidé par `bound(v)`
+    (minorant de d(v, dst) ; sans borne : Dijkstra classique).
+    Retourne (route ou None, nombre de nœuds définitivement traités).
+    """
+    adj = graph._adj
+    dist = {src: 0}
+    pred = {src: None}
+    done = set()
+    tie = counter()
+    heap = [(bound(src) if bound else 0, 0, next(tie), src)]
+    while heap:
+        _f, d, _, u = heapq.heappop(heap)
+        if u in done:
+            continue
+        done.add(u)
+        if u == dst:
+            path = [u]
+            while pred[path[-1]] is not None:
+                path.append(pred[path[-1]])
+            path.reverse()
+            return Route(path, d, len(path) - 1), len(done)
+        for v, data in adj[u].items():
+            nd = d + data.get("latency", 1)
+            if nd < dist.get(v, INF):
+                h = bound(v) if bound else 0
+                if h == INF:
+                    # dst inatteignable depuis v
+                    continue
+                dist[v] = nd
+                pred[v] = u
+                heapq.heappush(heap, (nd + h, nd, next(tie), v))
+    return None, len(done)
+
+
+class Landmarks:
+    """Repères et distances associées, tenus à jour par les changements du réseau."""
+
+    def __init__(self, count: int = DEFAULT_LANDMARKS):
+        self.count = count
+        self.nodes: List[str] = []
+        self.index: Dict[str, int] = {}
+        # d(l, v) et d(v, l) par repère, indexés par self.index (identiques en non orienté)
+        self.dist_from: List[array] = []
+        self.dist_to: List[array] = []
+        self.stale = True
+        self.build_time = 0.0
+        self.queries = 0
+        self.settled = 0
+
+    # ---------- Prétraitement ----------
+
+    def build(self, graph) -> None:
+        """Choisit les repères et calcule leurs distances (2 Dijkstra par repère en orienté)."""
+        start = time.perf_counter()
+        nodes = list(graph)
+        self.index = {n: i for i, n in enumerate(nodes)}
+        self.nodes, self.dist_from, self.dist_to = [], [], []
+        reverse = graph.reverse(copy=False) if graph.is_directed() else None
+
+        # distance de chaque nœud au repère le plus proche (choix du suivant)
+        closest = [INF] * len(nodes)
+        landmark = max(nodes, key=graph.degree, default=None)
+        while landmark is not None and len(self.nodes) < self.count:
+            self.nodes.append(landmark)
+            d_from = self._distances(graph, landmark)
+            self.dist_from.append(d_from)
+            self.dist_to.append(self._distances(reverse, landmark) if reverse is not None else d_from)
+            closest = [min(c, d) for c, d in zip(closest, d_from)]
+            chosen = set(self.nodes)
+            # d'abord un nœud hors de portée des repères (autre composante), sinon le plus loin
+            candidates = [(c == INF, c, i) for i, c in enumerate(closest) if nodes[i] not in chosen]
+            landmark = nodes[max(candidates)[2]] if candidates else None
+        self.stale = False
+        self.build_time = time.perf_counter() - start
+
+    def _distances(self, graph, source) -> array:
+        lengths = nx.single_source_dijkstra_path_length(graph, source, weight="latency")
+        dist = array("d", [INF]) * len(self.index)
+        index = self.index
+        for node, d in lengths.items():
+            dist[index[node]] = d
+        return dist
+
+    def memory(self) -> int:
+        """Taille approximative (octets) des tableaux de distances et de l'index."""
+        arrays = {id(a): a for a in (*self.dist_from, *self.dist_to)}
+        return sys.getsizeof(self.index) + sum(sys.getsizeof(a) for a in arrays.values())
+
+    # ---------- Requêtes ----------
+
+    def bound_to(self, dst) -> Callable:
+        """Minorant v -> d(v, dst) tiré des repères (0 pour un nœud inconnu d'eux)."""
+        index = self.index
+        if dst not in index:
+            return lambda v: 0
+        t = index[dst]
+        pairs = [
+            (d_from, d_from[t], d_to, d_to[t])
+            for d_from, d_to in zip(self.dist_from, self.dist_to)
+        ]
+        cache = {}
+
+        def bound(v):
+            h = cache.get(v)
+            if h is not None:
+                return h
+            h = 0
+            i = index.get(v)
+            if i is not None:
+                for d_from, from_t, d_to, to_t in pairs:
+                    # d(v, t) >= d(l, t) - d(l, v)
+                    from_v = d_from[i]
+                    if from_v != INF and from_t - from_v > h:
+                        h = from_t - from_v
+                    # d(v, t) >= d(v, l) - d(t, l)
+                    if to_t != INF and d_to[i] - to_t > h:
+                        h = d_to[i] - to_t
+            cache[v] = h
+            return h
+
+        return bound
+
+    def route(self, graph, src, dst) -> Optional[Route]:
+        """Plus court chemin en latence par A* ; recalcule d'abord les repères si besoin."""
+        if self.stale:
+            self.build(graph)
+        route, settled = astar(graph, src, dst, self.bound_to(dst))
+        self.queries += 1
+        self.settled += settled
+        return route
+
+    def stats(self) -> dict:
+        return {
+            "landmarks": len(self.nodes),
+            "stale": self.stale,
+            "build_time": self.build_time,
+            "queries": self.queries,
+            "avg_settled": self.settled / self.queries if self.queries else 0.0,
+            "memory_bytes": self.memory(),
+        }
+
+    # ---------- Changements ----------
+
+    def on_change(self, change: Change) -> None:
+        """Abonné de Network : distances à recalculer si une latence a pu baisser."""
+        kind, data = change.kind, change.data
+        if kind == NODE_RENAMED:
+            if data["old"] in self.index:
+                self.index[data["new"]] = self.index.pop(data["old"])
+                self.nodes = [data["new"] if n == data["old"] else n for n in self.nodes]
+        elif kind == LINK_ADDED or kind in (DIRECTED_CHANGED, RESET):
+            self.stale = True
+        elif kind == LATENCY_CHANGED:
+            if data["new"] < data["old"]:
+                self.stale = True
+        elif kind == LINKS_ADDED:
+            if data["links"] or any(new < old for _u, _v, old, new in data["updated"]):
+                self.stale = True
@@ -1,18 +1,274 @@
+from collections import Counter, deque
+from itertools import islice
+from typing import Callable, Iterator, List, Optional
+
 import networkx as nx
 
 from networkx.algorithms import tree as nx_tree
 
+from changes import (  # noqa: F401  (ré-exportés : API historique de network_model)
+    CHANGELOG_SIZE,
+    DIRECTED_CHANGED,
+    LATENCY_CHANGED,
+    LINK_ADDED,
+    LINK_REMOVED,
+    LINKS_ADDED,
+    NODE_ADDED,
+    NODE_REMOVED,
+    NODE_RENAMED,
+    NODES_ADDED,
+    RESET,
+    Change,
+)
+from blocks import BlockCutTree
+from compact import COMPACT, NETWORKX, CompactGraph, CompactView, check_backend, graph_memory
+from ecmp import ShortestPathDAG, shortest_path_dag
+from fib import ForwardingTables
+from hierarchy import ContractionHierarchy
+from kpaths import shortest_paths
+from pingmatrix import ping_matrix
+from landmarks import Landmarks
+from routing import (
+    AUTO,
+    BIDIRECTIONAL,
+    FIB,
+    LATENCY,
+    Route,
+    RouteCache,
+    bidirectional_dijkstra,
+    check_algorithm,
+    check_metric,
+    find_route,
+)
+
+
 class Network:
-    def __init__(self, directed: bool = False):
+    def __init__(self, directed: bool = False, backend: str = NETWORKX):
         """
         directed = False  -> graphe non orienté (nx.Graph)
         directed = True   -> graphe orienté   (nx.DiGraph)
+        backend = "compact" -> topologie en tableaux (cf. compact.py, set_backend)
         """
+        check_backend(backend)
         self.directed = directed
         self.graph = nx.DiGraph() if directed else nx.Graph()
+        # backend compact : la topologie est dans _compact (cf. graph, routing_graph)
+        self._view: Optional[CompactView] = None
+        if backend == COMPACT:
+            self._compact = CompactGraph(directed)
+            self._graph = None
         self.last_shortest_path = None
+        # mutations réussies pas encore persistées (journal, cf. state.py)
+        self.pending_ops = []
+        # version de la topologie : +1 à chaque mutation réussie
+        self.version = 0
+        # derniers changements (cf. changes_since) et abonnés
+        self.changes = deque(maxlen=CHANGELOG_SIZE)
+        self._subscribers: List[Callable[[Change], None]] = []
+        # arbres de plus courts chemins déjà calculés (cf. routing.RouteCache)
+        self.route_cache = RouteCache()
+        self.subscribe(self._update_routes)
+        # repères A* (cf. enable_landmarks), désactivés par défaut
+        self.landmarks: Optional[Landmarks] = None
+        # hiérarchie de contraction (cf. build_hierarchy), utilisée tant
+        # que sa version est celle du réseau
+        self.hierarchy: Optional[ContractionHierarchy] = None
+        # tables de routage par nœud (cf. forwarding_tables), construites au premier usage
+        self.fib: Optional[ForwardingTables] = None
+        # DAG des plus courts chemins par source (cf. ecmp_dag), pour _ecmp_version
+        self._ecmp_dags: dict = {}
+        self._ecmp_version = 0
+        # blocs, ponts et points d'articulation (cf. block_cut_tree)
+        self._blocks: Optional[BlockCutTree] = None
         # graphe vide au démarrage
 
+    # ---------- Backend ----------
+
+    @property
+    def graph(self):
+        """
+        Le graphe networkx. Avec le backend compact, reconstruit à chaque
+        accès (figé : les mutations passent par les méthodes de Network) et
+        pas gardé : l'appelant le garde le temps de son calcul. Le routage
+        passe par routing_graph, sans reconstruction.
+        """
+        if self._compact is None:
+            return self._graph
+        return nx.freeze(self._compact.to_graph())
+
+    @property
+    def routing_graph(self):
+        """
+        Graphe sur lequel tournent les recherches de chemins : le graphe
+        networkx, ou avec le backend compact une vue de ses tableaux
+        (cf. compact.CompactView), la même tant que le stockage ne change pas.
+        """
+        if self._compact is None:
+            return self._graph
+        if self._view is None or self._view.compact is not self._compact:
+            self._view = CompactView(self._compact)
+        return self._view
+
+    @graph.setter
+    def graph(self, graph):
+        self._graph = graph
+        self._compact = None
+
+    @property
+    def compact_graph(self) -> Optional[CompactGraph]:
+        """Stockage du backend compact (None avec networkx)."""
+        return self._compact
+
+    @compact_graph.setter
+    def compact_graph(self, compact: CompactGraph):
+        self._compact = compact
+        self._graph = None
+
+    @property
+    def backend(self) -> str:
+        return NETWORKX if self._compact is None else COMPACT
+
+    def set_backend(self, backend: str) -> dict:
+        """
+        Change le stockage de la topologie : "networkx" (dicts networkx) ou
+        "compact" (tableaux, cf. compact.py ; repasser en compact le
+        recompacte). Lève ValueError pour un backend inconnu.
+        Retourne storage_stats().
+        """
+        check_backend(backend)
+        if backend == COMPACT:
+            self._compact = (
+                CompactGraph.from_graph(self._graph) if self._compact is None else self._compact.pack()
+            )
+            self._graph = None
+        elif self._compact is not None:
+            self.graph = self._compact.to_graph()
+        self._record("set_backend", backend)
+        return self.storage_stats()
+
+    def storage_stats(self) -> dict:
+        """Backend, taille de la topologie et mémoire approximative (octets) de son stockage."""
+        if self._compact is not None:
+            stats = self._compact.stats()
+        else:
+            stats = {
+                "nodes": self._graph.number_of_nodes(),
+                "links": self._graph.number_of_edges(),
+                "memory_bytes": graph_memory(self._graph),
+            }
+        return {"backend": self.backend, **stats}
+
+    def has_node(self, node_id) -> bool:
+        return node_id in (self._graph if self._compact is None else self._compact)
+
+    # ---------- Journal des mutations ----------
+
+    def _record(self, op: str, *args):
+        """
+        Mémorise une mutation réussie sous forme compacte (nom de méthode + args).
+        state.save_network ajoute ces enregistrements au journal, et
+        state.load_network les rejoue en rappelant la méthode du même nom.
+        """
+        self.pending_ops.append([op, *args])
+
+    # ---------- Versions et changements ----------
+
+    def _emit(self, kind: str, **data):
+        """Incrémente la version et notifie le changement aux abonnés."""
+        self.version += 1
+        change = Change(self.version, kind, data)
+        self.changes.append(change)
+        for callback in list(self._subscribers):
+            callback(change)
+
+    def _update_routes(self, change: Change):
+        self.route_cache.on_change(change, self.routing_graph)
+
+    def subscribe(self, callback: Callable[[Change], None]):
+        """Appelle `callback(change)` après chaque mutation réussie."""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Change], None]):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def changes_since(self, version: int) -> Optional[List[Change]]:
+        """
+        Changements survenus après `version`, dans l'ordre.
+        None si l'historique ne remonte pas assez loin : l'appelant doit
+        alors considérer que tout a changé.
+        """
+        if version == self.version:
+            return []
+        if version > self.version or not self.changes or self.changes[0].version > version + 1:
+            return None
+        return [c for c in self.changes if c.version > version]
+
+    # ---------- Transactions ----------
+
+    def copy(self) -> "Network":
+        """Copie indépendante de la topologie (sans journal, historique ni abonnés)."""
+        other = Network(directed=self.directed, backend=self.backend)
+        if self._compact is not None:
+            other._compact = self._compact.copy()
+        else:
+            other.graph = self.graph.copy()
+        return other
+
+    def adopt(self, other: "Network", changes: List[Change]):
+        """
+        Remplace la topologie par celle de `other`, copie de ce réseau
+        modifiée à part (cf. commands.run_script_transaction) : ses mutations
+        rejoignent le journal et ses `changes` sont réémis aux abonnés.
+        """
+        if other._compact is not None:
+            self._compact, self._graph = other._compact, None
+        else:
+            self.graph = other.graph
+        self.directed = other.directed
+        self.pending_ops.extend(other.pending_ops)
+        for change in changes:
+            self._emit(change.kind, **change.data)
+        self.route_cache.rebind(self.routing_graph)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["pending_ops"] = []
+        state["changes"] = deque(maxlen=CHANGELOG_SIZE)
+        state["_subscribers"] = []
+        state["route_cache"] = None
+        state["landmarks"] = None
+        state["hierarchy"] = None
+        state["fib"] = None
+        state["_ecmp_dags"] = {}
+        state["_blocks"] = None
+        state["_view"] = None
+        if state.get("_compact") is not None:
+            state["_graph"] = None
+        return state
+
+    def __setstate__(self, state):
+        # anciens fichiers d'état : graphe networkx sous "graph"
+        if "graph" in state:
+            state["_graph"] = state.pop("graph")
+        state.setdefault("_compact", None)
+        state.pop("_graph_version", None)
+        state["_view"] = None
+        self.__dict__.update(state)
+        # anciens fichiers d'état : attributs absents
+        self.__dict__.setdefault("pending_ops", [])
+        self.__dict__.setdefault("version", 0)
+        self.__dict__.setdefault("changes", deque(maxlen=CHANGELOG_SIZE))
+        self.__dict__.setdefault("_subscribers", [])
+        self.route_cache = RouteCache()
+        self.subscribe(self._update_routes)
+        self.landmarks = None
+        self.hierarchy = None
+        self.fib = None
+        self._ecmp_dags = {}
+        self.__dict__.setdefault("_ecmp_version", 0)
+        self._blocks = None
+
     def set_directed(self, directed: bool):
         """
         Change le type de graphe en conservant les nœuds et liens existants.
@@ -21,139 +277,504 @@ class Network:
         if directed == self.directed:
             return
 
+        source = self._compact.to_graph() if self._compact is not None else self._graph
+        graph = nx.DiGraph() if directed else nx.Graph()
+        # attributs recopiés par add_*_from (dictionnaires plats) : pas de deepcopy
+        graph.add_nodes_from(source._node.items())
         if directed:
             # Graph -> DiGraph
-            self.graph = self.graph.to_directed()
+            graph.add_edges_from(
+                arc for u, v, d in source.edges(data=True) for arc in ((u, v, d), (v, u, d))
+            )
         else:
-            # DiGraph -> Graph
-            self.graph = self.graph.to_undirected()
+            # DiGraph -> Graph (en cas de liens dans les deux sens, le dernier vu l'emporte)
+            graph.add_edges_from(source.edges(data=True))
+        if self._compact is not None:
+            self._compact = CompactGraph.from_graph(graph)
+            self._graph = None
+        else:
+            self.graph = graph
 
         self.directed = directed
+        self._record("set_directed", directed)
+        self._emit(DIRECTED_CHANGED, directed=directed)
+
+    # ---------- Vues dérivées ----------
+
+    def directed_view(self):
+        """Le graphe vu comme orienté (chaque lien dans les deux sens), sans copie."""
+        return self.graph if self.directed else self.graph.to_directed(as_view=True)
+
+    def undirected_view(self):
+        """
+        Le graphe vu comme non orienté, sans copie (lecture seule). En orienté,
+        deux liens opposés n'en font qu'un, avec les attributs de u -> v.
+        """
+        return self.graph.to_undirected(as_view=True) if self.directed else self.graph
 
     # ---------- Reset complet ----------
 
     def reset(self):
         """Efface totalement la topologie (tous les nœuds et liens)."""
-        self.graph.clear()
+        if self._compact is not None:
+            self._compact = CompactGraph(self.directed)
+        else:
+            self._graph.clear()
+        self._record("reset")
+        self._emit(RESET)
 
     # ---------- Commandes de base ----------
 
     def list_nodes(self):
-        return list(self.graph.nodes)
+        return list(self.iter_nodes())
 
     def list_links(self):
         # retourne (u, v, data)
-        return list(self.graph.edges(data=True))
+        return list(self.iter_links())
+
+    def iter_nodes(self):
+        """Comme list_nodes, sans construire de liste (cf. snapshot.SnapshotView)."""
+        if self._compact is not None:
+            return iter(self._compact)
+        return iter(self._graph.nodes)
+
+    def iter_links(self):
+        """Comme list_links, sans construire de liste (cf. snapshot.SnapshotView)."""
+        if self._compact is not None:
+            return self._compact.edges()
+        return iter(self._graph.edges(data=True))
 
     def show_node(self, node_id):
-        if node_id not in self.graph:
+        if not self.has_node(node_id):
             return None
-        return {
-            "id": node_id,
-            "degree": self.graph.degree[node_id],
-            "neighbors": list(self.graph.neighbors(node_id)),
-        }
+        if self._compact is not None:
+            degree = self._compact.degree(node_id)
+            neighbors = self._compact.neighbors(node_id)
+        else:
+            degree = self._graph.degree[node_id]
+            neighbors = list(self._graph.neighbors(node_id))
+        return {"id": node_id, "degree": degree, "neighbors": neighbors}
 
-    def simulate_ping(self, src, dst):
-        if src not in self.graph or dst not in self.graph:
+    def route(self, src, dst, metric: str = LATENCY, algorithm: str = AUTO) -> Optional[Route]:
+        """
+        Meilleur itinéraire de src à dst (cf. routing.find_route).
+
+        algorithm="auto" : pour la latence, si l'arbre des plus courts chemins
+        de `src` n'est pas déjà en cache (cf. route_cache), hiérarchie de
+        contraction à jour, sinon A* par repères s'ils sont activés, sinon
+        calcul (et mise en cache) de cet arbre.
+        algorithm="bidirectional" : recherche depuis src et dst à la fois
+        (cf. routing.bidirectional_dijkstra ; BFS bidirectionnel pour les sauts).
+        algorithm="fib" : acheminement saut par saut d'après les tables de
+        routage (cf. forwarding_tables ; latence uniquement).
+
+        None si un nœud est inconnu ou s'il n'y a pas de chemin. Lève
+        ValueError pour une métrique ou un algorithme inconnu.
+        """
+        check_algorithm(algorithm)
+        if not self.has_node(src) or not self.has_node(dst):
+            return None
+        graph = self.routing_graph
+        if algorithm == FIB:
+            if metric != LATENCY:
+                raise ValueError("Les tables de routage (fib) sont calculées sur la latence.")
+            return self.forwarding_tables().forward(graph, src, dst)
+        if algorithm == BIDIRECTIONAL:
+            if metric == LATENCY:
+                return bidirectional_dijkstra(graph, src, dst)[0]
+            return find_route(graph, src, dst, metric)
+        if metric == LATENCY and (src, metric) not in self.route_cache.trees:
+            if self.hierarchy_ready():
+                return self.hierarchy.route(src, dst)
+            if self.landmarks is not None:
+                return self.landmarks.route(graph, src, dst)
+        return self.route_cache.route(graph, src, dst, metric)
+
+    def forwarding_tables(self) -> ForwardingTables:
+        """
+        Tables de routage de tous les nœuds (cf. fib.py), mises à la version
+        actuelle : seules les destinations touchées depuis sont recalculées.
+        """
+        if self.fib is None:
+            self.fib = ForwardingTables()
+        if self.fib.version != self.version:
+            changes = self.changes_since(self.fib.version) if self.fib.version is not None else None
+            self.fib.refresh(self.routing_graph, self.version, changes)
+        return self.fib
+
+    def routing_table(self, node_id):
+        """Table de `node_id` : [(destination, prochain saut, latence)], ou None si nœud inconnu."""
+        if not self.has_node(node_id):
+            return None
+        return sorted(self.forwarding_tables().table(node_id))
+
+    def hierarchy_ready(self) -> bool:
+        """True si une hiérarchie de contraction correspond à la topologie actuelle."""
+        return self.hierarchy is not None and self.hierarchy.version == self.version
+
+    def build_hierarchy(self) -> dict:
+        """
+        Construit la hiérarchie de contraction de la topologie actuelle
+        (cf. hierarchy.py) ; state.save_network la persiste avec l'état.
+        Retourne ses statistiques.
+        """
+        self.hierarchy = ContractionHierarchy.build(self.graph, self.version)
+        self.hierarchy.dirty = True
+        return self.hierarchy.stats()
+
+    def enable_landmarks(self, count: int) -> Optional[dict]:
+        """
+        Active (count > 0) ou désactive (count = 0) les requêtes A* par repères
+        (cf. landmarks.py). Le prétraitement est fait tout de suite.
+        Retourne landmarks.stats(), ou None si désactivé.
+        """
+        if self.landmarks is not None:
+            self.unsubscribe(self.landmarks.on_change)
+            self.landmarks = None
+        if count <= 0:
+            return None
+        self.landmarks = Landmarks(count)
+        self.landmarks.build(self.routing_graph)
+        self.subscribe(self.landmarks.on_change)
+        return self.landmarks.stats()
+
+    def simulate_ping(self, src, dst, metric: str = LATENCY, algorithm: str = AUTO):
+        """
+        Ping de src à dst par la route de plus faible latence
+        (ou de plus petit nombre de sauts si metric="hops"),
+        calculée par `algorithm` (cf. route).
+        """
+        if not self.has_node(src) or not self.has_node(dst):
             return {
                 "ok": False,
                 "error": f"Unknown host: {src} or {dst}",
             }
         try:
-            path = nx.shortest_path(self.graph, src, dst)
-            total_latency = 0
-            for u, v in zip(path, path[1:]):
-                total_latency += self.graph[u][v].get("latency", 1)
-
-            return {
-                "ok": True,
-                "path": path,
-                "latency_ms": total_latency,
-            }
-        except Exception:
+            route = self.route(src, dst, metric, algorithm)
+        except ValueError as e:
+            return {"ok": False, "error": str(e)}
+        if route is None:
             return {
                 "ok": False,
                 "error": "No route between hosts",
             }
+        return {
+            "ok": True,
+            "path": route.path,
+            "latency_ms": route.latency,
+            "hops": route.hops,
+        }
 
     # ---------- CRUD sur nœuds / liens ----------
 
     def add_node(self, node_id):
-        if node_id in self.graph:
+        if self.has_node(node_id):
             return False
-        self.graph.add_node(node_id)
+        if self._compact is not None:
+            self._compact.add_node(node_id)
+        else:
+            self._graph.add_node(node_id)
+        self._record("add_node", node_id)
+        self._emit(NODE_ADDED, node=node_id)
         return True
 
     def add_link(self, n1, n2, latency=1):
-        if n1 not in self.graph or n2 not in self.graph:
+        if not self.has_node(n1) or not self.has_node(n2):
             return False
-        self.graph.add_edge(n1, n2, latency=latency)
+        if self._compact is not None:
+            old = self._compact.set_link(n1, n2, latency)
+        else:
+            graph = self._graph
+            old = graph[n1][n2].get("latency", 1) if graph.has_edge(n1, n2) else None
+            graph.add_edge(n1, n2, latency=latency)
+        self._record("add_link", n1, n2, latency)
+        if old is None:
+            self._emit(LINK_ADDED, u=n1, v=n2, latency=latency)
+        else:
+            # add_edge sur un lien existant : seule la latence change
+            self._emit(LATENCY_CHANGED, u=n1, v=n2, old=old, new=latency)
         return True
 
+    def add_nodes(self, node_ids):
+        """
+        Ajoute plusieurs nœuds d'un coup ; ceux qui existent déjà sont ignorés.
+        Retourne {"ok": True, "added": n, "skipped": n}.
+        """
+        node_ids = list(node_ids)
+        new = [n for n in dict.fromkeys(node_ids) if not self.has_node(n)]
+        if new:
+            if self._compact is not None:
+                for n in new:
+                    self._compact.add_node(n)
+            else:
+                self._graph.add_nodes_from(new)
+            self._record("add_nodes", new)
+            self._emit(NODES_ADDED, nodes=new)
+        return {"ok": True, "added": len(new), "skipped": len(node_ids) - len(new)}
+
+    def add_links(self, links):
+        """
+        Ajoute plusieurs liens (u, v, latency) d'un coup, tout ou rien :
+        si une extrémité n'existe pas, aucun lien n'est ajouté. Sinon le
+        résultat est celui d'une suite d'add_link (un lien existant, ou
+        répété dans `links`, prend la dernière latence).
+        Retourne {"ok": True, "added": n, "updated": n} ou {"ok": False, "error": ...}.
+        """
+        links = [tuple(link) for link in links]
+        missing = [n for u, v, _ in links for n in (u, v) if not self.has_node(n)]
+        if missing:
+            missing = list(dict.fromkeys(missing))
+            return {"ok": False, "error": f"Nœuds inconnus : {', '.join(missing)}."}
+        if not links:
+            return {"ok": True, "added": 0, "updated": 0}
+
+        added, updated = [], []
+        if self._compact is not None:
+            for u, v, latency in links:
+                old = self._compact.set_link(u, v, latency)
+                if old is None:
+                    added.append((u, v, latency))
+                else:
+                    updated.append((u, v, old, latency))
+        else:
+            # insertion directe dans les dictionnaires d'adjacence de networkx
+            # (même structure que add_edges_from, sans son coût par arête)
+            graph = self._graph
+            adj = graph._adj
+            pred = graph._pred if self.directed else adj
+            for u, v, latency in links:
+                data = adj[u].get(v)
+                if data is None:
+                    data = {"latency": latency}
+                    adj[u][v] = data
+                    pred[v][u] = data
+                    added.append((u, v, latency))
+                else:
+                    updated.append((u, v, data.get("latency", 1), latency))
+                    data["latency"] = latency
+            clear_cache = getattr(nx, "_clear_cache", None)
+            if clear_cache is not None:
+                clear_cache(graph)
+
+        self._record("add_links", [list(link) for link in links])
+        self._emit(LINKS_ADDED, links=added, updated=updated)
+        return {"ok": True, "added": len(added), "updated": len(updated)}
+
     def delete_node(self, node_id):
         """Supprime un nœud et tous les liens associés."""
-        if node_id not in self.graph:
+        if not self.has_node(node_id):
             return False
-        self.graph.remove_node(node_id)
+        if self._compact is not None:
+            links = self._compact.incident(node_id)
+            self._compact.remove_node(node_id)
+        else:
+            graph = self._graph
+            links = [(u, v, d.get("latency", 1)) for u, v, d in graph.edges(node_id, data=True)]
+            if self.directed:
+                links += [
+                    (u, v, d.get("latency", 1))
+                    for u, v, d in graph.in_edges(node_id, data=True)
+                    if u != v
+                ]
+            graph.remove_node(node_id)
+        self._record("delete_node", node_id)
+        self._emit(NODE_REMOVED, node=node_id, links=links)
         return True
 
     def delete_link(self, n1, n2):
         """Supprime un lien entre n1 et n2 (sens unique si orienté)."""
-        if not self.graph.has_edge(n1, n2):
-            return False
-        self.graph.remove_edge(n1, n2)
+        if self._compact is not None:
+            latency = (
+                self._compact.remove_link(n1, n2)
+                if self.has_node(n1) and self.has_node(n2) else None
+            )
+            if latency is None:
+                return False
+        else:
+            if not self._graph.has_edge(n1, n2):
+                return False
+            latency = self._graph[n1][n2].get("latency", 1)
+            self._graph.remove_edge(n1, n2)
+        self._record("delete_link", n1, n2)
+        self._emit(LINK_REMOVED, u=n1, v=n2, latency=latency)
         return True
 
     def update_link_latency(self, n1, n2, latency: int):
         """Modifie la latence d'un lien existant."""
-        if not self.graph.has_edge(n1, n2):
-            return False
-        self.graph[n1][n2]["latency"] = latency
+        if self._compact is not None:
+            old = self._compact.latency(n1, n2)
+            if old is None:
+                return False
+            self._compact.set_link(n1, n2, latency)
+        else:
+            if not self._graph.has_edge(n1, n2):
+                return False
+            old = self._graph[n1][n2].get("latency", 1)
+            self._graph[n1][n2]["latency"] = latency
+        self._record("update_link_latency", n1, n2, latency)
+        self._emit(LATENCY_CHANGED, u=n1, v=n2, old=old, new=latency)
         return True
 
     def rename_node(self, old_id: str, new_id: str):
-        """Renomme un nœud en conservant tous ses liens."""
-        if old_id not in self.graph or new_id in self.graph:
+        """
+        Renomme un nœud en conservant tous ses liens, en place : seuls le
+        nœud et ses liens sont touchés (O(degré)), pas le reste du graphe.
+        Le nœud renommé passe en dernier dans l'ordre des nœuds, et en fin de
+        ligne chez chacun de ses voisins (nx.relabel_nodes, qui reconstruisait
+        tout le graphe, le laissait à sa place ; cf. README, 2.6).
+        """
+        if not self.has_node(old_id) or self.has_node(new_id):
             return False
-        mapping = {old_id: new_id}
-        
-        self.graph = nx.relabel_nodes(self.graph, mapping)
+        self._relabel(old_id, new_id)
+        self._record("rename_node", old_id, new_id)
+        self._emit(NODE_RENAMED, old=old_id, new=new_id)
         return True
 
-    def shortest_path_dijkstra(self, src: str, dst: str):
-        if src not in self.graph or dst not in self.graph:
+    def _relabel(self, old_id, new_id):
+        """
+        Change la clé d'un nœud directement dans les dictionnaires de
+        networkx (les dictionnaires d'attributs des liens sont conservés).
+        """
+        if self._compact is not None:
+            self._compact.rename_node(old_id, new_id)
+            return
+        graph = self._graph
+        graph._node[new_id] = graph._node.pop(old_id)
+        if self.directed:
+            tables = ((graph._succ, graph._pred), (graph._pred, graph._succ))
+        else:
+            tables = ((graph._adj, graph._adj),)
+        for own, other in tables:
+            nbrs = own.pop(old_id)
+            if old_id in nbrs:
+                # boucle sur le nœud lui-même
+                nbrs[new_id] = nbrs.pop(old_id)
+            own[new_id] = nbrs
+            for v in nbrs:
+                if v != new_id:
+                    other[v][new_id] = other[v].pop(old_id)
+        clear_cache = getattr(nx, "_clear_cache", None)
+        if clear_cache is not None:
+            clear_cache(graph)
+
+    def rename_nodes(self, mapping):
+        """
+        Renomme plusieurs nœuds d'un coup (paires (ancien, nouveau)), tout ou
+        rien : si un ancien nom est inconnu ou un nouveau déjà pris, aucun
+        nœud n'est renommé. Sinon, équivaut à une suite de rename_node.
+        Retourne {"ok": True, "renamed": n} ou {"ok": False, "error": ...}.
+        """
+        pairs = [tuple(pair) for pair in mapping]
+        olds = [old for old, _ in pairs]
+        news = [new for _, new in pairs]
+        missing = [n for n in olds if not self.has_node(n)]
+        if missing:
+            missing = list(dict.fromkeys(missing))
+            return {"ok": False, "error": f"Nœuds inconnus : {', '.join(missing)}."}
+        taken = [n for n in news if self.has_node(n)]
+        if taken:
+            taken = list(dict.fromkeys(taken))
+            return {"ok": False, "error": f"Noms déjà utilisés : {', '.join(taken)}."}
+        twice = [n for n, count in Counter(olds + news).items() if count > 1]
+        if twice:
+            return {"ok": False, "error": f"Noms répétés : {', '.join(twice)}."}
+        for old_id, new_id in pairs:
+            self.rename_node(old_id, new_id)
+        return {"ok": True, "renamed": len(pairs)}
+
+    def shortest_path_dijkstra(self, src: str, dst: str, algorithm: str = AUTO):
+        """
+        (chemin, latence totale) de plus faible latence, ou (None, None).
+        Lève ValueError pour un algorithme inconnu (cf. route).
+        """
+        route = self.route(src, dst, LATENCY, algorithm)
+        if route is None:
             return None, None
+        return route.path, route.latency
+
+    def ecmp_dag(self, src) -> ShortestPathDAG:
+        """DAG des plus courts chemins depuis `src` (cf. ecmp.py), gardé jusqu'au prochain changement."""
+        if self._ecmp_version != self.version:
+            self._ecmp_dags = {}
+            self._ecmp_version = self.version
+        dag = self._ecmp_dags.get(src)
+        if dag is None:
+            dag = self._ecmp_dags[src] = shortest_path_dag(self.routing_graph, src)
+        return dag
+
+    def ecmp_paths(self, src, dst, limit: int = 10) -> Optional[dict]:
+        """
+        Plus courts chemins à égalité de latence de src à dst :
+        {"count", "latency", "paths" (au plus `limit`)}, ou None si un nœud est inconnu.
+        """
+        if not self.has_node(src) or not self.has_node(dst):
+            return None
+        dag = self.ecmp_dag(src)
+        return {
+            "count": dag.count_paths(dst),
+            "latency": dag.dist.get(dst),
+            "paths": list(islice(dag.iter_paths(dst), max(limit, 0))),
+        }
 
-        try:
-            path = nx.dijkstra_path(
-                self.graph,
-                source=src,
-                target=dst,
-                weight="latency",
-            )
-            distance = nx.dijkstra_path_length(
-                self.graph,
-                source=src,
-                target=dst,
-                weight="latency",
-            )
-            return path, distance
-        except nx.NetworkXNoPath:
-            return None, None
+    def ecmp_route(self, src, dst, flow) -> Optional[Route]:
+        """Route du flux `flow` de src à dst, choisie par hachage ECMP à chaque saut."""
+        if not self.has_node(src) or not self.has_node(dst):
+            return None
+        dag = self.ecmp_dag(src)
+        path = dag.flow_path(dst, flow)
+        return dag.route(path) if path is not None else None
+
+    def iter_k_shortest_paths(self, src, dst) -> Iterator[Route]:
+        """
+        Routes sans boucle de src à dst par latence croissante, produites une
+        à une (cf. kpaths.shortest_paths) : l'appelant s'arrête quand il veut.
+        """
+        return shortest_paths(self.routing_graph, src, dst)
+
+    def k_shortest_paths(self, src, dst, k: int) -> List[Route]:
+        """Les k meilleures routes de src à dst (moins s'il n'y en a pas autant)."""
+        return list(islice(self.iter_k_shortest_paths(src, dst), max(k, 0)))
+
+    def ping_matrix(self, srcs, dsts, metric: str = LATENCY, workers: Optional[int] = None):
+        """
+        Pings de chaque source vers chaque destination : itérateur de
+        (source, [route ou None par destination]), une ligne par source,
+        produit au fur et à mesure (cf. pingmatrix.py, pool de processus).
+        Lève ValueError pour une métrique inconnue ou un nœud inexistant.
+        """
+        check_metric(metric)
+        unknown = [n for n in (*srcs, *dsts) if not self.has_node(n)]
+        if unknown:
+            raise ValueError(f"Nœud introuvable : {unknown[0]}")
+        return ping_matrix(self.graph, list(srcs), list(dsts), metric, workers)
+
+    def failure_scan(self, workers: Optional[int] = None):
+        """
+        Impact de la panne de chaque lien et de chaque nœud, du plus grave au
+        moins grave (cf. failures.FailureImpact, pool de processus).
+        """
+        # import différé : pool de processus chargé pour cette analyse seulement
+        from failures import failure_scan
+
+        return failure_scan(self.graph, workers)
+
+    def all_pairs_latency(self, backend: str = "auto", workers: Optional[int] = None):
+        """
+        Matrice des latences minimales entre toutes les paires de nœuds
+        (cf. allpairs.LatencyMatrix : nodes, index, matrix NumPy).
+        backend : "auto", "floyd" (NumPy) ou "dijkstra" (pool de processus).
+        """
+        # import différé : NumPy n'est chargé que pour cette commande
+        from allpairs import all_pairs_latency
+
+        return all_pairs_latency(self.graph, backend, workers)
 
     def strongly_connected_components(self):
         """
         Retourne la liste des composantes fortement connexes (Tarjan).
         N'a de sens que pour un graphe orienté.
         """
-        if not self.directed:
-            # on travaille sur version orientée si besoin
-            G = self.graph.to_directed()
-        else:
-            G = self.graph
-
-        comps = list(nx.strongly_connected_components(G))
+        comps = list(nx.strongly_connected_components(self.directed_view()))
         # chaque comp est un set de nœuds
         return [sorted(c) for c in comps]
 
@@ -163,12 +784,8 @@ class Network:
         selon l'algorithme choisi : 'kruskal' ou 'prim'.
         Utilise l'attribut 'latency' comme poids.
         """
-        if self.directed:
-            # MST classique sur graphe non orienté
-            G = self.graph.to_undirected()
-        else:
-            G = self.graph
-
+        # MST classique sur graphe non orienté
+        G = self.undirected_view()
         if G.number_of_nodes() == 0:
             return []
 
@@ -180,16 +797,44 @@ class Network:
         )
         return list(mst_iter)
 
+    def block_cut_tree(self) -> BlockCutTree:
+        """
+        Points d'articulation, ponts, composantes biconnexes et 2-arête-connexes
+        et arbre des blocs (cf. blocks.py, graphe vu comme non orienté), en un
+        seul parcours, gardés jusqu'au prochain changement de topologie.
+        """
+        if self._blocks is None or self._blocks.version != self.version:
+            self._blocks = BlockCutTree(self.graph, self.version)
+        return self._blocks
+
     def articulation_points(self):
         """
         Retourne la liste des points d'articulation (Tarjan) sur le graphe non orienté.
         """
-        if self.directed:
-            G = self.graph.to_undirected()
-        else:
-            G = self.graph
+        return list(self.block_cut_tree().articulation_points)
+
+    def bridges(self):
+        """Liens dont la suppression déconnecte le graphe (vu comme non orienté)."""
+        return list(self.block_cut_tree().bridges)
+
+    def biconnected_components(self):
+        """Composantes biconnexes (blocs), chacune en liste de nœuds."""
+        return [sorted(block) for block in self.block_cut_tree().blocks]
 
-        return list(nx.articulation_points(G))
+    def edge_components(self):
+        """Composantes 2-arête-connexes (reliées entre elles par les ponts)."""
+        return [sorted(c) for c in self.block_cut_tree().edge_components]
+
+    def depends_on(self, src, dst, node_id):
+        """
+        True si tout chemin entre src et dst passe par `node_id`, False sinon,
+        None s'il n'y a aucun chemin ; lève KeyError pour un nœud inconnu.
+        Répondu par l'arbre des blocs, sans parcourir le graphe.
+        """
+        for n in (src, dst, node_id):
+            if not self.has_node(n):
+                raise KeyError(n)
+        return self.block_cut_tree().depends_on(src, dst, node_id)
 
     def is_acyclic(self) -> bool:
         """
@@ -199,13 +844,14 @@ class Network:
         - Orienté : teste si c'est un DAG.
         - Non orienté : teste s'il s'agit d'une forêt (aucun cycle).
         """
+        G = self.graph
         # Cas graphe vide : éviter NetworkXPointlessConcept
-        if self.graph.number_of_nodes() == 0:
+        if G.number_of_nodes() == 0:
             return True
 
         if self.directed:
             # DAG = directed acyclic graph
-            return nx.is_directed_acyclic_graph(self.graph)
+            return nx.is_directed_acyclic_graph(G)
         else:
             # Une forêt est un graphe non orienté sans cycles
-            return nx_tree.is_forest(self.graph)
+            return nx_tree.is_forest(G)
@@ -0,0 +1,65 @@
+# pingmatrix.py
+"""
+Pings en masse entre un ensemble de sources et un ensemble de destinations
+(cf. Network.ping_matrix et la commande ping-matrix).
+
+Les paires sont groupées par source : une seule recherche par source
+(arbre des plus courts chemins, cf. routing.shortest_path_tree) sert toutes
+ses destinations. Les sources sont réparties sur un pool de processus, par
+petits lots ; les résultats sont produits dans l'ordre des sources, au fur
+et à mesure, sans attendre la fin du calcul.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+from routing import LATENCY, Route, shortest_path_tree
+
+# Sources par lot envoyé à un processus (au plus ; moins si peu de sources)
+CHUNK_SIZE = 16
+
+# Une ligne de la matrice : source et route vers chaque destination (None si injoignable)
+Row = Tuple[str, List[Optional[Route]]]
+
+_worker_graph = None
+
+
+def _init_worker(graph):
+    global _worker_graph
+    _worker_graph = graph
+
+
+def _rows(sources: List[str], dsts: List[str], metric: str) -> List[Row]:
+    graph = _worker_graph
+    rows = []
+    for src in sources:
+        tree = shortest_path_tree(graph, src, metric)
+        rows.append((src, [tree.route(graph, dst) for dst in dsts]))
+    return rows
+
+
+def ping_matrix(graph, srcs: List[str], dsts: List[str], metric: str = LATENCY,
+                workers: Optional[int] = None) -> Iterator[Row]:
+    """
+    Route de chaque source vers chaque destination, ligne par ligne (dans
+    l'ordre de `srcs`). `workers` : nombre de processus (défaut : nombre de
+    CPU). Les nœuds doivent exister ; lève ValueError pour une métrique inconnue.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if not srcs:
+        return
+    if workers <= 1 or len(srcs) < 2 * workers:
+        _init_worker(graph)
+        try:
+            for src in srcs:
+                yield from _rows([src], dsts, metric)
+        finally:
+            _init_worker(None)
+        return
+    # lots assez petits pour que les premières lignes arrivent vite
+    size = max(1, min(CHUNK_SIZE, len(srcs) // (4 * workers)))
+    chunks = [srcs[i:i + size] for i in range(0, len(srcs), size)]
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(graph,)) as pool:
+        for rows in pool.map(_rows, chunks, [dsts] * len(chunks), [metric] * len(chunks)):
+            yield from rows
@@ -0,0 +1,467 @@
+# routing.py
+"""
+Calcul d'itinéraires, partagé par simulate-ping, dijkstra et la page Analyse.
+
+Une seule recherche par requête donne à la fois le chemin et sa distance,
+selon la métrique choisie :
+
+- "latency" : latence totale minimale (Dijkstra, arrêté dès que dst est atteint) ;
+- "hops"    : nombre de sauts minimal (BFS bidirectionnel), latence sommée ensuite.
+
+L'algorithme est au choix (cf. Network.route) : "auto" (arbre en cache,
+hiérarchie, repères ou arbre complet depuis src), "bidirectional"
+(Dijkstra bidirectionnel, cf. bidirectional_dijkstra), qui traite bien moins
+de nœuds sur les topologies de grand diamètre (anneaux, chaînes de sites),
+ou "fib" (acheminement saut par saut par les tables de routage, cf. fib.py).
+
+Un lien sans attribut "latency" compte pour 1 ms, comme partout ailleurs.
+
+RouteCache garde l'arbre des plus courts chemins de chaque source déjà
+interrogée : les requêtes suivantes depuis cette source se résolvent en
+remontant les prédécesseurs (O(longueur du chemin)). Abonné aux changements
+du Network, il n'écarte que les arbres qu'un changement peut modifier.
+"""
+import heapq
+import sys
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import networkx as nx
+
+from changes import (
+    DIRECTED_CHANGED,
+    LATENCY_CHANGED,
+    LINK_ADDED,
+    LINK_REMOVED,
+    LINKS_ADDED,
+    NODE_REMOVED,
+    NODE_RENAMED,
+    RESET,
+    Change,
+)
+
+LATENCY = "latency"
+HOPS = "hops"
+METRICS = (LATENCY, HOPS)
+
+AUTO = "auto"
+BIDIRECTIONAL = "bidirectional"
+FIB = "fib"
+ALGORITHMS = (AUTO, BIDIRECTIONAL, FIB)
+
+INF = float("inf")
+
+# Nombre d'arbres (source, métrique) gardés par RouteCache (les moins récents sortent)
+ROUTE_CACHE_SIZE = 64
+
+
+class Route(NamedTuple):
+    """Un itinéraire : nœuds traversés, latence totale (ms) et nombre de sauts."""
+    path: List[str]
+    latency: float
+    hops: int
+
+
+def path_latency(graph, path: List[str]) -> float:
+    """Somme des latences le long de `path`."""
+    return sum(graph[u][v].get("latency", 1) for u, v in zip(path, path[1:]))
+
+
+def check_metric(metric: str) -> None:
+    if metric not in METRICS:
+        raise ValueError(f"Métrique inconnue : {metric} (choix : {', '.join(METRICS)}).")
+
+
+def check_algorithm(algorithm: str) -> None:
+    if algorithm not in ALGORITHMS:
+        raise ValueError(
+            f"Algorithme inconnu : {algorithm} (choix : {', '.join(ALGORITHMS)})."
+        )
+
+
+def find_route(graph, src, dst, metric: str = LATENCY) -> Optional[Route]:
+    """
+    Meilleur itinéraire de src à dst selon `metric`, ou None s'il n'y en a pas.
+    Lève ValueError pour une métrique inconnue.
+    """
+    check_metric(metric)
+    try:
+        if metric == HOPS:
+            path = nx.shortest_path(graph, src, dst)
+            latency = path_latency(graph, path)
+        else:
+            latency, path = nx.single_source_dijkstra(graph, src, dst, weight="latency")
+    except (nx.NetworkXNoPath, nx.NodeNotFound):
+        return None
+    return Route(path, latency, len(path) - 1)
+
+
+def bidirectional_dijkstra(graph, src, dst) -> Tuple[Optional[Route], int]:
+    """
+    Plus court chemin en latence de src à dst par deux recherches de
+    Dijkstra, l'une depuis src sur les successeurs, l'autre depuis dst sur
+    les prédécesseurs (les voisins en non orienté), qui se rejoignent au
+    milieu. Arrêt dès que la somme des deux têtes de file dépasse le
+    meilleur chemin vu. Retourne (route ou None, nombre de nœuds traités).
+    """
+    if src == dst:
+        return Route([src], 0, 0), 1
+    backward_adj = graph._pred if graph.is_directed() else graph._adj
+    # par côté : voisins, distances, prédécesseurs, nœuds traités, file
+    sides = (
+        (graph._adj, {src: 0}, {src: None}, set(), [(0, src)]),
+        (backward_adj, {dst: 0}, {dst: None}, set(), [(0, dst)]),
+    )
+    best, meet = INF, None
+    while sides[0][4] and sides[1][4]:
+        if sides[0][4][0][0] + sides[1][4][0][0] >= best:
+            break
+        # on avance le côté dont la file est la plus courte
+        side = 0 if len(sides[0][4]) <= len(sides[1][4]) else 1
+        adj, dist, pred, done, heap = sides[side]
+        other_dist = sides[1 - side][1]
+        d, u = heapq.heappop(heap)
+        if u in done:
+            continue
+        done.add(u)
+        for v, data in adj[u].items():
+            nd = d + data.get("latency", 1)
+            if nd < dist.get(v, INF):
+                dist[v] = nd
+                pred[v] = u
+                heapq.heappush(heap, (nd, v))
+            if v in other_dist and nd + other_dist[v] < best:
+                best, meet = nd + other_dist[v], v
+    settled = len(sides[0][3]) + len(sides[1][3])
+    if meet is None:
+        return None, settled
+
+    forward_pred, backward_pred = sides[0][2], sides[1][2]
+    path = [meet]
+    while forward_pred[path[-1]] is not None:
+        path.append(forward_pred[path[-1]])
+    path.reverse()
+    node = backward_pred[meet]
+    while node is not None:
+        path.append(node)
+        node = backward_pred[node]
+    return Route(path, best, len(path) - 1), settled
+
+
+# ---------- Arbres de plus courts chemins ----------
+
+class ShortestPathTree(NamedTuple):
+    """
+    Plus courts chemins depuis `source` vers tous les nœuds atteignables :
+    distance (latence ou sauts selon `metric`) et prédécesseur de chaque nœud.
+    """
+    source: str
+    metric: str
+    directed: bool
+    dist: Dict[str, float]
+    pred: Dict[str, Optional[str]]
+
+    def path_to(self, dst) -> Optional[List[str]]:
+        if dst not in self.pred:
+            return None
+        path = [dst]
+        node = self.pred[dst]
+        while node is not None:
+            path.append(node)
+            node = self.pred[node]
+        path.reverse()
+        return path
+
+    def route(self, graph, dst) -> Optional[Route]:
+        path = self.path_to(dst)
+        if path is None:
+            return None
+        if self.metric == HOPS:
+            return Route(path, path_latency(graph, path), len(path) - 1)
+        return Route(path, self.dist[dst], len(path) - 1)
+
+    def memory(self) -> int:
+        """Taille approximative (octets) des deux dictionnaires."""
+        return sys.getsizeof(self.dist) + sys.getsizeof(self.pred)
+
+    # ---------- Effet d'un changement ----------
+
+    def _improved_by(self, u, v, latency) -> bool:
+        """True si un lien u -> v de cette latence raccourcit un chemin de l'arbre."""
+        du = self.dist.get(u)
+        if du is None:
+            return False
+        dv = self.dist.get(v)
+        return dv is None or du + (1 if self.metric == HOPS else latency) < dv
+
+    def _uses(self, u, v) -> bool:
+        """True si le lien u -> v (ou v -> u en non orienté) est une arête de l'arbre."""
+        pred = self.pred
+        return (v in pred and pred[v] == u) or (
+            not self.directed and u in pred and pred[u] == v
+        )
+
+    def _link_added(self, u, v, latency) -> bool:
+        return self._improved_by(u, v, latency) or (
+            not self.directed and self._improved_by(v, u, latency)
+        )
+
+    def _latency_changed(self, u, v, old, new) -> bool:
+        if self.metric == HOPS or new == old:
+            return False
+        return self._uses(u, v) or (new < old and self._link_added(u, v, new))
+
+    def affected_by(self, change: Change) -> bool:
+        """True si `change` peut modifier un des chemins de cet arbre."""
+        kind, data = change.kind, change.data
+        if kind == LINK_ADDED:
+            return self._link_added(data["u"], data["v"], data["latency"])
+        if kind == LINKS_ADDED:
+            return any(self._link_added(u, v, lat) for u, v, lat in data["links"]) or any(
+                self._latency_changed(u, v, old, new) for u, v, old, new in data["updated"]
+            )
+        if kind == LINK_REMOVED:
+            return self._uses(data["u"], data["v"])
+        if kind == LATENCY_CHANGED:
+            return self._latency_changed(data["u"], data["v"], data["old"], data["new"])
+        if kind == NODE_REMOVED:
+            return data["node"] in self.dist
+        if kind == NODE_RENAMED:
+            return data["old"] in self.dist
+        # nœuds ajoutés : isolés, donc sans effet sur les chemins existants
+        return kind in (DIRECTED_CHANGED, RESET)
+
+    # ---------- Réparation incrémentale ----------
+
+    def repair(self, graph, change: Change) -> Optional[int]:
+        """
+        Met l'arbre à jour en place après `change`, déjà appliqué à `graph`
+        (le graphe sur lequel l'arbre a été calculé) : seuls les nœuds dont
+        la distance peut changer sont revus. Retourne leur nombre, ou None
+        si ce changement ne se répare pas (l'arbre doit alors être recalculé).
+        """
+        kind, data = change.kind, change.data
+        if kind == LINK_ADDED:
+            return self._decrease(graph, [(data["u"], data["v"])])
+        if kind == LINKS_ADDED:
+            if any(new > old for _u, _v, old, new in data["updated"]):
+                return None
+            arcs = [(u, v) for u, v, _lat in data["links"]]
+            if self.metric == LATENCY:
+                arcs += [(u, v) for u, v, old, new in data["updated"] if new < old]
+            return self._decrease(graph, arcs)
+        if kind == LINK_REMOVED:
+            return self._increase(graph, data["u"], data["v"])
+        if kind == LATENCY_CHANGED:
+            if self.metric == HOPS or data["new"] == data["old"]:
+                return 0
+            if data["new"] < data["old"]:
+                return self._decrease(graph, [(data["u"], data["v"])])
+            return self._increase(graph, data["u"], data["v"])
+        if kind == NODE_RENAMED and data["old"] != self.source:
+            return self._rename(data["old"], data["new"])
+        return None
+
+    def _rename(self, old, new) -> int:
+        """Renommage d'un nœud (hors source) : mêmes chemins, clés renommées."""
+        self.dist[new] = self.dist.pop(old)
+        self.pred[new] = self.pred.pop(old)
+        children = [x for x, p in self.pred.items() if p == old]
+        for x in children:
+            self.pred[x] = new
+        return len(children) + 1
+
+    def _weight(self, data) -> float:
+        return 1 if self.metric == HOPS else data.get("latency", 1)
+
+    def _propagate(self, graph, heap: list) -> int:
+        """Dijkstra à partir des nœuds de `heap` dont la distance vient de changer."""
+        adj, dist, pred = graph._adj, self.dist, self.pred
+        settled = 0
+        while heap:
+            d, x = heapq.heappop(heap)
+            if d > dist.get(x, INF):
+                continue
+            settled += 1
+            for y, data in adj[x].items():
+                nd = d + self._weight(data)
+                if nd < dist.get(y, INF):
+                    dist[y] = nd
+                    pred[y] = x
+                    heapq.heappush(heap, (nd, y))
+        return settled
+
+    def _decrease(self, graph, arcs) -> int:
+        """Arcs ajoutés ou raccourcis : on propage depuis les nœuds qu'ils rapprochent."""
+        if not self.directed:
+            arcs = [*arcs, *((v, u) for u, v in arcs)]
+        adj, dist, pred = graph._adj, self.dist, self.pred
+        heap = []
+        for u, v in arcs:
+            if u not in dist:
+                continue
+            nd = dist[u] + self._weight(adj[u][v])
+            if nd < dist.get(v, INF):
+                dist[v] = nd
+                pred[v] = u
+                heapq.heappush(heap, (nd, v))
+        return self._propagate(graph, heap)
+
+    def _increase(self, graph, u, v) -> int:
+        """
+        Arc u -> v allongé ou supprimé : seul le sous-arbre qu'il porte peut
+        s'éloigner. Ses nœuds sont retirés de l'arbre, chacun repart de son
+        meilleur prédécesseur hors du sous-arbre, puis Dijkstra entre eux.
+        """
+        pred, dist = self.pred, self.dist
+        if pred.get(v) == u and v in dist:
+            root = v
+        elif not self.directed and pred.get(u) == v and u in dist:
+            root = u
+        else:
+            # arc hors de l'arbre : aucun plus court chemin ne l'emprunte
+            return 0
+        adj = graph._adj
+        into = graph._pred if self.directed else adj
+        subtree = {root}
+        stack = [root]
+        while stack:
+            x = stack.pop()
+            for y in adj[x]:
+                if y not in subtree and pred.get(y) == x:
+                    subtree.add(y)
+                    stack.append(y)
+        for x in subtree:
+            del dist[x]
+            del pred[x]
+        heap = []
+        for x in subtree:
+            best, best_pred = INF, None
+            for z, data in into[x].items():
+                if z in dist:
+                    nd = dist[z] + self._weight(data)
+                    if nd < best:
+                        best, best_pred = nd, z
+            if best_pred is not None:
+                dist[x] = best
+                pred[x] = best_pred
+                heapq.heappush(heap, (best, x))
+        self._propagate(graph, heap)
+        return len(subtree)
+
+
+def settled_predecessors(preds: Dict, dist: Dict) -> Dict[str, List[str]]:
+    """
+    Prédécesseurs à égalité de networkx, réduits à ceux fixés strictement
+    avant le nœud (`dist` est rempli dans l'ordre où Dijkstra fixe les
+    nœuds). Avec des liens de latence 0, networkx garde aussi des
+    prédécesseurs fixés après, voire un voisin comme prédécesseur de la
+    source : les listes forment alors des cycles. Filtrées, elles forment
+    un DAG dont `dist` est un ordre topologique.
+    """
+    rank = {node: i for i, node in enumerate(dist)}
+    return {
+        node: [p for p in preds.get(node, ()) if rank[p] < rank[node]]
+        for node in dist
+    }
+
+
+def shortest_path_tree(graph, src, metric: str = LATENCY) -> ShortestPathTree:
+    """Arbre complet des plus courts chemins depuis `src` (une recherche)."""
+    check_metric(metric)
+    if metric == HOPS:
+        preds, dist = nx.predecessor(graph, src, return_seen=True)
+    else:
+        preds, dist = nx.dijkstra_predecessor_and_distance(graph, src, weight="latency")
+    # premier prédécesseur fixé avant le nœud : même chemin que nx.dijkstra_path
+    # en cas d'égalité, et jamais de cycle (liens de latence 0)
+    preds = settled_predecessors(preds, dist)
+    pred = {node: (p[0] if p else None) for node, p in preds.items()}
+    return ShortestPathTree(src, metric, graph.is_directed(), dist, pred)
+
+
+class RouteCache:
+    """
+    Arbres de plus courts chemins par (source, métrique), tenus à jour
+    par les changements du réseau (cf. Network.subscribe) : réparés en
+    place quand c'est possible (cf. ShortestPathTree.repair), écartés sinon.
+    """
+
+    def __init__(self, size: int = ROUTE_CACHE_SIZE):
+        self.size = size
+        self.trees: "OrderedDict[tuple, ShortestPathTree]" = OrderedDict()
+        # graphe sur lequel les arbres en cache ont été calculés
+        self.graph = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.repairs = 0
+        # nœuds revus par les réparations (cf. repair)
+        self.repaired_nodes = 0
+
+    def tree(self, graph, src, metric: str = LATENCY) -> ShortestPathTree:
+        """Arbre depuis `src`, calculé au premier appel puis gardé en cache."""
+        if graph is not self.graph:
+            if self.graph is not None:
+                self.clear()
+            self.graph = graph
+        key = (src, metric)
+        tree = self.trees.get(key)
+        if tree is not None:
+            self.hits += 1
+            self.trees.move_to_end(key)
+            return tree
+        self.misses += 1
+        tree = shortest_path_tree(graph, src, metric)
+        self.trees[key] = tree
+        if len(self.trees) > self.size:
+            self.trees.popitem(last=False)
+        return tree
+
+    def route(self, graph, src, dst, metric: str = LATENCY) -> Optional[Route]:
+        """Comme find_route, en réutilisant l'arbre de `src`."""
+        return self.tree(graph, src, metric).route(graph, dst)
+
+    def on_change(self, change: Change, graph=None) -> None:
+        """
+        Abonné de Network : répare les arbres que `change` peut modifier si
+        `graph` est celui de leur calcul (modifié en place par ce seul
+        changement), sinon les écarte.
+        """
+        repairable = graph is not None and graph is self.graph
+        stale = []
+        for key, tree in self.trees.items():
+            if not tree.affected_by(change):
+                continue
+            touched = tree.repair(graph, change) if repairable else None
+            if touched is None:
+                stale.append(key)
+            else:
+                self.repairs += 1
+                self.repaired_nodes += touched
+        for key in stale:
+            del self.trees[key]
+        self.invalidations += len(stale)
+
+    def rebind(self, graph) -> None:
+        """Les arbres restants valent pour `graph`, qui remplace le précédent."""
+        if self.trees:
+            self.graph = graph
+
+    def clear(self) -> None:
+        self.invalidations += len(self.trees)
+        self.trees.clear()
+
+    def stats(self) -> dict:
+        """Nombre d'arbres, requêtes, taux de succès et mémoire (octets)."""
+        queries = self.hits + self.misses
+        return {
+            "trees": len(self.trees),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / queries if queries else 0.0,
+            "invalidations": self.invalidations,
+            "repairs": self.repairs,
+            "repaired_nodes": self.repaired_nodes,
+            "memory_bytes": sum(tree.memory() for tree in self.trees.values()),
+        }
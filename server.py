@@ -0,0 +1,340 @@
+# server.py
+"""
+Serveur d'état local, optionnel, partagé par le REPL, la CLI et Streamlit.
+
+Le serveur garde un unique Network en mémoire, exécute les commandes de
+n'importe quel nombre de clients (une à la fois, sous verrou ; les longs
+calculs en lecture seule sur une copie, hors verrou, cf. Command.on_copy)
+et persiste l'état en arrière-plan dans les fichiers habituels (snapshot +
+journal).
+
+Protocole (socket Unix SOCKET_FILE, une requête par connexion) :
+une ligne JSON de requête, éventuellement suivie de `size` octets bruts,
+puis une ligne JSON de réponse, éventuellement suivie de `size` octets.
+
+    {"type": "command", "cmd": "add-node R1"}   -> {"output": "..."}
+    {"type": "snapshot"}                        -> {"epoch": e, "version": v, "size": n} + snapshot
+    {"type": "apply", "epoch": e, "ops": [...]} -> {"applied": true|false, "base": v0,
+                                                     "version": v, "rejected": [...]}
+    {"type": "replace", "size": n} + snapshot   -> {"epoch": e, "version": v}
+    {"type": "hierarchy", "size": n} + hiérarchie -> {"attached": true|false}
+
+`epoch` identifie l'état du serveur : il change à chaque "replace". Des
+mutations calculées sur une ancienne époque sont refusées, le client
+renvoie alors un état complet (même logique que la génération du journal).
+`version` est Network.version du réseau du serveur après la requête
+(`base` : avant). Les mutations d'un "apply" sont rejouées comme le
+journal ; celles qui ne s'appliquent plus (réseau modifié entre-temps par
+un autre client, ex. lien vers un nœud supprimé) sont renvoyées dans
+`rejected`, et le client les signale.
+
+Une requête qui échoue (exception) reçoit {"error": "..."} : les fonctions
+client lèvent alors ServerError (run_command retourne le message).
+
+Une hiérarchie de contraction construite par un client (commande contract
+sur sa copie) est envoyée sérialisée (ContractionHierarchy.dump), avec
+l'état (époque, version) du serveur pour lequel elle a été construite : le
+serveur l'adopte s'il en est toujours là, sans rien recalculer.
+
+Les fonctions client retournent None quand aucun serveur ne répond :
+l'appelant retombe alors sur les fichiers.
+"""
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+from typing import List, NamedTuple, Optional, Tuple
+
+from commands import COMMANDS, handle_command
+from hierarchy import ContractionHierarchy
+from network_model import Network
+from snapshot import read_snapshot, write_snapshot
+
+SOCKET_FILE = "network_state.sock"
+
+# Délai (s) entre deux sauvegardes d'arrière-plan
+PERSIST_INTERVAL = 1.0
+
+
+# ---------- Client ----------
+
+class ServerError(RuntimeError):
+    """Le serveur d'état a répondu par une erreur (requête non exécutée, ou en partie)."""
+
+
+class Applied(NamedTuple):
+    """Réponse à "apply" (cf. push_ops)."""
+    # False : le serveur a changé d'époque, rien n'a été appliqué
+    applied: bool
+    # version du réseau du serveur avant / après
+    base: int
+    version: int
+    # mutations qui ne s'appliquaient plus à son réseau
+    rejected: List[list]
+
+
+def _connect() -> Optional[socket.socket]:
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(SOCKET_FILE):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(SOCKET_FILE)
+    except OSError:
+        # fichier de socket orphelin (serveur arrêté brutalement)
+        sock.close()
+        return None
+    return sock
+
+
+def _request(header: dict, payload: bytes = b"") -> Optional[Tuple[dict, bytes]]:
+    sock = _connect()
+    if sock is None:
+        return None
+    try:
+        with sock, sock.makefile("rwb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            f.write(payload)
+            f.flush()
+            line = f.readline()
+            if not line:
+                return None
+            reply = json.loads(line)
+            data = f.read(reply.get("size", 0))
+    except OSError:
+        return None
+    if "error" in reply:
+        raise ServerError(reply["error"])
+    return reply, data
+
+
+def is_running() -> bool:
+    """True si un serveur d'état répond sur SOCKET_FILE."""
+    sock = _connect()
+    if sock is None:
+        return False
+    sock.close()
+    return True
+
+
+def run_command(cmd: str) -> Optional[str]:
+    """Exécute `cmd` sur le serveur et retourne sa sortie texte (ou son erreur)."""
+    try:
+        res = _request({"type": "command", "cmd": cmd})
+    except ServerError as e:
+        return f"Erreur du serveur d'état : {e}"
+    if res is None:
+        return None
+    return res[0]["output"]
+
+
+def fetch_network() -> Optional[Tuple[Network, int, int]]:
+    """Copie locale du réseau du serveur : (network, epoch, version du serveur)."""
+    res = _request({"type": "snapshot"})
+    if res is None:
+        return None
+    reply, data = res
+    net, _generation = read_snapshot(io.BytesIO(data))
+    return net, reply["epoch"], reply["version"]
+
+
+def push_ops(ops: List[list], epoch: int) -> Optional[Applied]:
+    """Envoie des mutations (format Network.pending_ops) calculées sur l'époque `epoch`."""
+    res = _request({"type": "apply", "epoch": epoch, "ops": ops})
+    if res is None:
+        return None
+    reply = res[0]
+    if not reply["applied"]:
+        return Applied(False, reply["version"], reply["version"], [])
+    return Applied(True, reply["base"], reply["version"], reply["rejected"])
+
+
+def replace_network(net: Network) -> Optional[Tuple[int, int]]:
+    """Remplace tout l'état du serveur par `net`, retourne (nouvelle époque, version)."""
+    buf = io.BytesIO()
+    write_snapshot(buf, net)
+    data = buf.getvalue()
+    res = _request({"type": "replace", "size": len(data)}, data)
+    if res is None:
+        return None
+    reply = res[0]
+    return reply["epoch"], reply["version"]
+
+
+def push_hierarchy(ch: ContractionHierarchy, epoch: int, version: int) -> Optional[bool]:
+    """
+    Envoie une hiérarchie construite pour l'état (epoch, version) du serveur.
+    Retourne False si le serveur n'en est plus là (hiérarchie ignorée).
+    """
+    buf = io.BytesIO()
+    ch.dump(buf, (epoch, version))
+    data = buf.getvalue()
+    res = _request({"type": "hierarchy", "size": len(data)}, data)
+    if res is None:
+        return None
+    return res[0]["attached"]
+
+
+# ---------- Serveur ----------
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+            payload = self.rfile.read(request.get("size", 0))
+            reply, data = self.server.dispatch(request, payload)
+        except Exception as e:
+            # réponse d'erreur plutôt qu'une connexion coupée : le client ne
+            # doit pas croire le serveur arrêté et retomber sur les fichiers
+            reply, data = {"error": f"{type(e).__name__} : {e}"}, b""
+        if data:
+            reply["size"] = len(data)
+        self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n" + data)
+
+
+class NetworkServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Détient le Network partagé ; toutes les mutations passent par `lock`."""
+
+    daemon_threads = True
+
+    def __init__(self, path: str, net: Network, save):
+        super().__init__(path, _Handler)
+        self.net = net
+        self.epoch = 0
+        self.lock = threading.Lock()
+        self._save = save
+        self._replaced = False
+        self._stop = threading.Event()
+        self._persister = threading.Thread(target=self._persist_loop, daemon=True)
+
+    def dispatch(self, request: dict, payload: bytes) -> Tuple[dict, bytes]:
+        kind = request.get("type")
+        if kind == "command":
+            return {"output": self._run_command(request["cmd"])}, b""
+
+        if kind == "hierarchy":
+            return self._attach_hierarchy(payload), b""
+
+        with self.lock:
+            if kind == "snapshot":
+                buf = io.BytesIO()
+                write_snapshot(buf, self.net)
+                return {"epoch": self.epoch, "version": self.net.version}, buf.getvalue()
+
+            if kind == "apply":
+                if request["epoch"] != self.epoch:
+                    return {"applied": False, "version": self.net.version}, b""
+                # mêmes mutations autorisées que lors du rejeu du journal
+                from state import REPLAYABLE_OPS, replay_failed
+
+                base = self.net.version
+                rejected = [
+                    op for op in request["ops"]
+                    if op[0] not in REPLAYABLE_OPS
+                    or replay_failed(op, getattr(self.net, op[0])(*op[1:]))
+                ]
+                return {
+                    "applied": True,
+                    "base": base,
+                    "version": self.net.version,
+                    "rejected": rejected,
+                }, b""
+
+            if kind == "replace":
+                self.net, _generation = read_snapshot(io.BytesIO(payload))
+                self.epoch += 1
+                self._replaced = True
+                return {"epoch": self.epoch, "version": self.net.version}, b""
+
+        return {"error": f"Requête inconnue : {kind}"}, b""
+
+    def _run_command(self, cmd: str) -> str:
+        """
+        Exécute `cmd` sous le verrou, sauf les longs calculs en lecture seule
+        (Command.on_copy : pools de processus, contract) : ils tournent sur
+        une copie prise sous le verrou, puis sans lui, et les autres clients
+        ne les attendent pas. Une hiérarchie construite ainsi est adoptée si
+        le réseau n'a pas changé entre-temps.
+        """
+        words = cmd.split()
+        command = COMMANDS.get(words[0]) if words else None
+        if command is None or not command.on_copy:
+            with self.lock:
+                return handle_command(self.net, cmd)
+        with self.lock:
+            net = self.net.copy()
+            stamp = (self.epoch, self.net.version)
+        output = handle_command(net, cmd)
+        if net.hierarchy_ready():
+            self._adopt_hierarchy(net.hierarchy, stamp)
+        return output
+
+    def _attach_hierarchy(self, payload: bytes) -> dict:
+        """Hiérarchie envoyée par un client (cf. push_hierarchy), lue hors du verrou."""
+        f = io.BytesIO(payload)
+        stamp = tuple(ContractionHierarchy.read_stamp(f))
+        ch = ContractionHierarchy.load(f, 0)
+        return {"attached": ch is not None and self._adopt_hierarchy(ch, stamp)}
+
+    def _adopt_hierarchy(self, ch: ContractionHierarchy, stamp: tuple) -> bool:
+        """
+        Rattache `ch` au réseau s'il en est toujours à l'état `stamp`
+        (époque, version) pour lequel elle a été construite ; persist()
+        l'écrit ensuite avec l'état.
+        """
+        with self.lock:
+            if stamp != (self.epoch, self.net.version):
+                return False
+            ch.version = self.net.version
+            ch.dirty = True
+            self.net.hierarchy = ch
+        return True
+
+    # ---------- Persistance d'arrière-plan ----------
+
+    def persist(self) -> None:
+        with self.lock:
+            hierarchy = self.net.hierarchy
+            if self.net.pending_ops or self._replaced or (hierarchy is not None and hierarchy.dirty):
+                self._save(self.net)
+                self._replaced = False
+
+    def _persist_loop(self) -> None:
+        while not self._stop.wait(PERSIST_INTERVAL):
+            self.persist()
+
+    def serve(self) -> None:
+        self._persister.start()
+        try:
+            self.serve_forever()
+        finally:
+            self._stop.set()
+            self.persist()
+            self.server_close()
+            if os.path.exists(self.server_address):
+                os.remove(self.server_address)
+
+
+def serve() -> None:
+    """Démarre le serveur (bloquant) sur l'état actuellement sauvegardé."""
+    from state import load_network_from_file, save_network_to_file
+
+    if is_running():
+        raise RuntimeError(f"Un serveur d'état tourne déjà sur {SOCKET_FILE}.")
+    if os.path.exists(SOCKET_FILE):
+        os.remove(SOCKET_FILE)
+
+    def _terminate(signum, frame):
+        # arrêt propre (sauvegarde finale) aussi sur SIGTERM
+        raise KeyboardInterrupt
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, _terminate)
+
+    server = NetworkServer(SOCKET_FILE, load_network_from_file(), save_network_to_file)
+    server.serve()
@@ -0,0 +1,440 @@
+# snapshot.py
+"""
+Format binaire compact pour l'état du réseau.
+
+Disposition (little-endian) :
+
+    en-tête     : magic, flags (bit 0 = orienté, bit 1 = backend compact, bit 2 = attributs),
+                  type des latences ('i', 'q' ou 'd'),
+                  génération, nb de nœuds, taille de la table des noms,
+                  nb de liens, nb d'entrées d'adjacence, nb d'entrées de prédécesseurs
+    noms        : noms des nœuds en UTF-8, séparés par '\\0' (index = id entier)
+    name_offsets: uint64[n + 1] -> nom du nœud i = noms[name_offsets[i]:name_offsets[i+1] - 1]
+    name_order  : uint32[n]     -> ids triés par nom (recherche dichotomique)
+    latencies   : int32|int64|float64[nb_liens] -> latence de chaque lien
+    offsets     : uint64[n + 1] -> adjacence du nœud i = [offsets[i], offsets[i+1])
+    targets     : uint32[m]     -> id du voisin
+    edge_ids    : uint32[m]     -> id du lien (index dans latencies)
+    (orienté uniquement) pred_offsets, pred_targets, pred_edge_ids, même disposition
+    (bit 2 uniquement) attributs : uint64 taille, puis pickle de
+                  {"nodes": [(id, attrs)], "links": [(id du lien, attrs)]}
+                  pour les attributs autres que la latence (rares : l'application
+                  n'en crée pas, mais ils ne doivent pas se perdre au rechargement)
+
+L'adjacence est stockée dans l'ordre exact des dictionnaires networkx,
+ce qui garantit que list-links / show-node affichent la même chose
+avant et après un rechargement. En non orienté, les deux sens d'un lien
+partagent le même id, comme ils partagent le même dict dans networkx.
+
+Avec le backend compact (cf. compact.py), ces tableaux sont ceux du
+CompactGraph (après pack) : ni l'écriture ni la relecture ne passent par
+les dicts networkx.
+
+SnapshotView lit ce même fichier via mmap, sans reconstruire le graphe :
+les commandes en lecture seule (list-nodes, list-links, show-node)
+n'ont alors rien à désérialiser.
+"""
+import array
+import gc
+import mmap
+import pickle
+import struct
+import sys
+from contextlib import contextmanager
+from itertools import accumulate, chain
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from compact import COMPACT, CompactGraph
+from network_model import Network
+
+MAGIC = b"NETSNAP3"
+HEADER = struct.Struct("<8sBc6xQQQQQQ")
+
+FLAG_DIRECTED = 1
+FLAG_COMPACT = 2
+FLAG_ATTRS = 4
+
+
+def _array(typecode: str, itemsize: int) -> array.array:
+    arr = array.array(typecode)
+    if arr.itemsize != itemsize:
+        raise RuntimeError(f"array('{typecode}') n'a pas une taille de {itemsize} octets")
+    return arr
+
+
+def _write_array(f: BinaryIO, arr: array.array) -> None:
+    if sys.byteorder == "big":
+        arr = array.array(arr.typecode, arr)
+        arr.byteswap()
+    f.write(arr.tobytes())
+
+
+def _read_array(f: BinaryIO, typecode: str, itemsize: int, count: int) -> array.array:
+    arr = _array(typecode, itemsize)
+    data = f.read(count * itemsize)
+    if len(data) != count * itemsize:
+        raise ValueError("Snapshot tronqué.")
+    arr.frombytes(data)
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return arr
+
+
+class _CSR:
+    """Adjacence (ou prédécesseurs) sous forme offsets / targets / edge_ids."""
+
+    def __init__(self):
+        self.offsets = _array("Q", 8)
+        self.targets = _array("I", 4)
+        self.edge_ids = _array("I", 4)
+        self.offsets.append(0)
+
+    @classmethod
+    def build(cls, adj, index, edge_of) -> "_CSR":
+        csr = cls()
+        csr.offsets.fromlist(list(accumulate(map(len, adj.values()))))
+        csr.targets.fromlist(list(map(index.__getitem__, chain.from_iterable(adj.values()))))
+        attr_ids = [id(attrs) for nbrs in adj.values() for attrs in nbrs.values()]
+        csr.edge_ids.fromlist(list(map(edge_of.__getitem__, attr_ids)))
+        return csr
+
+    def write(self, f: BinaryIO) -> None:
+        _write_array(f, self.offsets)
+        _write_array(f, self.targets)
+        _write_array(f, self.edge_ids)
+
+    @classmethod
+    def from_rows(cls, rows) -> "_CSR":
+        """Base d'un CompactGraph tassé (sans surcouche) : mêmes tableaux."""
+        csr = cls.__new__(cls)
+        csr.offsets, csr.targets, csr.edge_ids = rows.offsets, rows.targets, rows.edge_ids
+        return csr
+
+    @classmethod
+    def read(cls, f: BinaryIO, n_nodes: int, n_entries: int) -> "_CSR":
+        csr = cls.__new__(cls)
+        csr.offsets = _read_array(f, "Q", 8, n_nodes + 1)
+        csr.targets = _read_array(f, "I", 4, n_entries)
+        csr.edge_ids = _read_array(f, "I", 4, n_entries)
+        return csr
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Suspend le ramasse-miettes cyclique pendant la (dé)sérialisation :
+    on alloue des millions de petits dicts sans cycle, et chaque passe
+    du GC générationnel les reparcourt pour rien.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _latency_array(latencies) -> array.array:
+    """Tableau de latences le plus compact possible : int32, puis int64, puis float64."""
+    for typecode in ("i", "q"):
+        try:
+            return array.array(typecode, latencies)
+        except (TypeError, OverflowError):
+            pass
+    return array.array("d", latencies)
+
+
+def _graph_arrays(net: Network):
+    """(noms, latences, adjacence, prédécesseurs, attributs) d'un réseau au backend networkx."""
+    G = net.graph
+    names = list(G)
+    index = {name: i for i, name in enumerate(names)}
+    with _gc_paused():
+        # un id par dict d'attributs (partagé entre u->v et v->u en non orienté,
+        # et entre successeurs et prédécesseurs en orienté)
+        succ_attrs = [attrs for nbrs in G._adj.values() for attrs in nbrs.values()]
+        first_seen = dict(zip(map(id, succ_attrs), succ_attrs))
+        edge_of = {key: eid for eid, key in enumerate(first_seen)}
+        latencies = [attrs.get("latency", 1) for attrs in first_seen.values()]
+
+        succ = _CSR.build(G._adj, index, edge_of)
+        pred = _CSR.build(G._pred, index, edge_of) if net.directed else _CSR()
+
+        # attributs autres que la latence (None s'il n'y en a aucun)
+        node_attrs = [(i, attrs) for i, attrs in enumerate(G._node.values()) if attrs]
+        link_attrs = [
+            (eid, {k: v for k, v in attrs.items() if k != "latency"})
+            for eid, attrs in enumerate(first_seen.values())
+            if len(attrs) > 1 or (attrs and "latency" not in attrs)
+        ]
+    extra = {"nodes": node_attrs, "links": link_attrs} if node_attrs or link_attrs else None
+    return names, latencies, succ, pred, extra
+
+
+def _compact_arrays(net: Network):
+    """Idem au backend compact : les tableaux du CompactGraph tassé, tels quels (que des latences)."""
+    packed = net.compact_graph.pack()
+    succ = _CSR.from_rows(packed.succ)
+    pred = _CSR.from_rows(packed.pred) if net.directed else _CSR()
+    return packed.names, packed.latencies, succ, pred, None
+
+
+def write_snapshot(f: BinaryIO, net: Network, generation: int = 0) -> None:
+    """Écrit le réseau `net` dans le fichier binaire `f`."""
+    compact = net.backend == COMPACT
+    names, latencies, succ, pred, extra = _compact_arrays(net) if compact else _graph_arrays(net)
+    encoded = [name.encode("utf-8") for name in names]
+    names_blob = b"\0".join(encoded)
+    name_offsets = _array("Q", 8)
+    name_offsets.append(0)
+    name_offsets.fromlist(list(accumulate(len(e) + 1 for e in encoded)))
+    name_order = _array("I", 4)
+    name_order.fromlist(sorted(range(len(names)), key=encoded.__getitem__))
+
+    lat_arr = _latency_array(latencies)
+
+    f.write(
+        HEADER.pack(
+            MAGIC,
+            (FLAG_DIRECTED if net.directed else 0)
+            | (FLAG_COMPACT if compact else 0)
+            | (FLAG_ATTRS if extra is not None else 0),
+            lat_arr.typecode.encode("ascii"),
+            generation,
+            len(names),
+            len(names_blob),
+            len(latencies),
+            len(succ.targets),
+            len(pred.targets),
+        )
+    )
+    f.write(names_blob)
+    _write_array(f, name_offsets)
+    _write_array(f, name_order)
+    _write_array(f, lat_arr)
+    succ.write(f)
+    if net.directed:
+        pred.write(f)
+    if extra is not None:
+        blob = pickle.dumps(extra, protocol=pickle.HIGHEST_PROTOCOL)
+        f.write(struct.pack("<Q", len(blob)))
+        f.write(blob)
+
+
+def _rows(names, csr: _CSR, attrs):
+    """Reconstruit les dictionnaires d'adjacence, nœud par nœud."""
+    name_at = names.__getitem__
+    attrs_at = attrs.__getitem__
+    offsets, targets, edge_ids = csr.offsets, csr.targets, csr.edge_ids
+    return {
+        u: dict(
+            zip(
+                map(name_at, targets[offsets[i]:offsets[i + 1]]),
+                map(attrs_at, edge_ids[offsets[i]:offsets[i + 1]]),
+            )
+        )
+        for i, u in enumerate(names)
+    }
+
+
+def read_snapshot(f: BinaryIO) -> Tuple[Network, int]:
+    """
+    Relit un snapshot et reconstruit le Network correspondant.
+    Retourne (network, generation).
+    """
+    header = f.read(HEADER.size)
+    if len(header) != HEADER.size:
+        raise ValueError("Snapshot tronqué.")
+    (
+        magic, flags, typecode, generation,
+        n_nodes, names_len, n_edges, n_adj, n_pred,
+    ) = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError("Fichier de snapshot invalide.")
+    directed = bool(flags & FLAG_DIRECTED)
+    typecode = typecode.decode("ascii")
+
+    blob = f.read(names_len).decode("utf-8")
+    names = blob.split("\0") if n_nodes else []
+    # index des noms : inutile pour une reconstruction complète
+    f.seek(8 * (n_nodes + 1) + 4 * n_nodes, 1)
+    latencies = _read_array(f, typecode, array.array(typecode).itemsize, n_edges)
+
+    # Un dict d'attributs par lien, partagé par toutes les entrées qui le
+    # référencent : c'est ce que fait networkx (add_edges_from ne permettrait
+    # pas de retrouver l'ordre exact des voisins de chaque nœud).
+    if flags & FLAG_COMPACT:
+        # backend compact : les tableaux du fichier sont ceux du CompactGraph
+        succ = _CSR.read(f, n_nodes, n_adj)
+        pred = _CSR.read(f, n_nodes, n_pred) if directed else None
+        net = Network(directed=directed, backend=COMPACT)
+        net.compact_graph = CompactGraph.from_arrays(
+            directed, names, latencies if typecode != "d" else list(latencies),
+            (succ.offsets, succ.targets, succ.edge_ids),
+            (pred.offsets, pred.targets, pred.edge_ids) if directed else None,
+        )
+        return net, generation
+
+    net = Network(directed=directed)
+    G = net.graph
+    with _gc_paused():
+        attrs = [{"latency": lat} for lat in latencies]
+        G._node.update((name, {}) for name in names)
+        G._adj.update(_rows(names, _CSR.read(f, n_nodes, n_adj), attrs))
+        if directed:
+            G._pred.update(_rows(names, _CSR.read(f, n_nodes, n_pred), attrs))
+        if flags & FLAG_ATTRS:
+            extra = _read_extra(f)
+            for i, node_attrs in extra["nodes"]:
+                G._node[names[i]].update(node_attrs)
+            for eid, link_attrs in extra["links"]:
+                attrs[eid].update(link_attrs)
+
+    return net, generation
+
+
+def _read_extra(f: BinaryIO) -> dict:
+    """Section des attributs autres que la latence (cf. FLAG_ATTRS)."""
+    size = f.read(8)
+    if len(size) != 8:
+        raise ValueError("Snapshot tronqué.")
+    blob = f.read(struct.unpack("<Q", size)[0])
+    try:
+        return pickle.loads(blob)
+    except (pickle.UnpicklingError, EOFError) as e:
+        raise ValueError("Snapshot tronqué.") from e
+
+
+class SnapshotView:
+    """
+    Vue en lecture seule d'un snapshot, projetée en mémoire (mmap).
+
+    Expose la même API de lecture que Network (directed, iter_nodes,
+    iter_links, show_node) en lisant directement les tableaux du fichier :
+    seules les pages réellement consultées sont chargées.
+    Nécessite une machine little-endian (comme le format sur disque).
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            # ValueError si le fichier est vide (mmap refuse une taille nulle)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buf = buf = memoryview(self._mmap)
+        try:
+            self._map_sections(buf)
+        except ValueError:
+            self.close()
+            raise
+
+    def _map_sections(self, buf: memoryview) -> None:
+        """Projette les tableaux du fichier ; ValueError s'il est tronqué ou d'un autre format."""
+        if len(buf) < HEADER.size:
+            raise ValueError("Snapshot tronqué.")
+        (
+            magic, flags, typecode, self.generation,
+            n_nodes, names_len, n_edges, n_adj, n_pred,
+        ) = HEADER.unpack_from(buf)
+        if magic != MAGIC:
+            raise ValueError("Fichier de snapshot invalide.")
+        self.directed = bool(flags & FLAG_DIRECTED)
+        self._n = n_nodes
+        # UnicodeDecodeError / ValueError (sous-classes de ValueError) si inconnu
+        typecode = typecode.decode("ascii")
+        latency_size = array.array(typecode).itemsize
+
+        pos = HEADER.size
+
+        def section(fmt: str, itemsize: int, count: int) -> memoryview:
+            nonlocal pos
+            end = pos + itemsize * count
+            if end > len(buf):
+                raise ValueError("Snapshot tronqué.")
+            view = buf[pos:end].cast(fmt)
+            pos = end
+            return view
+
+        self._names = section("B", 1, names_len)
+        self._name_offsets = section("Q", 8, n_nodes + 1)
+        self._name_order = section("I", 4, n_nodes)
+        self._latencies = section(typecode, latency_size, n_edges)
+        self._offsets = section("Q", 8, n_nodes + 1)
+        self._targets = section("I", 4, n_adj)
+        self._edge_ids = section("I", 4, n_adj)
+        if self.directed:
+            self._pred_offsets = section("Q", 8, n_nodes + 1)
+
+    def close(self) -> None:
+        for name in ("_names", "_name_offsets", "_name_order", "_latencies",
+                     "_offsets", "_targets", "_edge_ids", "_pred_offsets", "_buf"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        self._mmap.close()
+
+    # ---------- Accès bas niveau ----------
+
+    def _name_bytes(self, i: int) -> bytes:
+        return self._names[self._name_offsets[i]:self._name_offsets[i + 1] - 1].tobytes()
+
+    def _name(self, i: int) -> str:
+        return self._name_bytes(i).decode("utf-8")
+
+    def _find(self, name: str) -> Optional[int]:
+        """Id du nœud `name` (recherche dichotomique sur name_order), ou None."""
+        key = name.encode("utf-8")
+        lo, hi = 0, self._n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._name_bytes(self._name_order[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._n and self._name_bytes(self._name_order[lo]) == key:
+            return self._name_order[lo]
+        return None
+
+    # ---------- API de lecture (identique à Network) ----------
+
+    def iter_nodes(self) -> Iterator[str]:
+        return (self._name(i) for i in range(self._n))
+
+    def iter_links(self) -> Iterator[Tuple[str, str, dict]]:
+        """Même ordre que graph.edges(data=True) : chaque lien une fois en non orienté."""
+        offsets, targets, edge_ids, latencies = (
+            self._offsets, self._targets, self._edge_ids, self._latencies
+        )
+        seen = bytearray(self._n)
+        for i in range(self._n):
+            u = self._name(i)
+            for k in range(offsets[i], offsets[i + 1]):
+                j = targets[k]
+                if self.directed or not seen[j]:
+                    yield u, self._name(j), {"latency": latencies[edge_ids[k]]}
+            seen[i] = 1
+
+    def show_node(self, node_id):
+        i = self._find(node_id)
+        if i is None:
+            return None
+        row = self._targets[self._offsets[i]:self._offsets[i + 1]]
+        if self.directed:
+            degree = len(row) + self._pred_offsets[i + 1] - self._pred_offsets[i]
+        else:
+            # networkx compte deux fois une boucle sur soi-même
+            degree = len(row) + (i in row)
+        return {
+            "id": node_id,
+            "degree": degree,
+            "neighbors": [self._name(j) for j in row],
+        }
+
+
+def open_snapshot_view(path: str) -> Optional[SnapshotView]:
+    """
+    Ouvre `path` en lecture seule via mmap, ou None si impossible ici.
+    ValueError si le fichier est vide, tronqué ou d'un autre format.
+    """
+    if sys.byteorder != "little":
+        return None
+    return SnapshotView(path)
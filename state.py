@@ -1,28 +1,382 @@
 # state.py
+import json
 import os
 import pickle
+import weakref
+from typing import List, Optional
+
+import server
+from hierarchy import ContractionHierarchy
 from network_model import Network
+from snapshot import open_snapshot_view, read_snapshot, write_snapshot
 
-STATE_FILE = "network_state.pkl"
+STATE_FILE = "network_state.snap"
+# ancien format (Network picklé), relu si aucun snapshot binaire n'existe
+LEGACY_STATE_FILE = "network_state.pkl"
+JOURNAL_FILE = "network_state.journal"
+# hiérarchie de contraction (cf. hierarchy.py), si elle a été construite
+HIERARCHY_FILE = "network_state.ch"
 
+# Le journal est replié dans un nouveau snapshot dès qu'il dépasse
+# max(JOURNAL_MIN_COMPACT_BYTES, taille du snapshot) : le coût amorti
+# d'une sauvegarde reste proportionnel à la mutation, pas au graphe.
+JOURNAL_MIN_COMPACT_BYTES = 1 << 20
 
-def load_network() -> Network:
+# Mutations que l'on accepte de rejouer depuis le journal
+REPLAYABLE_OPS = {
+    "add_node",
+    "add_link",
+    "add_nodes",
+    "add_links",
+    "delete_node",
+    "delete_link",
+    "update_link_latency",
+    "rename_node",
+    "reset",
+    "set_directed",
+    "set_backend",
+}
+
+# Mutations dont l'échec au rejeu laisse l'état voulu (nœud déjà présent,
+# nœud ou lien déjà supprimé) : elles ne sont pas signalées comme refusées
+IDEMPOTENT_OPS = {"add_node", "delete_node", "delete_link"}
+
+# Génération (snapshot + journal) sur laquelle chaque Network en mémoire est basé
+_generations: "weakref.WeakKeyDictionary[Network, int]" = weakref.WeakKeyDictionary()
+# Idem pour les réseaux obtenus auprès du serveur d'état (époque du serveur)
+_server_epochs: "weakref.WeakKeyDictionary[Network, int]" = weakref.WeakKeyDictionary()
+# (version du réseau du serveur, Network.version locale) au dernier échange avec lui
+_server_versions: "weakref.WeakKeyDictionary[Network, tuple]" = weakref.WeakKeyDictionary()
+# Dernière version (Network.version) chargée ou sauvegardée de chaque réseau
+_saved_versions: "weakref.WeakKeyDictionary[Network, int]" = weakref.WeakKeyDictionary()
+# Network.version au moment où le réseau correspondait au snapshot de sa génération
+_base_versions: "weakref.WeakKeyDictionary[Network, int]" = weakref.WeakKeyDictionary()
+
+
+# ---------- Snapshot ----------
+
+def _read_snapshot():
     """
-    Charge le réseau depuis un fichier pickle, ou crée un nouveau réseau vide.
+    Retourne (network, generation) depuis le snapshot, ou (None, None).
+    Accepte aussi l'ancien fichier pickle (Network picklé directement).
     """
     if os.path.exists(STATE_FILE):
         with open(STATE_FILE, "rb") as f:
-            net = pickle.load(f)
-        if not isinstance(net, Network):
-            net = Network(directed=False)
+            return read_snapshot(f)
+    if os.path.exists(LEGACY_STATE_FILE):
+        with open(LEGACY_STATE_FILE, "rb") as f:
+            payload = pickle.load(f)
+        if isinstance(payload, dict) and isinstance(payload.get("network"), Network):
+            return payload["network"], payload.get("generation", 0)
+        if isinstance(payload, Network):
+            return payload, 0
+    return None, None
+
+
+def _write_snapshot(net: Network, generation: int) -> None:
+    """
+    Écrit un snapshot complet puis repart d'un journal vide de la même génération.
+    Les deux écritures passent par un fichier temporaire + os.replace.
+    """
+    tmp = STATE_FILE + ".tmp"
+    with open(tmp, "wb") as f:
+        write_snapshot(f, net, generation)
+    os.replace(tmp, STATE_FILE)
+
+    tmp = JOURNAL_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"generation": generation}) + "\n")
+    os.replace(tmp, JOURNAL_FILE)
+
+    net.pending_ops.clear()
+    _generations[net] = generation
+    _base_versions[net] = net.version
+    # nouvel identifiant d'état : une hiérarchie encore à jour est réécrite avec lui
+    if net.hierarchy_ready():
+        net.hierarchy.dirty = True
+        _save_hierarchy(net)
+
+
+def _stamp(net: Network):
+    """
+    Identifiant de l'état persisté de `net` : (génération, nb de mutations
+    depuis le snapshot). Chaque mutation journalisée incrémente la version
+    exactement une fois, y compris au rejeu : deux processus qui ont chargé
+    le même état obtiennent donc le même identifiant.
+    """
+    if net not in _generations or net not in _base_versions:
+        return None
+    return _generations[net], net.version - _base_versions[net]
+
+
+# ---------- Hiérarchie de contraction ----------
+
+def _save_hierarchy(net: Network) -> None:
+    """Écrit la hiérarchie de `net` si elle est à jour et pas encore sur disque."""
+    ch = net.hierarchy
+    if ch is None or not ch.dirty or not net.hierarchy_ready():
+        return
+    stamp = _stamp(net)
+    if stamp is None:
+        return
+    tmp = HIERARCHY_FILE + ".tmp"
+    with open(tmp, "wb") as f:
+        ch.dump(f, stamp)
+    os.replace(tmp, HIERARCHY_FILE)
+    ch.dirty = False
+
+
+def _load_hierarchy(net: Network) -> None:
+    """Rattache à `net` la hiérarchie sur disque si elle a été faite pour cet état."""
+    stamp = _stamp(net)
+    if stamp is None or not os.path.exists(HIERARCHY_FILE):
+        return
+    try:
+        with open(HIERARCHY_FILE, "rb") as f:
+            if ContractionHierarchy.read_stamp(f) != stamp:
+                return
+            net.hierarchy = ContractionHierarchy.load(f, net.version)
+    except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError):
+        # fichier absent, tronqué ou d'un autre format : on route sans hiérarchie
+        net.hierarchy = None
+
+
+# ---------- Journal ----------
+
+def _journal_generation() -> Optional[int]:
+    """Lit la génération en tête du journal (None si absent ou illisible)."""
+    try:
+        with open(JOURNAL_FILE, "r", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+        return header["generation"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _journal_has_records(generation: int) -> bool:
+    """True si le journal contient des mutations à rejouer sur ce snapshot."""
+    try:
+        with open(JOURNAL_FILE, "r", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if not isinstance(header, dict) or header.get("generation") != generation:
+                return False
+            return bool(f.readline())
+    except (OSError, ValueError):
+        return False
+
+
+def _replay_journal(net: Network, generation: int) -> None:
+    """
+    Rejoue les mutations du journal sur le réseau issu du snapshot.
+    Un journal d'une autre génération a déjà été replié : on l'ignore.
+    """
+    if not os.path.exists(JOURNAL_FILE):
+        return
+    with open(JOURNAL_FILE, "r", encoding="utf-8") as f:
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            return
+        if not isinstance(header, dict) or header.get("generation") != generation:
+            return
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # dernière ligne tronquée (écriture interrompue) : on s'arrête là
+                break
+            op, args = record[0], record[1:]
+            if op in REPLAYABLE_OPS:
+                getattr(net, op)(*args)
+
+
+def replay_failed(op: list, result) -> bool:
+    """
+    True si la mutation `op`, rejouée sur un réseau qui a divergé, n'a pas
+    pu s'appliquer (méthode de Network qui retourne False ou {"ok": False}).
+    """
+    if op[0] in IDEMPOTENT_OPS:
+        return False
+    return result is False or (isinstance(result, dict) and result.get("ok") is False)
+
+
+def _should_compact() -> bool:
+    try:
+        journal_size = os.path.getsize(JOURNAL_FILE)
+        snapshot_size = os.path.getsize(STATE_FILE)
+    except OSError:
+        return True
+    return journal_size > max(JOURNAL_MIN_COMPACT_BYTES, snapshot_size)
+
+
+def compact_network(net: Network) -> None:
+    """Replie le journal dans un nouveau snapshot (écriture complète du réseau)."""
+    _write_snapshot(net, (_journal_generation() or 0) + 1)
+
+
+# ---------- Fichiers ----------
+
+def load_network_from_file() -> Network:
+    """
+    Charge le réseau depuis le snapshot puis rejoue le journal,
+    ou crée un nouveau réseau vide.
+    """
+    net, generation = _read_snapshot()
+    if net is None:
+        return Network(directed=False)
+    _base_versions[net] = net.version
+    _replay_journal(net, generation)
+    net.pending_ops.clear()
+    _generations[net] = generation
+    _load_hierarchy(net)
+    return net
+
+
+def save_network_to_file(net: Network) -> None:
+    """
+    Sauvegarde le réseau dans les fichiers d'état.
+
+    Si `net` est basé sur l'état courant du fichier, seules ses mutations
+    en attente sont ajoutées au journal. Sinon (réseau neuf, ou état
+    replié entre-temps par un autre processus) on écrit un snapshot complet.
+    Une hiérarchie de contraction nouvellement construite est écrite à côté.
+    """
+    generation = _generations.get(net)
+    if generation is None or generation != _journal_generation():
+        compact_network(net)
+    elif net.pending_ops:
+        with open(JOURNAL_FILE, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(op) + "\n" for op in net.pending_ops))
+        net.pending_ops.clear()
+
+        if _should_compact():
+            compact_network(net)
+
+    _save_hierarchy(net)
+
+
+# ---------- API publique ----------
+
+def load_network() -> Network:
+    """
+    Charge le réseau : copie de celui du serveur d'état s'il tourne
+    (cf. server.py), sinon depuis les fichiers.
+    """
+    fetched = server.fetch_network()
+    if fetched is not None:
+        net, epoch, version = fetched
+        _server_epochs[net] = epoch
+        _server_versions[net] = (version, net.version)
     else:
-        net = Network(directed=False)
+        net = load_network_from_file()
+    _saved_versions[net] = net.version
     return net
 
 
-def save_network(net: Network) -> None:
+def load_network_view():
+    """
+    Accès en lecture seule au réseau, pour les commandes qui ne le modifient pas.
+
+    Si le snapshot est à jour (aucune mutation en attente dans le journal),
+    retourne une SnapshotView projetée en mémoire : rien n'est désérialisé.
+    Sinon (snapshot illisible, ou serveur d'état détenant un état plus
+    récent que les fichiers), retourne le Network complet via load_network().
+    Les deux exposent directed, iter_nodes(), iter_links() et show_node().
+    """
+    if os.path.exists(STATE_FILE) and not server.is_running():
+        try:
+            view = open_snapshot_view(STATE_FILE)
+        except (OSError, ValueError):
+            # snapshot vide, tronqué ou d'un autre format : lecture complète
+            view = None
+        if view is not None:
+            if not _journal_has_records(view.generation):
+                return view
+            view.close()
+    return load_network()
+
+
+def save_network(net: Network) -> List[list]:
+    """
+    Sauvegarde le réseau : auprès du serveur d'état s'il tourne, sinon
+    dans les fichiers. Dans les deux cas, seules les mutations en attente
+    sont transmises quand `net` est basé sur l'état courant ; sinon l'état
+    complet est remplacé. Un réseau inchangé depuis son dernier
+    chargement / sauvegarde n'est pas réécrit.
+
+    Retourne les mutations que le serveur n'a pas pu appliquer, son réseau
+    ayant été modifié entre-temps par un autre client (cf. server.py) :
+    `net` ne correspond alors plus à l'état sauvegardé, à recharger.
+    """
+    if (
+        _saved_versions.get(net) == net.version
+        and not net.pending_ops
+        and not _hierarchy_unsaved(net)
+    ):
+        return []
+    rejected = _save(net)
+    _saved_versions[net] = net.version
+    return rejected
+
+
+def _hierarchy_unsaved(net: Network) -> bool:
+    return net.hierarchy is not None and net.hierarchy.dirty
+
+
+def _save(net: Network) -> List[list]:
+    epoch = _server_epochs.get(net)
+    if epoch is not None:
+        rejected = _push_ops(net, epoch)
+        if rejected is not None:
+            _push_hierarchy(net)
+            return rejected
+
+    if server.is_running():
+        replaced = server.replace_network(net)
+        if replaced is not None:
+            net.pending_ops.clear()
+            _server_epochs[net], version = replaced
+            _server_versions[net] = (version, net.version)
+            _push_hierarchy(net)
+            return []
+
+    save_network_to_file(net)
+    return []
+
+
+def _push_ops(net: Network, epoch: int) -> Optional[List[list]]:
+    """
+    Envoie les mutations en attente ; retourne celles que le serveur a
+    refusées, ou None s'il ne les a pas prises (arrêté, ou autre époque).
+    """
+    if not net.pending_ops:
+        return []
+    pushed = server.push_ops(net.pending_ops, epoch)
+    if pushed is None or not pushed.applied:
+        return None
+    net.pending_ops.clear()
+    synced = _server_versions.get(net)
+    if not pushed.rejected and synced is not None and synced[0] == pushed.base:
+        _server_versions[net] = (pushed.version, net.version)
+    else:
+        # mutations d'autres clients entre-temps : le réseau du serveur n'est
+        # plus celui de `net` (pas de hiérarchie à lui envoyer)
+        _server_versions.pop(net, None)
+    return pushed.rejected
+
+
+def _push_hierarchy(net: Network) -> None:
     """
-    Sauvegarde le réseau dans un fichier pickle.
+    Hiérarchie construite sur une copie locale du réseau du serveur : ni
+    les mutations ni le snapshot envoyés ne la transportent. Elle lui est
+    envoyée sérialisée, pour l'état du serveur qui correspond à cette copie ;
+    le serveur l'adopte sans rien recalculer et la persiste avec l'état
+    (cf. NetworkServer.persist). S'il a changé entre-temps, elle est perdue.
     """
-    with open(STATE_FILE, "wb") as f:
-        pickle.dump(net, f)
+    if not (_hierarchy_unsaved(net) and net.hierarchy_ready()):
+        return
+    synced = _server_versions.get(net)
+    if synced is None or synced[1] != net.version:
+        return
+    if server.push_hierarchy(net.hierarchy, _server_epochs[net], synced[0]) is not None:
+        net.hierarchy.dirty = False